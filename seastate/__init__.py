@@ -1,9 +1,30 @@
+import asyncio
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, Union
+from typing import Dict, Hashable, Iterator, Tuple, Union
 
-from seastate.api.api_mediator import ApiMediator
-from seastate.settings import MEASUREMENTS
+import numpy as np
+
+from seastate.api.api_mediator import ApiMediator, get_api, rank_candidates
+from seastate.api.base import (
+    BaseApi,
+    check_format,
+    coverage,
+    empty_data,
+    timestamps_of,
+)
+from seastate.api.fetcher import ConcurrentFetcher, request_key
+from seastate.data import STATION_INDEX
+from seastate.exceptions import SeaStateException
+from seastate.models import Station
+from seastate.resample import first_rows, resample, to_records
+from seastate.settings import (
+    FALLBACK_MIN_COVERAGE,
+    MAX_IN_FLIGHT_PER_HOST,
+    MEASUREMENTS,
+    STREAM_BATCH_SIZE,
+)
+from seastate.utils import build_date_range
 
 
 class SeaState:
@@ -15,6 +36,10 @@ class SeaState:
         self.lon = float(lon)
         self.exclude = list(exclude)
         self.mediator_map = {}
+        # (station_id, measurement) -> timestamp of the last sample synced
+        self.cursor = {}
+        # measurement -> station that served it in the last from_date_range
+        self.source = {}
         self._set_api_mediators()
 
     @property
@@ -28,36 +53,7 @@ class SeaState:
         Builds date range to fullest days possible,
         with start and end at midnight and (midnight - 1)
         """
-        # Process timeframe
-        # todo: handle iso date strings
-        # todo: handle bad date strings
-        if start and end:  # all values provided
-            # end can be declared relative to start as a timedelta
-            if isinstance(end, timedelta):
-                end = start + end
-        elif start and not end:  # no end provided, return same day as start
-            end = start
-        elif not start and not end:  # nothing provided, return today
-            start = end = datetime.today()
-
-        # remove microseconds to pass comparison tests
-        # remove hours and minutes from start
-        # set hours and minutes to end of day for end
-        if isinstance(start, datetime):
-            start = start.replace(microsecond=0)
-            start = start.replace(hour=0, minute=0, second=0)
-        if isinstance(end, datetime):
-            end = end.replace(microsecond=0)
-            end = end.replace(hour=23, minute=59, second=59)
-
-        # log warning if end is before start
-        if end < start:
-            self._logger.warning("end is after start, swapping values")
-            buffer = end
-            end = start
-            start = buffer
-
-        return start, end
+        return build_date_range(start, end, self._logger)
 
     def _get_mediator(self, measurement: str) -> ApiMediator:
         return self.__getattribute__(measurement)
@@ -91,53 +87,772 @@ class SeaState:
         )
         return data
 
+    def _log_measurement_error(self, key: str, e: Exception) -> None:
+        self._logger.error(
+            f"Error occurred while retrieving data for measurement {key}: {str(e)}"
+        )
+
+    def _group_measurements(
+        self, data: Dict, format: str = "records"
+    ) -> Dict[Tuple[BaseApi, str], list]:
+        """Groups requested measurements by the api and station serving them,
+        measurements that can't be resolved are set to empty data"""
+        groups = {}
+        for key in self._requested_measurements:
+            try:
+                mediator = self._get_mediator(key)
+                group = (mediator.api, mediator.station.id)
+            except Exception as e:
+                self._log_measurement_error(key, e)
+                data[key] = empty_data(format)
+                continue
+            groups.setdefault(group, []).append(mediator.measurement)
+        return groups
+
+    @staticmethod
+    def _plan_station_groups(
+        groups: Dict[Tuple[BaseApi, str], list],
+        start: datetime,
+        end: datetime,
+        data: Dict,
+        format: str,
+        logger: logging.Logger,
+    ) -> Tuple[list, list]:
+        """Collects the requests of every station group up front
+
+        Returns:
+            Tuple[list, list]: plan entries (api, station_id, measurements,
+                first, last) indexing into the (api, endpoint, ep_params)
+                requests
+        """
+        plan = []
+        requests = []
+        for (api, station_id), keys in groups.items():
+            try:
+                planned = api._plan_requests(keys, station_id, start, end)
+            except Exception as e:
+                SeaState._log_group_error(data, station_id, keys, e, format, logger)
+                continue
+            for pairs, group in planned:
+                first = len(requests)
+                requests += [(api, ep, ep_params) for ep, ep_params in pairs]
+                plan.append((api, station_id, group, first, len(requests)))
+        return plan, requests
+
+    @staticmethod
+    def _parse_station_groups(
+        plan: list,
+        fetched: list,
+        start: datetime,
+        end: datetime,
+        data: Dict,
+        format: str,
+        logger: logging.Logger,
+    ) -> Dict[Tuple[str, str], Union[list, Dict]]:
+        """Parses each station's files once for all of its measurements"""
+        for api, station_id, group, first, last in plan:
+            try:
+                result = fetched[first:last]
+                for res in result:
+                    if isinstance(res, Exception):
+                        raise res
+                parsed = api._parse_results(result, start, end, group, format)
+                data.update({(station_id, key): x for key, x in parsed.items()})
+            except Exception as e:
+                SeaState._log_group_error(data, station_id, group, e, format, logger)
+        return data
+
+    @staticmethod
+    def _log_group_error(
+        data: Dict,
+        station_id: str,
+        keys: list,
+        e: Exception,
+        format: str,
+        logger: logging.Logger,
+    ) -> None:
+        for key in keys:
+            logger.error(
+                f"Error occurred while retrieving data for measurement {key}: {str(e)}"
+            )
+            data[(station_id, key)] = empty_data(format)
+
+    @staticmethod
+    def _fetch_station_groups(
+        groups: Dict[Tuple[BaseApi, str], list],
+        start: datetime,
+        end: datetime,
+        max_per_host: int,
+        format: str,
+        logger: logging.Logger,
+        results: Dict = None,
+    ) -> Dict[Tuple[str, str], Union[list, Dict]]:
+        """Fetches the endpoints of all station groups at once, each one only once
+
+        Args:
+            groups (Dict[Tuple[BaseApi, str], list]): (api, station_id) -> measurements
+            results (Dict, optional): request_key -> Result of requests already
+                fetched, reused instead of fetched again and updated in place.
+
+        Returns:
+            Dict[Tuple[str, str], Union[list, Dict]]: (station_id, measurement) -> data
+        """
+        data = {}
+        results = {} if results is None else results
+        plan, requests = SeaState._plan_station_groups(
+            groups, start, end, data, format, logger
+        )
+        requests = [(api._adapter, ep, ep_params) for api, ep, ep_params in requests]
+        missing = [x for x in requests if request_key(x) not in results]
+        # identical endpoints shared by measurements are fetched once
+        for request, res in zip(
+            missing, ConcurrentFetcher(max_per_host, logger=logger).fetch(missing)
+        ):
+            results[request_key(request)] = res
+        fetched = [results[request_key(x)] for x in requests]
+        return SeaState._parse_station_groups(
+            plan, fetched, start, end, data, format, logger
+        )
+
+    @staticmethod
+    async def _afetch_station_groups(
+        groups: Dict[Tuple[BaseApi, str], list],
+        start: datetime,
+        end: datetime,
+        format: str,
+        logger: logging.Logger,
+    ) -> Dict[Tuple[str, str], Union[list, Dict]]:
+        """Async _fetch_station_groups, requests are awaited on the APIs'
+        AsyncRestAdapter and parsing runs off the event loop"""
+        data = {}
+        plan, requests = SeaState._plan_station_groups(
+            groups, start, end, data, format, logger
+        )
+        # identical endpoints shared by measurements are fetched once
+        unique = {}
+        for api, ep, ep_params in requests:
+            key = request_key((api._adapter, ep, ep_params))
+            if key not in unique:
+                unique[key] = api.async_adapter.get(ep, ep_params)
+        results = await asyncio.gather(*unique.values(), return_exceptions=True)
+        results = dict(zip(unique, results))
+        fetched = [
+            results[request_key((api._adapter, ep, ep_params))]
+            for api, ep, ep_params in requests
+        ]
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None,
+            SeaState._parse_station_groups,
+            plan,
+            fetched,
+            start,
+            end,
+            data,
+            format,
+            logger,
+        )
+
+    def _from_date_range_concurrent(
+        self,
+        start: datetime,
+        end: datetime,
+        max_per_host: int,
+        format: str,
+        results: Dict = None,
+    ) -> Dict:
+        """Fetches the endpoints of all measurements at once, each one only once"""
+        data = {}
+        groups = self._group_measurements(data, format)
+        fetched = self._fetch_station_groups(
+            groups, start, end, max_per_host, format, self._logger, results
+        )
+        for (api, station_id), keys in groups.items():
+            for key in keys:
+                data[key] = fetched[(station_id, key)]
+        # keep measurement order consistent with the sequential path
+        return {key: data[key] for key in self._requested_measurements}
+
+    @staticmethod
+    def _coverage(
+        data: Union[list, Dict], start: datetime, end: datetime, station: Station
+    ) -> float:
+        """coverage of data served by station, on the clock of its API"""
+        return coverage(data, start, end, get_api(station.api).now(station.lon))
+
+    @classmethod
+    def _is_gappy(
+        cls, data: Union[list, Dict], start: datetime, end: datetime, station: Station
+    ) -> bool:
+        return cls._coverage(data, start, end, station) < FALLBACK_MIN_COVERAGE
+
+    @staticmethod
+    def _fallback_groups(
+        ranked: Dict[Hashable, list], rank: int
+    ) -> Dict[Tuple[BaseApi, str], list]:
+        """Groups keys by their candidate station of the given rank, keys are
+        measurements, or (point, measurement) pairs in batch"""
+        groups = {}
+        for key, candidates in ranked.items():
+            if rank < len(candidates):
+                station = candidates[rank][0]
+                groups.setdefault((get_api(station.api), station.id), []).append(key)
+        return groups
+
+    def _with_fallbacks(
+        self,
+        data: Dict,
+        start: datetime,
+        end: datetime,
+        max_per_host: int,
+        format: str,
+        results: Dict = None,
+    ) -> Dict:
+        """Replaces empty or gappy measurements with data of fallback stations
+
+        Fallback stations are tried in rank order, the measurements still
+        lacking data are fetched concurrently at each rank. A measurement keeps
+        the data covering the most hours of the date range.
+        """
+        ranked = self._gappy_candidates(data, start, end)
+        best = {
+            key: self._coverage(data[key], start, end, x[0][0])
+            for key, x in ranked.items()
+        }
+        rank = 1
+        while ranked:
+            groups = self._fallback_groups(ranked, rank)
+            if not groups:
+                break
+            fetched = self._fetch_station_groups(
+                groups, start, end, max_per_host, format, self._logger, results
+            )
+            self._take_fallbacks(
+                data,
+                ranked,
+                best,
+                groups,
+                fetched,
+                rank,
+                start,
+                end,
+                self.source,
+                self._logger,
+            )
+            rank += 1
+        return data
+
+    async def _awith_fallbacks(
+        self, data: Dict, start: datetime, end: datetime, format: str
+    ) -> Dict:
+        """Async _with_fallbacks, each rank is awaited on the AsyncRestAdapter"""
+        ranked = self._gappy_candidates(data, start, end)
+        best = {
+            key: self._coverage(data[key], start, end, x[0][0])
+            for key, x in ranked.items()
+        }
+        rank = 1
+        while ranked:
+            groups = self._fallback_groups(ranked, rank)
+            if not groups:
+                break
+            fetched = await self._afetch_station_groups(
+                groups, start, end, format, self._logger
+            )
+            self._take_fallbacks(
+                data,
+                ranked,
+                best,
+                groups,
+                fetched,
+                rank,
+                start,
+                end,
+                self.source,
+                self._logger,
+            )
+            rank += 1
+        return data
+
+    def _gappy_candidates(
+        self, data: Dict, start: datetime, end: datetime
+    ) -> Dict[str, list]:
+        """Candidate stations of the measurements with empty or gappy data"""
+        ranked = {}
+        for key in data:
+            candidates = self._get_mediator(key).candidates
+            if len(candidates) > 1 and self._is_gappy(
+                data[key], start, end, candidates[0][0]
+            ):
+                ranked[key] = candidates
+        return ranked
+
+    @classmethod
+    def _take_fallbacks(
+        cls,
+        data: Dict,
+        ranked: Dict[Hashable, list],
+        best: Dict[Hashable, float],
+        groups: Dict[Tuple[BaseApi, str], list],
+        fetched: Dict[Tuple[str, str], Union[list, Dict]],
+        rank: int,
+        start: datetime,
+        end: datetime,
+        source: Dict,
+        logger: logging.Logger,
+    ) -> None:
+        """Keeps the fetched data of the fallback stations of the given rank
+        covering more hours, and drops the keys no longer gappy from ranked"""
+        for (api, station_id), keys in groups.items():
+            for key in keys:
+                measurement = key if isinstance(key, str) else key[-1]
+                x = fetched[(station_id, measurement)]
+                station = ranked[key][rank][0]
+                covered = cls._coverage(x, start, end, station)
+                if covered > best[key]:
+                    best[key] = covered
+                    data[key] = x
+                    source[key] = station
+                    logger.info(
+                        f"{measurement} of station {station_id} replaces gappy data"
+                    )
+                if best[key] >= FALLBACK_MIN_COVERAGE:
+                    del ranked[key]
+
+    def _from_date_range_speculative(
+        self, start: datetime, end: datetime, max_per_host: int, format: str
+    ) -> Dict:
+        """Fetches every candidate station of every measurement at once
+
+        Each measurement takes the first station in rank order whose data
+        isn't gappy, else the data covering the most hours.
+        """
+        data = {}
+        ranked = {}
+        for key in self._requested_measurements:
+            try:
+                ranked[key] = self._get_mediator(key).candidates
+            except Exception as e:
+                self._log_measurement_error(key, e)
+            if not ranked.get(key):
+                ranked.pop(key, None)
+                data[key] = empty_data(format)
+        # stations shared by several candidate lists are fetched once
+        groups = {}
+        for rank in range(max([len(x) for x in ranked.values()], default=0)):
+            for group, keys in self._fallback_groups(ranked, rank).items():
+                groups.setdefault(group, []).extend(keys)
+        fetched = self._fetch_station_groups(
+            groups, start, end, max_per_host, format, self._logger
+        )
+        for key, candidates in ranked.items():
+            options = [(x, fetched[(x.id, key)]) for x, _ in candidates]
+            station, data[key] = max(
+                options,
+                key=lambda x: min(
+                    self._coverage(x[1], start, end, x[0]), FALLBACK_MIN_COVERAGE
+                ),
+            )
+            self.source[key] = station
+        return {key: data[key] for key in self._requested_measurements}
+
+    @classmethod
+    def batch(
+        cls,
+        points: list[Tuple[float, float]],
+        start: Union[datetime, None] = None,
+        end: Union[datetime, timedelta, None] = None,
+        exclude: list = [],
+        max_per_host: int = MAX_IN_FLIGHT_PER_HOST,
+        format: str = "records",
+        logger: logging.Logger = None,
+        fallback: bool = False,
+    ) -> list[Dict]:
+        """Retrieve measurements for many locations in one call
+
+        Nearest stations of all points are resolved in one vectorized pass
+        per measurement, and each station is fetched and parsed once,
+        concurrently, however many points it serves.
+
+        Args:
+            points (list[Tuple[float, float]]): (lat, lon) pairs
+            start (datetime, optional): Defaults to today.
+            end (Union[datetime, timedelta], optional): Defaults to start.
+            exclude (list, optional): measurements or station ids to skip.
+            max_per_host (int, optional): simultaneous requests per hostname.
+            format (str, optional): "records" or "columns".
+            fallback (bool, optional): when a station returns empty or gappy
+                data, try the next nearest stations of the points it serves,
+                as from_date_range. Defaults to False.
+
+        Returns:
+            list[Dict]: one dict per point, as returned by from_date_range.
+                Points served by the same station share the same data object.
+        """
+        logger = logger or logging.getLogger(__name__)
+        check_format(format)
+        start, end = build_date_range(start, end, logger)
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        lats, lons = points[:, 0], points[:, 1]
+        if not ((-90 <= lats) & (lats <= 90)).all():
+            raise SeaStateException("Latitude must be between -90 and 90 degrees")
+        if not ((-180 <= lons) & (lons <= 180)).all():
+            raise SeaStateException("Longitude must be between -180 and 180 degrees")
+
+        # resolve nearest stations of every point, one pass per measurement
+        measurements = [x for x in MEASUREMENTS if x not in exclude]
+        resolved = {}
+        groups = {}
+        for measurement in measurements:
+            positions, _ = STATION_INDEX.nearest_many(lats, lons, measurement, exclude)
+            resolved[measurement] = positions
+            for position in np.unique(positions[positions >= 0]):
+                station = STATION_INDEX.stations[position]
+                group = (get_api(station.api), station.id)
+                groups.setdefault(group, []).append(measurement)
+
+        results = {}
+        fetched = cls._fetch_station_groups(
+            groups, start, end, max_per_host, format, logger, results
+        )
+
+        # fan results back out to every point
+        data = [{} for _ in range(len(points))]
+        for measurement in measurements:
+            for i, position in enumerate(resolved[measurement].tolist()):
+                if position < 0:
+                    data[i][measurement] = empty_data(format)
+                    continue
+                station_id = STATION_INDEX.stations[position].id
+                data[i][measurement] = fetched[(station_id, measurement)]
+        if fallback:
+            cls._batch_fallbacks(
+                data,
+                resolved,
+                lats,
+                lons,
+                exclude,
+                start,
+                end,
+                max_per_host,
+                format,
+                logger,
+                results,
+            )
+        return data
+
+    @classmethod
+    def _batch_fallbacks(
+        cls,
+        data: list[Dict],
+        resolved: Dict[str, np.ndarray],
+        lats: np.ndarray,
+        lons: np.ndarray,
+        exclude: list,
+        start: datetime,
+        end: datetime,
+        max_per_host: int,
+        format: str,
+        logger: logging.Logger,
+        results: Dict,
+    ) -> None:
+        """_with_fallbacks for every point of batch, keyed by (point, measurement)
+
+        Fallback stations shared by several gappy points are fetched once.
+        """
+        flat = {}
+        ranked = {}
+        for i, point in enumerate(data):
+            for measurement, x in point.items():
+                position = resolved[measurement][i]
+                if position < 0 or not cls._is_gappy(
+                    x, start, end, STATION_INDEX.stations[position]
+                ):
+                    continue
+                candidates = rank_candidates(
+                    lats[i], lons[i], measurement, exclude=exclude
+                )
+                if len(candidates) > 1:
+                    flat[(i, measurement)] = x
+                    ranked[(i, measurement)] = candidates
+        best = {
+            key: cls._coverage(flat[key], start, end, x[0][0])
+            for key, x in ranked.items()
+        }
+        rank = 1
+        while ranked:
+            groups = cls._fallback_groups(ranked, rank)
+            if not groups:
+                break
+            measurements = {
+                group: sorted({x for _, x in keys}) for group, keys in groups.items()
+            }
+            fetched = cls._fetch_station_groups(
+                measurements, start, end, max_per_host, format, logger, results
+            )
+            cls._take_fallbacks(
+                flat, ranked, best, groups, fetched, rank, start, end, {}, logger
+            )
+            rank += 1
+        for (i, measurement), x in flat.items():
+            data[i][measurement] = x
+
+    async def afrom_date_range(
+        self,
+        start: Union[datetime, None] = None,
+        end: Union[datetime, timedelta, None] = None,
+        format: str = "records",
+        fallback: bool = False,
+    ) -> Dict:
+        """Async from_date_range, for use from an event loop
+
+        All endpoints are requested at once and awaited, identical endpoints
+        once, with at most HTTP_POOL_SIZE requests in flight per hostname
+        across every pending call. Parsing runs on the loop's default executor.
+
+        Args:
+            start (datetime, optional): Defaults to today.
+            end (Union[datetime, timedelta], optional): Defaults to start.
+            format (str, optional): "records" or "columns", see from_date_range.
+            fallback (bool, optional): try the next nearest stations on empty
+                or gappy data, see from_date_range. Defaults to False.
+
+        Returns:
+            Dict: measurement -> samples in the requested format
+        """
+        check_format(format)
+        # process timeframe
+        start, end = self._build_date_range(start, end)
+        self.source = {}
+        data = {}
+        groups = self._group_measurements(data, format)
+        fetched = await self._afetch_station_groups(
+            groups, start, end, format, self._logger
+        )
+        for (api, station_id), keys in groups.items():
+            for key in keys:
+                data[key] = fetched[(station_id, key)]
+        data = {key: data[key] for key in self._requested_measurements}
+        for key in data:
+            self.source[key] = self._get_mediator(key).station
+        if fallback:
+            data = await self._awith_fallbacks(data, start, end, format)
+        return data
+
     def from_date_range(
         self,
         start: Union[datetime, None] = None,
         end: Union[datetime, timedelta, None] = None,
+        concurrent: bool = False,
+        max_per_host: int = MAX_IN_FLIGHT_PER_HOST,
+        format: str = "records",
+        fallback: bool = False,
+        speculative: bool = False,
     ) -> Dict:
+        """Retrieve all requested measurements for the date range
+
+        Args:
+            start (datetime, optional): Defaults to today.
+            end (Union[datetime, timedelta], optional): Defaults to start.
+            concurrent (bool, optional): fetch all endpoints on a thread pool,
+                deduplicating endpoints shared by measurements. Defaults to False.
+            max_per_host (int, optional): simultaneous requests per hostname
+                when concurrent.
+            format (str, optional): "records" returns a list of dicts per
+                measurement, "columns" returns a dict of arrays per measurement
+                with a datetime64 "t" and float64 values. Defaults to "records".
+            fallback (bool, optional): when a station returns empty or gappy
+                data, try the next nearest stations, see ApiMediator.candidates.
+                self.source holds the station that served each measurement.
+                Defaults to False.
+            speculative (bool, optional): with fallback, fetch every candidate
+                station up front and concurrently, instead of only after the
+                primary station came back gappy. Defaults to False.
+
+        Returns:
+            Dict: measurement -> samples in the requested format
+        """
+        check_format(format)
         # process timeframe
         start, end = self._build_date_range(start, end)
+        self.source = {}
+
+        if fallback and speculative:
+            return self._from_date_range_speculative(start, end, max_per_host, format)
 
-        # makes an api call for each measurement,
-        # the idea is that a cache with 59 second expiration
-        # absorbs the duplicated endpoint calls during a single method call
+        results = {}
+        if concurrent:
+            data = self._from_date_range_concurrent(
+                start, end, max_per_host, format, results
+            )
+        else:
+            data = self._from_date_range_sequential(start, end, format)
+        for key in data:
+            self.source[key] = self._get_mediator(key).station
+        if fallback:
+            data = self._with_fallbacks(data, start, end, max_per_host, format, results)
+        return data
+
+    def _from_date_range_sequential(
+        self, start: datetime, end: datetime, format: str
+    ) -> Dict:
+        # makes the api calls once per station,
+        # each station's files are parsed once for all of its measurements
         data = {}
-        for key in self._requested_measurements:
+        for (api, station_id), keys in self._group_measurements(data, format).items():
             try:
-                data[key] = self._measurement_from_date_range(key, start, end)
+                data.update(
+                    api._measurements_from_date_range(
+                        keys, station_id, start, end, format
+                    )
+                )
             except Exception as e:
-                self._logger.error(
-                    f"Error occurred while retrieving data for measurement {key}: {str(e)}"
+                for key in keys:
+                    self._log_measurement_error(key, e)
+                    data[key] = empty_data(format)
+
+        return {key: data[key] for key in self._requested_measurements}
+
+    def sync(
+        self, start: Union[datetime, None] = None, format: str = "records"
+    ) -> Dict:
+        """Retrieve the samples newer than the previous sync
+
+        Remembers per (station, measurement) the timestamp of the last sample
+        delivered in self.cursor, and only requests and returns newer samples.
+        Realtime NDBC files are read until the first sample already delivered,
+        TidesAndCurrents requests begin at the cursor.
+
+        Args:
+            start (datetime, optional): where measurements never synced begin.
+                Defaults to today.
+            format (str, optional): "records" or "columns", see from_date_range.
+
+        Returns:
+            Dict: measurement -> new samples in the requested format
+        """
+        check_format(format)
+        start, _ = self._build_date_range(start, None)
+        # always through the end of today, to pick up the latest samples
+        _, end = self._build_date_range(None, None)
+        data = {}
+        for (api, station_id), keys in self._group_measurements(data, format).items():
+            since = {key: self.cursor.get((station_id, key)) for key in keys}
+            try:
+                new = api._sync_measurements(
+                    keys, station_id, since, start, end, format
                 )
-                data[key] = []
+            except Exception as e:
+                for key in keys:
+                    self._log_measurement_error(key, e)
+                    data[key] = empty_data(format)
+                continue
+            for key, x in new.items():
+                data[key] = x
+                t = timestamps_of(x)
+                if len(t):
+                    self.cursor[(station_id, key)] = t.max().astype(datetime)
+        return {key: data[key] for key in self._requested_measurements}
+
+    def iter_date_range(
+        self,
+        start: Union[datetime, None] = None,
+        end: Union[datetime, timedelta, None] = None,
+        format: str = "records",
+        batch_size: int = STREAM_BATCH_SIZE,
+    ) -> Iterator[Tuple[str, Union[list, Dict]]]:
+        """Stream all requested measurements for the date range in batches
+
+        Stations are streamed one after the other, each in chronological
+        order, so memory stays bounded by a batch and a single file however
+        long the date range is.
+
+        Args:
+            start (datetime, optional): Defaults to today.
+            end (Union[datetime, timedelta], optional): Defaults to start.
+            format (str, optional): "records" or "columns", see from_date_range.
+            batch_size (int, optional): file lines parsed per batch, at most.
+
+        Yields:
+            Tuple[str, Union[list, Dict]]: measurement and a batch of samples
+                in the requested format
+        """
+        check_format(format)
+        # process timeframe
+        start, end = self._build_date_range(start, end)
+        for (api, station_id), keys in self._group_measurements({}, format).items():
+            try:
+                for batch in api.iter_measurements(
+                    keys, station_id, start, end, format, batch_size
+                ):
+                    for key, data in batch.items():
+                        if len(data["t"] if format == "columns" else data):
+                            yield key, data
+            except Exception as e:
+                # a failed station ends its stream, the others still follow
+                for key in keys:
+                    self._log_measurement_error(key, e)
+
+    def resample(
+        self,
+        start: Union[datetime, None] = None,
+        end: Union[datetime, timedelta, None] = None,
+        interval: Union[str, timedelta] = "1h",
+        how: Union[str, Dict[str, str], None] = None,
+        gaps: str = "nan",
+        format: str = "records",
+    ) -> Dict:
+        """Retrieve all requested measurements binned to a fixed interval
+
+        Every measurement shares the same bins, aligned to the interval,
+        see resample.resample.
 
+        Args:
+            start (datetime, optional): Defaults to today.
+            end (Union[datetime, timedelta], optional): Defaults to start.
+            interval (Union[str, timedelta], optional): bin width, e.g. "10min",
+                "1h", "1d". Defaults to "1h".
+            how (Union[str, Dict[str, str]], optional): aggregation of the
+                samples in a bin, one of AGGREGATIONS for every key or per key.
+                Defaults to "mean", and "vector_mean" for directions.
+            gaps (str, optional): "nan" emits every bin of the date range,
+                bins without samples are NaN, "drop" omits them.
+            format (str, optional): "records" returns a list of dicts per
+                measurement with float values, None when missing, "columns"
+                returns a dict of arrays per measurement. Defaults to "records".
+
+        Returns:
+            Dict: measurement -> bins in the requested format, "n" counts the
+                samples of each bin
+        """
+        check_format(format)
+        start, end = self._build_date_range(start, end)
+        data = self.from_date_range(start, end, format="columns")
+        for key, columns in data.items():
+            data[key] = resample(columns, interval, how, gaps, start, end)
+            if format == "records":
+                data[key] = to_records(data[key])
         return data
 
     def hourly(
         self,
         start: Union[datetime, None] = None,
         end: Union[datetime, timedelta, None] = None,
+        format: str = "records",
     ) -> Dict:
-        """Convenience method to return 1 sample per hour for each api"""
-        data_all = self.from_date_range(start, end)
-        data = {}
-        for key in data_all:
-            # find the first minute within the hour
-            # the apis typically use the same minute
-            first_minute = 0
-            while datetime.fromisoformat(data_all[key][0]["t"]).minute != first_minute:
-                first_minute += 1
-                # prevent endless loop
-                if first_minute == 60:
-                    data[key] = []
-                    break
-            # keep one reading per hour
-            data[key] = [
-                x
-                for x in data_all[key]
-                if datetime.fromisoformat(x["t"]).minute == first_minute
-            ]
+        """Convenience method to return 1 sample per hour for each api
+
+        The first sample within each hour, as returned by from_date_range,
+        hours without samples are omitted. See resample for aggregated bins
+        shared by every measurement.
+        """
+        data = self.from_date_range(start, end, format=format)
+        for key, x in data.items():
+            rows = first_rows(timestamps_of(x))
+            if isinstance(x, dict):
+                data[key] = {k: v[rows] for k, v in x.items()}
+            else:
+                data[key] = [x[i] for i in rows.tolist()]
         return data
 
     def measurements_from_date_range(
@@ -1,17 +1,39 @@
-from typing import Union
-from dataclasses import field
+from functools import lru_cache
+from typing import List, Tuple, Union
 import logging
 
-from seastate.data import STATIONS
+from seastate.data import STATION_INDEX
 from seastate.exceptions import SeaStateException
 from seastate.models import Station
-from seastate.utils import haversine
+from seastate.settings import FALLBACK_MAX_DISTANCE, FALLBACK_STATIONS
 from seastate.api.base import BaseApi
 from seastate.api.noaa_ndbc import NdbcApi
 from seastate.api.noaa_tidesandcurrents import TidesAndCurrentsApi
 from abc import ABC, abstractmethod
 
 
+@lru_cache(maxsize=None)
+def get_api(api_id: str) -> Union[NdbcApi, TidesAndCurrentsApi]:
+    """Returns the API client for a datasource, shared across mediators"""
+    if api_id == "noaa_ndbc":
+        return NdbcApi()
+    elif api_id == "noaa_tidesandcurrents":
+        return TidesAndCurrentsApi()
+    else:
+        raise SeaStateException("Unsupported API")
+
+
+def rank_candidates(
+    lat: float, lon: float, measurement: str, exclude: list = ()
+) -> List[Tuple[Station, float]]:
+    """The nearest station serving the measurement, followed by up to
+    FALLBACK_STATIONS - 1 fallback stations within FALLBACK_MAX_DISTANCE km"""
+    ranked = STATION_INDEX.nearest_k(
+        lat, lon, measurement, FALLBACK_STATIONS, exclude=exclude
+    )
+    return ranked[:1] + [x for x in ranked[1:] if x[1] <= FALLBACK_MAX_DISTANCE]
+
+
 class BaseMediator(ABC):
     """Implements utils for finding nearest station and API for that station"""
 
@@ -39,6 +61,7 @@ class BaseMediator(ABC):
         #  Latitudes exist in range of -90 to 90
         if -90 <= value <= 90:
             self.__target_lat = value
+            self.invalidate()
         else:
             raise SeaStateException("Latitude must be between -90 and 90 degrees")
 
@@ -51,35 +74,56 @@ class BaseMediator(ABC):
         #  Longitudes exist in range of -180 to 180
         if -180 <= value <= 180:
             self.__target_lon = value
+            self.invalidate()
         else:
             raise SeaStateException("Longitude must be between -180 and 180 degrees")
 
+    @property
+    def exclude(self) -> list:
+        return self.__exclude
+
+    @exclude.setter
+    def exclude(self, value) -> None:
+        # copied, so resolution only changes through this setter or invalidate()
+        self.__exclude = list(value or [])
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        """Drop the cached station resolution, the next access resolves again"""
+        self._resolved = None
+        self._candidates = None
+
+    @property
+    def candidates(self) -> List[Tuple[Station, float]]:
+        """Stations serving the measurement and their distance, nearest first
+
+        The nearest station, followed by up to FALLBACK_STATIONS - 1 fallback
+        stations within FALLBACK_MAX_DISTANCE km, ranked in a single indexed
+        query and kept until invalidated.
+        """
+        if getattr(self, "_candidates", None) is None:
+            self._candidates = rank_candidates(
+                self._target_lat, self._target_lon, self.measurement, self.exclude
+            )
+        return self._candidates
+
+    def _resolve(self) -> Tuple[Station, float]:
+        """Nearest station and its distance, resolved once until invalidated"""
+        if getattr(self, "_resolved", None) is None:
+            candidates = self.candidates
+            self._resolved = candidates[0] if candidates else (None, float("inf"))
+        return self._resolved
+
     def _nearest_station(self) -> Station:
         """
         Find station that:
         - is closest to input coordinates using haversine method
         - is collecting the measurement at present (active)
         """
-        station = None
-        min_ptr = float("inf")  # Initialize minimum pointer at inf
-        for eval_station in STATIONS:
-            # skip if station is in exclude list
-            if eval_station.id in self.exclude:
-                continue
-            # skip if eval_station is inactive
-            if not eval_station.is_active:
-                continue
-            # skip if station does not support measurement
-            if not eval_station.is_supported(self.measurement):
-                continue
-            # compute distance between SeaState target coords and current station
-            new_val = haversine(
-                self._target_lat, self._target_lon, eval_station.lat, eval_station.lon
-            )
-            # if closer, update new minimum
-            if new_val < min_ptr:
-                min_ptr = new_val
-                station = eval_station
+        # single vectorized pass over the precomputed station index
+        station, _ = STATION_INDEX.nearest(
+            self._target_lat, self._target_lon, self.measurement, self.exclude
+        )
         return station
 
 
@@ -91,34 +135,27 @@ class ApiMediator(BaseMediator):
         measurement: str,
         lat: float,
         lon: float,
-        exclude: list = field(default_factory=list),
+        exclude: list = None,
         logger: logging.Logger = None,
     ):
+        self.measurement = measurement
         self._target_lat = lat
         self._target_lon = lon
-        self.measurement = measurement
         self.exclude = exclude
         # self._register_mediator(self)
         self._logger = logger or logging.getLogger(__name__)
 
     @property
     def station(self) -> Station:
-        return self._nearest_station()
+        return self._resolve()[0]
 
     @property
     def api(self) -> Union[NdbcApi, TidesAndCurrentsApi]:
-        if self.station.api == "noaa_ndbc":
-            return NdbcApi()
-        elif self.station.api == "noaa_tidesandcurrents":
-            return TidesAndCurrentsApi()
-        else:
-            raise SeaStateException("Unsupported API")
+        return get_api(self.station.api)
 
     @property
     def distance(self) -> float:
-        return haversine(
-            self._target_lat, self._target_lon, self.station.lat, self.station.lon
-        )
+        return self._resolve()[1]
 
 
 if __name__ == "__main__":
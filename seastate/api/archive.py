@@ -0,0 +1,281 @@
+import atexit
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+import platformdirs
+
+from seastate.api.cache_policy import IMMUTABLE, SLOW
+from seastate.settings import (
+    ARCHIVE_MAX_AGE,
+    ARCHIVE_MAX_BYTES,
+    ARCHIVE_ORPHAN_GRACE,
+    ARCHIVE_TOUCH_BATCH,
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    url TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    class TEXT NOT NULL,
+    stored REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+CREATE INDEX IF NOT EXISTS entries_sha256 ON entries (sha256);
+"""
+_COLUMNS = ("sha256", "size", "class", "stored", "accessed")
+
+
+class ArchiveStore:
+    """Durable, content-addressed local store for downloaded files
+
+    File contents are stored once under their sha256, and an index maps
+    each url to its content, endpoint class and access times. Entries of
+    IMMUTABLE endpoints never expire, SLOW entries expire after their max
+    age and LIVE endpoints are not stored. When the stored contents exceed
+    max_bytes the least recently used entries are evicted.
+
+    The index is a sqlite database shared by every process using the
+    directory, each write runs in its own transaction. Reads don't write,
+    access times are kept in memory and written in batches of
+    ARCHIVE_TOUCH_BATCH, before an eviction and on flush.
+    """
+
+    def __init__(
+        self,
+        directory: str = None,
+        max_bytes: int = ARCHIVE_MAX_BYTES,
+        max_age: Dict[str, Optional[float]] = None,
+        logger: logging.Logger = None,
+    ):
+        """Constructor for ArchiveStore, nothing touches disk until first use
+
+        Args:
+            directory (str, optional): Defaults to the user cache dir.
+            max_bytes (int, optional): size cap of the stored contents.
+            max_age (Dict[str, float], optional): seconds per endpoint class,
+                None never expires. Defaults to ARCHIVE_MAX_AGE.
+        """
+        self._logger = logger or logging.getLogger(__name__)
+        self.directory = directory or os.path.join(
+            platformdirs.user_cache_dir("seastate"), "archive"
+        )
+        self.max_bytes = max_bytes
+        self.max_age = dict(ARCHIVE_MAX_AGE, **(max_age or {}))
+        self._connection = None
+        self._pid = None
+        self._touched = {}
+        self._lock = threading.RLock()
+        # access times still in memory are written before exiting
+        atexit.register(self.flush)
+
+    @property
+    def _index_path(self) -> str:
+        return os.path.join(self.directory, "index.sqlite")
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.directory, "objects", digest[:2], digest)
+
+    @property
+    def _db(self) -> sqlite3.Connection:
+        """Connection of this process, created on first use"""
+        if self._connection is None or self._pid != os.getpid():
+            os.makedirs(self.directory, exist_ok=True)
+            # autocommit, transactions are opened explicitly by _transaction
+            self._connection = sqlite3.connect(
+                self._index_path,
+                timeout=30,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            self._connection.executescript(_SCHEMA)
+            self._pid = os.getpid()
+        return self._connection
+
+    def _transaction(self) -> "_Transaction":
+        """Write transaction, holding the database lock until it ends"""
+        return _Transaction(self._db)
+
+    @property
+    def index(self) -> Dict[str, Dict]:
+        """url -> {"sha256", "size", "class", "stored", "accessed"}"""
+        with self._lock:
+            rows = self._db.execute(f"SELECT url, {', '.join(_COLUMNS)} FROM entries")
+            index = {x[0]: dict(zip(_COLUMNS, x[1:])) for x in rows}
+            for url, accessed in self._touched.items():
+                if url in index:
+                    index[url]["accessed"] = accessed
+            return index
+
+    def is_storable(self, endpoint_class: str) -> bool:
+        return endpoint_class in (IMMUTABLE, SLOW) and endpoint_class in self.max_age
+
+    def _is_expired(self, entry: Dict) -> bool:
+        max_age = self.max_age.get(entry["class"], 0)
+        if max_age is None:
+            return False
+        return time.time() - entry["stored"] > max_age
+
+    def get(self, url: str) -> Optional[str]:
+        """Returns stored content for url, None when missing or expired"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT sha256, class, stored FROM entries WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            entry = dict(zip(("sha256", "class", "stored"), row))
+            if self._is_expired(entry):
+                return None
+            try:
+                with open(self._object_path(entry["sha256"]), "rb") as content:
+                    data = content.read().decode("utf-8")
+            except OSError:
+                # object removed from disk, drop the dangling entry
+                with self._transaction() as db:
+                    db.execute(
+                        "DELETE FROM entries WHERE url = ? AND sha256 = ?",
+                        (url, entry["sha256"]),
+                    )
+                return None
+            self._touched[url] = time.time()
+            if len(self._touched) >= ARCHIVE_TOUCH_BATCH:
+                self.flush()
+            self._logger.debug(f"archive hit: {url}")
+            return data
+
+    def flush(self) -> None:
+        """Writes the access times of the entries read since the last flush"""
+        with self._lock:
+            if not self._touched:
+                return
+            with self._transaction() as db:
+                self._flush_touched(db)
+
+    def _flush_touched(self, db: sqlite3.Connection) -> None:
+        # other processes may have read the entry more recently
+        db.executemany(
+            "UPDATE entries SET accessed = MAX(accessed, ?) WHERE url = ?",
+            [(x, url) for url, x in self._touched.items()],
+        )
+        self._touched = {}
+
+    def put(self, url: str, data: str, endpoint_class: str) -> None:
+        """Stores content for url if its endpoint class is storable"""
+        if not self.is_storable(endpoint_class):
+            return
+        content = data.encode("utf-8")
+        digest = hashlib.sha256(content).hexdigest()
+        with self._lock, self._transaction() as db:
+            # written within the transaction, so no other process releases
+            # the content between writing it and indexing it
+            path = self._object_path(digest)
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp = f"{path}.{os.getpid()}.tmp"
+                with open(tmp, "wb") as outfile:
+                    outfile.write(content)
+                os.replace(tmp, path)
+            previous = db.execute(
+                "SELECT sha256 FROM entries WHERE url = ?", (url,)
+            ).fetchone()
+            now = time.time()
+            db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                (url, digest, len(content), endpoint_class, now, now),
+            )
+            self._touched.pop(url, None)
+            if previous and previous[0] != digest:
+                self._release(db, previous[0])
+            self._evict(db, self.max_bytes)
+
+    def size(self) -> int:
+        """Bytes of distinct stored contents"""
+        with self._lock:
+            return self._size(self._db)
+
+    @staticmethod
+    def _size(db: sqlite3.Connection) -> int:
+        row = db.execute(
+            "SELECT SUM(size) FROM (SELECT DISTINCT sha256, size FROM entries)"
+        ).fetchone()
+        return row[0] or 0
+
+    def _evict(self, db: sqlite3.Connection, max_bytes: int) -> None:
+        """Drops least recently used entries until contents fit in max_bytes"""
+        total = self._size(db)
+        if total <= max_bytes:
+            return
+        # access times decide what goes, and contents left behind by other
+        # processes count against max_bytes too
+        self._flush_touched(db)
+        self._sweep(db)
+        rows = db.execute("SELECT url, sha256, size FROM entries ORDER BY accessed")
+        for url, digest, size in rows.fetchall():
+            if total <= max_bytes:
+                break
+            db.execute("DELETE FROM entries WHERE url = ?", (url,))
+            self._logger.debug(f"archive evicted: {url}")
+            # contents are shared between urls with identical files
+            if self._release(db, digest):
+                total -= size
+
+    def _release(self, db: sqlite3.Connection, digest: str) -> bool:
+        """Removes stored content no longer referenced by any url"""
+        referenced = db.execute(
+            "SELECT 1 FROM entries WHERE sha256 = ? LIMIT 1", (digest,)
+        ).fetchone()
+        if referenced:
+            return False
+        try:
+            os.remove(self._object_path(digest))
+        except OSError:
+            pass
+        return True
+
+    def _sweep(self, db: sqlite3.Connection) -> None:
+        """Removes stored contents no entry references, such as files left
+        by an interrupted process, older than ARCHIVE_ORPHAN_GRACE seconds"""
+        referenced = {x[0] for x in db.execute("SELECT DISTINCT sha256 FROM entries")}
+        cutoff = time.time() - ARCHIVE_ORPHAN_GRACE
+        objects = os.path.join(self.directory, "objects")
+        for root, _, files in os.walk(objects):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    if name not in referenced and os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                        self._logger.debug(f"archive removed orphan: {name}")
+                except OSError:
+                    pass
+
+    def clear(self) -> None:
+        """Removes every stored entry and content"""
+        with self._lock, self._transaction() as db:
+            self._touched = {}
+            self._evict(db, -1)
+
+
+class _Transaction:
+    """Context of an IMMEDIATE transaction, committed unless an error is raised
+
+    IMMEDIATE takes the database's write lock up front, so concurrent
+    writers of other processes wait, up to the connection's timeout,
+    instead of failing halfway.
+    """
+
+    def __init__(self, db: sqlite3.Connection):
+        self.db = db
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.db.execute("BEGIN IMMEDIATE")
+        return self.db
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.db.execute("COMMIT" if exc_type is None else "ROLLBACK")
@@ -0,0 +1,57 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Union
+
+from seastate.api.rest_adapter import RestAdapter
+from seastate.models import Result
+
+
+class AsyncRestAdapter:
+    """asyncio front of a RestAdapter, supports GET
+
+    Requests run on a thread pool of the adapter's pool_size, so at most
+    pool_size requests per hostname are in flight, each on a kept-alive
+    pooled connection, and any number of coroutines can wait on them
+    without blocking the event loop. The http cache and the archive are
+    read and written on those threads as well.
+    """
+
+    def __init__(self, adapter: RestAdapter, logger: logging.Logger = None):
+        """Constructor for AsyncRestAdapter
+
+        Args:
+            adapter (RestAdapter): sync adapter sending the requests
+        """
+        self._logger = logger or logging.getLogger(__name__)
+        self.adapter = adapter
+        self._executor = ThreadPoolExecutor(
+            max_workers=adapter.pool_size,
+            thread_name_prefix=f"seastate-{adapter.hostname}",
+        )
+
+    @property
+    def hostname(self) -> str:
+        return self.adapter.hostname
+
+    @property
+    def url(self) -> str:
+        return self.adapter.url
+
+    async def get(self, endpoint: str, ep_params: Union[Dict, None] = None) -> Result:
+        """GET method for AsyncRestAdapter
+
+        Args:
+            endpoint (str): target endpoint
+            ep_params (Dict, optional): key:value API parameters. Defaults to None.
+
+        Returns:
+            Result: Simplified Response object with:
+                status_code
+                message
+                data
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, self.adapter.get, endpoint, ep_params
+        )
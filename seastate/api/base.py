@@ -1,11 +1,81 @@
 from abc import ABC, abstractmethod
-from seastate.settings import DATASOURCES
+from seastate.settings import (
+    DATASOURCES,
+    FORMATS,
+    MAX_IN_FLIGHT_PER_HOST,
+    STREAM_BATCH_SIZE,
+)
 from seastate.exceptions import SeaStateException
-from datetime import datetime
-from typing import Dict, Optional, Union
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from seastate.api.async_rest_adapter import AsyncRestAdapter
+from seastate.api.fetcher import ConcurrentFetcher, request_key
 from seastate.models import Result
 
 
+def check_format(format: str) -> str:
+    """Raises SeaStateException for unsupported output formats"""
+    if format not in FORMATS:
+        raise SeaStateException(f"Unsupported format {format}, use one of {FORMATS}")
+    return format
+
+
+def empty_data(format: str = "records") -> Union[list, Dict[str, np.ndarray]]:
+    """Data returned when a measurement yields no samples"""
+    if check_format(format) == "columns":
+        return {"t": np.array([], dtype="datetime64[s]"), "v": np.array([])}
+    return []
+
+
+def timestamps_of(data: Union[list, Dict[str, np.ndarray]]) -> np.ndarray:
+    """Sample times of records or columns as datetime64[s]"""
+    if isinstance(data, dict):
+        return data["t"].astype("datetime64[s]")
+    return np.array([x["t"] for x in data], dtype="datetime64[s]")
+
+
+def rows_after(
+    data: Union[list, Dict[str, np.ndarray]], since: Optional[datetime]
+) -> Union[list, Dict[str, np.ndarray]]:
+    """Samples of records or columns strictly after since, all when None"""
+    if since is None:
+        return data
+    keep = timestamps_of(data) > np.datetime64(since, "s")
+    if isinstance(data, dict):
+        return {key: x[keep] for key, x in data.items()}
+    return [x for x, k in zip(data, keep.tolist()) if k]
+
+
+def utc_now() -> datetime:
+    """Current UTC time, naive as the timestamps of parsed samples"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def coverage(
+    data: Union[list, Dict[str, np.ndarray]],
+    start: datetime,
+    end: datetime,
+    now: Optional[datetime] = None,
+) -> float:
+    """Share of the hours from start to end, or to now, holding a sample
+
+    Ranges reaching into the future are clipped to now, which must be on the
+    clock of the samples' timestamps, see BaseApi.now. Defaults to UTC, the
+    clock of NDBC. 1.0 when the range hasn't begun yet.
+    """
+    first = np.datetime64(start, "h")
+    last = np.datetime64(min(end, now or utc_now()), "h")
+    expected = int((last - first) / np.timedelta64(1, "h")) + 1
+    if expected <= 0:
+        return 1.0
+    hours = timestamps_of(data).astype("datetime64[h]")
+    hours = np.unique(hours[(hours >= first) & (hours <= last)])
+    return len(hours) / expected
+
+
 class BaseApi(ABC):
     def __init__():
         raise NotImplementedError
@@ -19,23 +89,140 @@ class BaseApi(ABC):
             raise SeaStateException(f"API filename {id} does not match DATASOURCES")
         return id
 
+    def now(self, lon: float, utc: Optional[datetime] = None) -> datetime:
+        """Current time on the clock of the API's timestamps, for a station
+        at longitude lon, naive. UTC unless the API reports local times.
+
+        Args:
+            lon (float): longitude of the station in decimal degrees
+            utc (datetime, optional): naive UTC time. Defaults to now.
+        """
+        return utc or utc_now()
+
+    @property
+    def async_adapter(self) -> AsyncRestAdapter:
+        """asyncio front of the API's RestAdapter, created on first use"""
+        if getattr(self, "_async_adapter", None) is None:
+            self._async_adapter = AsyncRestAdapter(self._adapter)
+        return self._async_adapter
+
     def _measurement_from_date_range(
-        self, measurement: str, station_id: str, start: datetime, end: datetime
-    ) -> list[Dict]:
+        self,
+        measurement: str,
+        station_id: str,
+        start: datetime,
+        end: datetime,
+        format: str = "records",
+    ) -> Union[list[Dict], Dict[str, np.ndarray]]:
+        check_format(format)
         # build endpoint
-        ep, ep_params = self._build_endpoint(measurement, station_id, start, end)
+        pairs = self._build_requests(measurement, station_id, start, end)
         # get result
-        result = self._get_result(ep, ep_params)
+        result = self._fetch(pairs)
         # parse result to data
-        data = self._parse_result(result, start, end, measurement)
+        data = self._parse_result(result, start, end, measurement, format)
+        return data
+
+    def _plan_requests(
+        self, measurements: List[str], station_id: str, start: datetime, end: datetime
+    ) -> List[Tuple[List[Tuple[str, Optional[Dict]]], List[str]]]:
+        """Groups measurements of a station that are served by identical requests
+
+        Returns:
+            List[Tuple[requests, measurements]]: one entry per unique set of
+                (endpoint, ep_params) requests, with the measurements it serves
+        """
+        groups = {}
+        for measurement in measurements:
+            pairs = self._build_requests(measurement, station_id, start, end)
+            key = tuple(request_key((self._adapter, ep, p)) for ep, p in pairs)
+            groups.setdefault(key, (pairs, []))[1].append(measurement)
+        return list(groups.values())
+
+    def _measurements_from_date_range(
+        self,
+        measurements: List[str],
+        station_id: str,
+        start: datetime,
+        end: datetime,
+        format: str = "records",
+    ) -> Dict[str, Union[list[Dict], Dict[str, np.ndarray]]]:
+        """Retrieves several measurements of one station,
+        fetching and parsing each unique set of endpoints once"""
+        check_format(format)
+        data = {}
+        for pairs, group in self._plan_requests(measurements, station_id, start, end):
+            result = self._fetch(pairs)
+            data.update(self._parse_results(result, start, end, group, format))
         return data
 
+    def _sync_measurements(
+        self,
+        measurements: List[str],
+        station_id: str,
+        since: Dict[str, Optional[datetime]],
+        start: datetime,
+        end: datetime,
+        format: str = "records",
+    ) -> Dict[str, Union[list[Dict], Dict[str, np.ndarray]]]:
+        """Retrieves the samples of each measurement newer than its cursor
+
+        Each measurement is requested from its own cursor, or from start
+        when it has none, through end.
+
+        Args:
+            since (Dict[str, Optional[datetime]]): measurement -> timestamp of
+                the last sample already delivered, None if never synced
+        """
+        data = {}
+        for measurement in measurements:
+            begin = since.get(measurement) or start
+            result = self._measurement_from_date_range(
+                measurement, station_id, begin, end, format
+            )
+            data[measurement] = rows_after(result, since.get(measurement))
+        return data
+
+    def iter_measurements(
+        self,
+        measurements: List[str],
+        station_id: str,
+        start: datetime,
+        end: datetime,
+        format: str = "records",
+        batch_size: int = STREAM_BATCH_SIZE,
+    ) -> Iterator[Dict[str, Union[list[Dict], Dict[str, np.ndarray]]]]:
+        """Streams several measurements of one station in batches
+
+        Requests are fetched and parsed one at a time in the order they are
+        built, so only one response is held at a time. APIs whose files are
+        large override this to parse line by line.
+
+        Yields:
+            Dict[str, Union[list[Dict], Dict[str, np.ndarray]]]: measurement ->
+                samples of the batch
+        """
+        check_format(format)
+        for pairs, group in self._plan_requests(measurements, station_id, start, end):
+            for pair in pairs:
+                result = self._fetch([pair])
+                yield self._parse_results(result, start, end, group, format)
+
     @abstractmethod
     def _build_endpoint(
         self, measurement: str, station_id: str, start: datetime, end: datetime
     ) -> (str, Dict):
         pass
 
+    def _build_requests(
+        self, measurement: str, station_id: str, start: datetime, end: datetime
+    ) -> List[Tuple[str, Optional[Dict]]]:
+        """Flattens _build_endpoint into (endpoint, ep_params) request pairs"""
+        endpoints, ep_params = self._build_endpoint(measurement, station_id, start, end)
+        if isinstance(endpoints, str):
+            endpoints = [endpoints]
+        return [(ep, ep_params) for ep in endpoints]
+
     @abstractmethod
     def _build_parse_key(self, measurement: str = None) -> Union[str, list[str], None]:
         pass
@@ -48,8 +235,41 @@ class BaseApi(ABC):
             endpoints = [endpoints]
         return [self._adapter.get(endpoint=ep, ep_params=ep_params) for ep in endpoints]
 
+    def _fetch(self, pairs: List[Tuple[str, Optional[Dict]]]) -> list[Result]:
+        """Fetches (endpoint, ep_params) pairs, concurrently when there are several
+
+        Raises the first exception of a failed request.
+        """
+        if len(pairs) <= 1:
+            return [self._adapter.get(endpoint=ep, ep_params=p) for ep, p in pairs]
+        requests = [(self._adapter, ep, p) for ep, p in pairs]
+        result = ConcurrentFetcher(MAX_IN_FLIGHT_PER_HOST).fetch(requests)
+        for res in result:
+            if isinstance(res, Exception):
+                raise res
+        return result
+
     @abstractmethod
     def _parse_result(
-        self, result: list[Result], start: datetime, end: datetime, measurement: str
-    ) -> Dict:
+        self,
+        result: list[Result],
+        start: datetime,
+        end: datetime,
+        measurement: str,
+        format: str = "records",
+    ) -> Union[list[Dict], Dict[str, np.ndarray]]:
         pass
+
+    def _parse_results(
+        self,
+        result: list[Result],
+        start: datetime,
+        end: datetime,
+        measurements: list,
+        format: str = "records",
+    ) -> Dict[str, Union[list[Dict], Dict[str, np.ndarray]]]:
+        """Parses a result shared by several measurements, one pass per measurement
+        unless the API overrides it with a single pass"""
+        return {
+            m: self._parse_result(result, start, end, m, format) for m in measurements
+        }
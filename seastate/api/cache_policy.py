@@ -0,0 +1,88 @@
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from seastate.settings import CACHE_EXPIRE_AFTER, SETTLE_DAYS
+
+# how often the content behind an endpoint changes
+IMMUTABLE = "immutable"  # never changes once published
+SLOW = "slow"  # revised occasionally, e.g. monthly files of the current year
+LIVE = "live"  # updated continuously
+
+
+class CachePolicy:
+    """Classifies endpoints by how often their content changes,
+    and picks the cache expiration of a request from that class"""
+
+    def __init__(self, expire_after: Dict[str, int] = None):
+        """Constructor for CachePolicy
+
+        Args:
+            expire_after (Dict[str, int], optional): seconds per endpoint class,
+                -1 never expires. Defaults to CACHE_EXPIRE_AFTER.
+        """
+        self._expire_after = dict(CACHE_EXPIRE_AFTER, **(expire_after or {}))
+
+    def classify(self, endpoint: str, ep_params: Optional[Dict] = None) -> str:
+        """Returns IMMUTABLE, SLOW or LIVE for an endpoint, LIVE unless known"""
+        return LIVE
+
+    def expire_after(self, endpoint: str, ep_params: Optional[Dict] = None) -> int:
+        """Seconds a cached response of the request stays fresh"""
+        return self._expire_after[self.classify(endpoint, ep_params)]
+
+
+class NdbcCachePolicy(CachePolicy):
+    """NDBC stdmet endpoints
+
+    - data/realtime2/{id}.txt: previous 45 days, updated hourly -> LIVE
+    - data/stdmet/{Mon}/{id}.txt and monthly files of the current year -> SLOW
+    - historical files of prior years -> IMMUTABLE
+    """
+
+    _HISTORICAL = re.compile(r"filename=\w+h(\d{4})\.txt\.gz&dir=data/historical/")
+
+    def classify(self, endpoint: str, ep_params: Optional[Dict] = None) -> str:
+        if "data/realtime2/" in endpoint:
+            return LIVE
+        historical = self._HISTORICAL.search(endpoint)
+        if historical:
+            if int(historical.group(1)) < datetime.today().year:
+                return IMMUTABLE
+            return SLOW
+        if "data/stdmet/" in endpoint:
+            return SLOW
+        return LIVE
+
+
+class TidesAndCurrentsCachePolicy(CachePolicy):
+    """TidesAndCurrents datagetter requests
+
+    Dates are station-local (time_zone=lst_ldt), and stations lag UTC by up
+    to a day, so the station's date is taken as the day before the UTC date.
+    A request whose end_date is before the station's date covers a closed
+    range, which stays SLOW for settle_days while preliminary data is
+    revised and is IMMUTABLE after. Anything reaching into the station's
+    date is LIVE.
+    """
+
+    def __init__(
+        self, expire_after: Dict[str, int] = None, settle_days: int = SETTLE_DAYS
+    ):
+        super().__init__(expire_after)
+        self.settle_days = settle_days
+
+    def classify(self, endpoint: str, ep_params: Optional[Dict] = None) -> str:
+        if "datagetter" not in endpoint or not ep_params:
+            return LIVE
+        try:
+            # end_date is yyyyMMdd, optionally followed by HH:mm
+            end_date = datetime.strptime(str(ep_params["end_date"])[:8], "%Y%m%d")
+        except (KeyError, ValueError):
+            return LIVE
+        station_today = datetime.now(timezone.utc).date() - timedelta(days=1)
+        if end_date.date() >= station_today:
+            return LIVE
+        if end_date.date() <= station_today - timedelta(days=self.settle_days):
+            return IMMUTABLE
+        return SLOW
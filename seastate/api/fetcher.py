@@ -0,0 +1,114 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Hashable, List, Optional, Tuple, Union
+
+from seastate.api.rest_adapter import RestAdapter
+from seastate.models import Result
+from seastate.settings import MAX_IN_FLIGHT_PER_HOST
+
+# (adapter, endpoint, ep_params) as passed to RestAdapter.get
+Request = Tuple[RestAdapter, str, Optional[Dict]]
+
+
+def request_key(request: Request) -> Hashable:
+    """Identity of a request, equal for requests fetching the same resource"""
+    adapter, endpoint, ep_params = request
+    params = tuple(sorted((ep_params or {}).items()))
+    return (adapter.url, endpoint, params)
+
+
+class ConcurrentFetcher:
+    """Fetches requests on a thread pool, each unique request exactly once
+
+    Identical requests (same url, endpoint and params) are deduplicated, and
+    the number of requests in flight against a single hostname is bounded.
+    Each hostname gets its own pool of at most max_per_host threads, so a
+    fetch starts at most max_per_host threads per distinct hostname however
+    many requests it holds. With max_workers, all hostnames share a single
+    pool of at most max_workers threads instead.
+
+    The per-host bound is held by the fetcher: it applies across concurrent
+    fetch calls on one instance, not across instances.
+    """
+
+    def __init__(
+        self,
+        max_per_host: int = MAX_IN_FLIGHT_PER_HOST,
+        max_workers: int = None,
+        logger: logging.Logger = None,
+    ):
+        """Constructor for ConcurrentFetcher
+
+        Args:
+            max_per_host (int, optional): simultaneous requests per hostname.
+            max_workers (int, optional): upper bound of threads across
+                hostnames. Defaults to max_per_host per distinct hostname.
+                Requests waiting on a busy hostname hold their thread.
+        """
+        self._logger = logger or logging.getLogger(__name__)
+        self.max_per_host = max(1, int(max_per_host))
+        self.max_workers = max_workers
+        self._host_limits = {}
+        self._lock = threading.Lock()
+
+    def _host_limit(self, hostname: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            if hostname not in self._host_limits:
+                self._host_limits[hostname] = threading.BoundedSemaphore(
+                    self.max_per_host
+                )
+            return self._host_limits[hostname]
+
+    def _fetch_one(self, request: Request) -> Union[Result, Exception]:
+        adapter, endpoint, ep_params = request
+        with self._host_limit(adapter.hostname):
+            try:
+                return adapter.get(endpoint=endpoint, ep_params=ep_params)
+            except Exception as e:
+                # surfaced per request, so one failure doesn't sink the batch
+                return e
+
+    def fetch(self, requests: List[Request]) -> List[Union[Result, Exception]]:
+        """Fetch requests concurrently
+
+        Args:
+            requests (List[Request]): (adapter, endpoint, ep_params) tuples
+
+        Returns:
+            List[Union[Result, Exception]]: aligned with requests, holding the
+                Result or the exception raised while fetching it
+        """
+        unique = {}
+        for request in requests:
+            unique.setdefault(request_key(request), request)
+        self._logger.debug(
+            f"fetching {len(unique)} unique of {len(requests)} requested endpoints"
+        )
+        if not unique:
+            return []
+        by_host = {}
+        for key, request in unique.items():
+            by_host.setdefault(request[0].hostname, {})[key] = request
+        if self.max_workers:
+            # one shared pool, hostnames interleaved so no host queues
+            # behind another one's backlog
+            queues = [list(x.items()) for x in by_host.values()]
+            interleaved = [
+                x[i] for i in range(max(map(len, queues))) for x in queues if i < len(x)
+            ]
+            by_host = {None: dict(interleaved)}
+            sizes = [min(max(1, int(self.max_workers)), len(unique))]
+        else:
+            sizes = [min(self.max_per_host, len(x)) for x in by_host.values()]
+        executors = [ThreadPoolExecutor(max_workers=x) for x in sizes]
+        try:
+            futures = {}
+            for executor, requests_of_host in zip(executors, by_host.values()):
+                for key, request in requests_of_host.items():
+                    futures[key] = executor.submit(self._fetch_one, request)
+            fetched = {key: future.result() for key, future in futures.items()}
+        finally:
+            for executor in executors:
+                executor.shutdown()
+        return [fetched[request_key(request)] for request in requests]
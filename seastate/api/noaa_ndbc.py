@@ -1,18 +1,29 @@
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, Union
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 
-from seastate.api.base import BaseApi
+import numpy as np
+
+from seastate.api.archive import ArchiveStore
+from seastate.api.base import BaseApi, check_format, empty_data, rows_after
+from seastate.api.cache_policy import NdbcCachePolicy
 from seastate.api.rest_adapter import RestAdapter
+from seastate.api.stdmet import StdmetTable
 from seastate.exceptions import SeaStateException
 from seastate.models import Result
+from seastate.settings import STREAM_BATCH_SIZE
 
 
 class NdbcApi(BaseApi):
     def __init__(self, logger: logging.Logger = None):
         """Constructor for NdbcApi, composed with RestAdapter"""
         self._logger = logger or logging.getLogger(__name__)
-        self._adapter = RestAdapter("www.ndbc.noaa.gov")
+        # historical and monthly files are kept in a local archive
+        self._adapter = RestAdapter(
+            "www.ndbc.noaa.gov",
+            archive=ArchiveStore(),
+            cache_policy=NdbcCachePolicy(),
+        )
 
     def _build_parse_key(self, measurement: str = None) -> Union[str, list[str], None]:
         measurement = measurement.lower()
@@ -69,9 +80,8 @@ class NdbcApi(BaseApi):
                 for x in range(start_range, end_range)
             ]
             endpoints += [
-                f"view_text_file.php?filename= \
-                    {station_id}{x}{datetime.today().year} \
-                        .txt.gz&dir=data/stdmet/{y}/"
+                f"view_text_file.php?filename={station_id}{x}{datetime.today().year}"
+                f".txt.gz&dir=data/stdmet/{y}/"
                 for x, y in requested_months
             ]
         # daterange spans prior years
@@ -82,163 +92,278 @@ class NdbcApi(BaseApi):
             end_range = end.year if end.year == datetime.today().year else end.year + 1
             requested_years = [str(x) for x in range(start.year, end_range)]
             endpoints += [
-                f"view_text_file.php?filename= \
-                    {station_id}h{x} \
-                        .txt.gz&dir=data/historical/stdmet/"
+                f"view_text_file.php?filename={station_id}h{x}"
+                ".txt.gz&dir=data/historical/stdmet/"
                 for x in requested_years
             ]
         return endpoints, None
 
-    def _parse_result(
-        self, result: list[Result], start: datetime, end: datetime, measurement: str
-    ) -> list[Dict]:
-        # unpack list of results to text
-        tmp = ""
-        for res in result:
-            tmp += res.data
-
-        # unpack text result
-        # realtime ndbc reports are a text file with previous 45 days of measurements
-        # archival are a years worth
-        # todo: unpack text file into t: and v:
-        data = []
-        for i, value in enumerate(tmp.split("\n")):
-            # turn str to list
-            # known anomaly: 2 space characters sometimes delimiting
-            line = value.replace("  ", " ").split(" ")
-            while " " in line:
-                line.remove(" ")  # remove blanks
-            while "" in line:
-                line.remove("")  # remove blanks
-
-            # handle corrupted lines
-            if len(line) == 0:
-                self._logger.info(f"ignoring line #{i}:{str(line)}")
-                continue
-
-            # handle header lines
-            if line[0] in ["#YY", "YY"]:
-                # header row starts with #YY in realtime, YY in archive
-                header = line
-                # strip '#' from '#YY'
-                header[0] = header[0].strip("#")
-                continue
-            elif line[0] in ["#yr"]:
-                # skipping units line
-                continue
-
-            # ignore lines outside of daterange
-            # archive files sometimes use 95 instead of 1995
-            if not (start.year <= int(line[0]) <= end.year) and not (
-                abs(start.year % 100) <= int(line[0]) <= abs(end.year % 100)
-            ):
-                # 4 digit year representation
-                continue
-            if not start.month <= int(line[1]) <= end.month:
-                continue
-            if not start.day <= int(line[2]) <= end.day:
-                continue
-
-            # line is in requested daterange
-            # parse timestamp
-            timestamp = datetime(
-                year=int(
-                    line[0] if len(line[0]) == 4 else "19" + line[0]
-                ),  # rebuild dates with archive format
-                month=int(line[1]),
-                day=int(line[2]),
-                hour=int(line[3]),
-                minute=int(
-                    line[4] if "mm" in header else 0
-                ),  # archival format is hourly
-            ).isoformat(sep=" ")
-            # parse measurement column
-            # because of changes in the source api column names over the years
-            # we try to unpack with the possible variants
-            # details here: https://www.ndbc.noaa.gov/measdes.shtml
-            temp_data = {}
-            # unpack time and main value
-            for key in self._build_parse_key(measurement):
-                try:
-                    temp_data["t"] = timestamp
-                    temp_data["v"] = line[header.index(key)]
-                except (KeyError, ValueError):
-                    pass
-            # check for success before continuing
-            if len(temp_data) < 2:
-                self._logger.error(value)
-                raise SeaStateException("NdbcApi unpacking error, please report issue")
+    def _build_extra_keys(self, measurement: str = None) -> Dict[str, tuple]:
+        """Optional columns unpacked alongside the main value
+
+        Returns:
+            Dict[str, tuple]: output key -> (column name variants, missing marker)
+        """
+        measurement = measurement.lower()
+        if "wind" in measurement:
             # wind sometimes has direction and gust data
-            if "wind" in measurement:
-                # for wind direction:
-                for key in ["WDIR", "WD", "DIR"]:
-                    try:
-                        temp = line[header.index(key)]
-                        temp_data["d"] = (
-                            temp
-                            if temp and "999" not in temp and "MM" not in temp
-                            else None
-                        )  # 999 for direction
-                    except Exception as e:
-                        self._logger.debug(f"{e} for {measurement}")
-                # For wind gust:
-                for key in ["GST", "GSP"]:
-                    try:
-                        temp = line[header.index(key)]
-                        temp_data["g"] = (
-                            temp
-                            if temp and "99" not in temp and "MM" not in temp
-                            else None
-                        )  # 99 for decimal
-                    except Exception as e:
-                        self._logger.debug(f"{e} for {measurement}")
+            return {
+                "d": (["WDIR", "WD", "DIR"], "999"),  # 999 for direction
+                "g": (["GST", "GSP"], "99"),  # 99 for decimal
+            }
+        elif "wave" in measurement:
             # wave sometimes has period and direction
-            if "wave" in measurement:
-                # for dominant wave period:
-                for key in ["DPD", "DOMPD"]:
-                    try:
-                        temp = line[header.index(key)]
-                        temp_data["dpd"] = (
-                            temp
-                            if temp and "99" not in temp and "MM" not in temp
-                            else None
-                        )  # 99 for decimal
-                    except Exception as e:
-                        self._logger.debug(f"{e} for {measurement}")
-                # For dominant wave direction:
-                for key in ["MWD"]:
-                    try:
-                        temp = line[header.index(key)]
-                        temp_data["mwd"] = (
-                            temp
-                            if temp and "999" not in temp and "MM" not in temp
-                            else None
-                        )  # 999 for direction
-                    except Exception as e:
-                        self._logger.debug(f"{e} for {measurement}")
-                # For average wave period
-                for key in ["APD", "AVP"]:
-                    try:
-                        temp = line[header.index(key)]
-                        temp_data["apd"] = (
-                            temp
-                            if temp and "99" not in temp and "MM" not in temp
-                            else None
-                        )
-                    except Exception as e:
-                        self._logger.debug(f"{e} for {measurement}")
-            data.append(temp_data)
-
-        # log warning if no data recovered for daterange
-        if len(data) == 0:
+            return {
+                "dpd": (["DPD", "DOMPD"], "99"),  # dominant wave period
+                "mwd": (["MWD"], "999"),  # dominant wave direction
+                "apd": (["APD", "AVP"], "99"),  # average wave period
+            }
+        return {}
+
+    def _parse_table(
+        self, result: list[Result], start: datetime, end: datetime
+    ) -> StdmetTable:
+        """Parses fetched station files once into a table restricted to daterange"""
+        # realtime ndbc reports are a text file with previous 45 days of measurements
+        # archival are a years worth
+        return StdmetTable.concat(
+            [StdmetTable.from_text(res.data, start, end) for res in result]
+        )
+
+    def _measurement_from_table(
+        self,
+        table: StdmetTable,
+        measurement: str,
+        start: datetime,
+        end: datetime,
+        format: str = "records",
+    ) -> Union[list[Dict], Dict[str, np.ndarray]]:
+        """Unpacks a single measurement from a table built by _parse_table"""
+        # parse measurement column
+        # because of changes in the source api column names over the years
+        # we try to unpack with the possible variants
+        # details here: https://www.ndbc.noaa.gov/measdes.shtml
+        value, present = table.raw(self._build_parse_key(measurement))
+        # check for success before continuing
+        if not present.all():
+            self._logger.error(f"{measurement} missing at {table.t[~present][0]}")
+            raise SeaStateException("NdbcApi unpacking error, please report issue")
+        if len(table) == 0:
             self._logger.warning(
                 f"No {measurement} data recovered for daterange:\
                     {str(start.date())} : {str(end.date())}"
             )
+        if format == "columns":
+            return self._columns_from_table(table, measurement)
+        columns = {"t": table.timestamps(), "v": value}
+        # unpack additional information, None when reported missing
+        # rows of files without the column don't get the key
+        optional = {}
+        for name, (keys, missing) in self._build_extra_keys(measurement).items():
+            temp, has_key = table.raw(keys)
+            is_missing = np.array(
+                [missing in x or "MM" in x for x in temp], dtype=bool
+            )
+            temp[is_missing] = None
+            columns[name] = temp
+            optional[name] = has_key
+
+        data = [dict(zip(columns, row)) for row in zip(*columns.values())]
+        for name, has_key in optional.items():
+            if not has_key.all():
+                for i in np.flatnonzero(~has_key):
+                    del data[i][name]
 
         # todo: scrub duplicates between cutoff month and realtime
         return data
 
+    def _columns_from_table(
+        self, table: StdmetTable, measurement: str
+    ) -> Dict[str, np.ndarray]:
+        """Unpacks a measurement as datetime64 time and float64 value arrays,
+        missing values are NaN"""
+        columns = {
+            "t": table.t,
+            "v": table.values(self._build_parse_key(measurement)),
+        }
+        for name, (keys, _) in self._build_extra_keys(measurement).items():
+            columns[name] = table.values(keys)
+        return columns
+
+    def _parse_result(
+        self,
+        result: list[Result],
+        start: datetime,
+        end: datetime,
+        measurement: str,
+        format: str = "records",
+    ) -> Union[list[Dict], Dict[str, np.ndarray]]:
+        table = self._parse_table(result, start, end)
+        return self._measurement_from_table(table, measurement, start, end, format)
+
+    def _parse_results(
+        self,
+        result: list[Result],
+        start: datetime,
+        end: datetime,
+        measurements: list,
+        format: str = "records",
+    ) -> Dict[str, Union[list[Dict], Dict[str, np.ndarray]]]:
+        """Parses the station files once and unpacks every measurement from it"""
+        table = self._parse_table(result, start, end)
+        return self._measurements_from_table(table, measurements, start, end, format)
+
+    def _measurements_from_table(
+        self,
+        table: StdmetTable,
+        measurements: list,
+        start: datetime,
+        end: datetime,
+        format: str = "records",
+    ) -> Dict[str, Union[list[Dict], Dict[str, np.ndarray]]]:
+        """Unpacks every measurement from a table built by _parse_table"""
+        data = {}
+        for measurement in measurements:
+            try:
+                data[measurement] = self._measurement_from_table(
+                    table, measurement, start, end, format
+                )
+            except SeaStateException as e:
+                # one missing column shouldn't sink the other measurements
+                self._logger.error(f"{e} for {measurement}")
+                data[measurement] = empty_data(format)
+        return data
+
+    def _parse_realtime_since(self, station_id: str, since: datetime) -> StdmetTable:
+        """Parses the realtime rows newer than since
+
+        Realtime files are newest first, the response is streamed and
+        reading stops at the first row at or before since.
+        """
+        # fixed width "YYYY MM DD hh mm" prefix compares chronologically
+        threshold = f"{since:%Y %m %d %H %M}"
+        header = None
+        rows = []
+        lines = self._adapter.iter_lines(f"data/realtime2/{station_id}.txt")
+        try:
+            for line in lines:
+                if line.startswith("#"):
+                    header = header or line
+                    continue
+                if not line.strip():
+                    continue
+                if line[:16] <= threshold:
+                    break
+                rows.append(line)
+        finally:
+            # stops the download of the remaining, already seen rows
+            lines.close()
+        if header is None or not rows:
+            return StdmetTable.empty()
+        return StdmetTable.from_text("\n".join([header] + rows))
+
+    def _sync_measurements(
+        self,
+        measurements: List[str],
+        station_id: str,
+        since: Dict[str, Optional[datetime]],
+        start: datetime,
+        end: datetime,
+        format: str = "records",
+    ) -> Dict[str, Union[list[Dict], Dict[str, np.ndarray]]]:
+        """Retrieves the samples of each measurement newer than its cursor
+
+        All measurements are served by the same files. When every cursor is
+        within the realtime file only its new rows are parsed, otherwise the
+        files are requested from the oldest cursor, or start, through end.
+        """
+        cursors = [since.get(x) for x in measurements]
+        archive_cutoff_date = datetime.today() - timedelta(days=45)
+        if all(x is not None and x > archive_cutoff_date for x in cursors):
+            table = self._parse_realtime_since(station_id, min(cursors))
+            if len(table) == 0:
+                # nothing new since the last sync
+                return {key: empty_data(format) for key in measurements}
+            data = self._measurements_from_table(
+                table, measurements, start, end, format
+            )
+        else:
+            begin = min(x or start for x in cursors)
+            data = self._measurements_from_date_range(
+                measurements, station_id, begin, end, format
+            )
+        return {key: rows_after(x, since.get(key)) for key, x in data.items()}
+
+    @staticmethod
+    def _chronological(pairs: List[Tuple[str, Optional[Dict]]]) -> list:
+        """Orders stdmet requests oldest file first
+
+        historical years, then monthly files of the current year,
+        then the cutoff month and finally realtime
+        """
+
+        def key(pair: Tuple[str, Optional[Dict]]) -> tuple:
+            endpoint = pair[0]
+            if "data/realtime2/" in endpoint:
+                return (3, 0)
+            if "data/historical/" in endpoint:
+                return (0, int(endpoint.split(".txt")[0][-4:]))
+            if endpoint.startswith("view_text_file.php"):
+                # filename={station_id}{month}{year}.txt.gz
+                month = datetime.strptime(endpoint.rstrip("/")[-3:], "%b").month
+                return (1, month)
+            return (2, 0)
+
+        return sorted(pairs, key=key)
+
+    def iter_measurements(
+        self,
+        measurements: List[str],
+        station_id: str,
+        start: datetime,
+        end: datetime,
+        format: str = "records",
+        batch_size: int = STREAM_BATCH_SIZE,
+    ) -> Iterator[Dict[str, Union[list[Dict], Dict[str, np.ndarray]]]]:
+        """Streams several measurements of one station in chronological batches
+
+        Station files are requested oldest first and parsed line by line
+        from the response, batch_size lines at a time. Historical and monthly
+        files are oldest-first and yielded as they are parsed; realtime
+        files are newest-first and are reversed once parsed, so the realtime
+        file (45 days at most) is the largest part held at once. Rows at or
+        before the last yielded timestamp, like the overlap between the
+        cutoff month and realtime, are dropped.
+
+        Yields:
+            Dict[str, Union[list[Dict], Dict[str, np.ndarray]]]: measurement ->
+                samples of the batch
+        """
+        check_format(format)
+        for pairs, group in self._plan_requests(measurements, station_id, start, end):
+            last = None
+            for endpoint, ep_params in self._chronological(pairs):
+                lines = self._adapter.iter_lines(endpoint, ep_params)
+                # realtime files are newest first, the others oldest first,
+                # reading stops once past the window
+                newest_first = "data/realtime2/" in endpoint
+                tables = StdmetTable.iter_lines(
+                    lines, start, end, batch_size, newest_first
+                )
+                if newest_first:
+                    # newest first, reversed to keep the stream chronological
+                    reverse = slice(None, None, -1)
+                    tables = [x.take(reverse) for x in reversed(list(tables))]
+                for table in tables:
+                    if last is not None:
+                        table = table.take(table.t > last)
+                    if len(table) == 0:
+                        continue
+                    last = table.t.max()
+                    yield self._measurements_from_table(
+                        table, group, start, end, format
+                    )
+
 
 if __name__ == "__main__":
     api = NdbcApi()
@@ -1,18 +1,40 @@
 import logging
-from datetime import datetime
-from typing import Dict, Union
+import math
+from datetime import datetime, time, timedelta
+from typing import Dict, List, Optional, Tuple, Union
 
-from seastate.api.base import BaseApi
+import numpy as np
+
+from seastate.api.base import BaseApi, utc_now
+from seastate.api.cache_policy import TidesAndCurrentsCachePolicy
 from seastate.api.rest_adapter import RestAdapter
 from seastate.exceptions import SeaStateException
 from seastate.models import Result
 
+# numeric keys of datagetter records, others are flags or text
+# details here: https://api.tidesandcurrents.noaa.gov/api/prod/responseHelp.html
+NUMERIC_KEYS = ("v", "s", "d", "g")
+
 
 class TidesAndCurrentsApi(BaseApi):
     def __init__(self, logger: logging.Logger = None):
         """Constructor for TidesAndCurrentsApi, composed with RestAdapter"""
         self._logger = logger or logging.getLogger(__name__)
-        self._adapter = RestAdapter("api.tidesandcurrents.noaa.gov")
+        # closed past date ranges never change, and are cached indefinitely
+        self._adapter = RestAdapter(
+            "api.tidesandcurrents.noaa.gov",
+            cache_policy=TidesAndCurrentsCachePolicy(),
+        )
+
+    def now(self, lon: float, utc: Optional[datetime] = None) -> datetime:
+        """Station time, requests ask for time_zone=lst_ldt
+
+        The station's zone is unknown, so its standard time is taken from
+        the zone whose meridian is at or west of the station. That is never
+        ahead of the station's clock for US stations, and up to a couple of
+        hours behind it, so trailing hours are never counted as missing.
+        """
+        return (utc or utc_now()) + timedelta(hours=math.floor(lon / 15))
 
     def _build_parse_key(self, measurement: str = None) -> Union[str, list[str], None]:
         return "data"
@@ -42,6 +64,9 @@ class TidesAndCurrentsApi(BaseApi):
 
         # formatting datetime to endpoint param
         begin_date = f"{start.year}{start.month:02}{start.day:02}"
+        if start.time() != time():
+            # incremental syncs start mid day, yyyyMMdd HH:mm
+            begin_date += f" {start.hour:02}:{start.minute:02}"
         end_date = f"{end.year}{end.month:02}{end.day:02}"
 
         ep_params = {
@@ -61,32 +86,64 @@ class TidesAndCurrentsApi(BaseApi):
         endpoint = "api/prod/datagetter?"
         return endpoint, ep_params
 
+    @staticmethod
+    def _chunk_date_range(start: datetime, end: datetime) -> list[tuple]:
+        """Splits daterange at calendar month boundaries
+
+        A month is within the request length limit of every interval,
+        and interior chunks stay identical when the daterange is extended,
+        so they are served from cache.
+        """
+        chunks = []
+        chunk_start = start
+        while chunk_start.date() <= end.date():
+            next_month = (chunk_start.replace(day=1) + timedelta(days=32)).replace(
+                day=1, hour=0, minute=0, second=0, microsecond=0
+            )
+            chunks.append((chunk_start, min(end, next_month - timedelta(seconds=1))))
+            chunk_start = next_month
+        return chunks
+
+    def _build_requests(
+        self, measurement: str, station_id: str, start: datetime, end: datetime
+    ) -> List[Tuple[str, Optional[Dict]]]:
+        """One datagetter request per calendar month of daterange"""
+        return [
+            self._build_endpoint(measurement, station_id, chunk_start, chunk_end)
+            for chunk_start, chunk_end in self._chunk_date_range(start, end)
+        ]
+
     def _parse_result(
-        self, result: list[Result], start: datetime, end: datetime, measurement: str
-    ) -> list[Dict]:
+        self,
+        result: list[Result],
+        start: datetime,
+        end: datetime,
+        measurement: str,
+        format: str = "records",
+    ) -> Union[list[Dict], Dict[str, np.ndarray]]:
         # unpack to return specified measurement
         # since TidesAndCurrents returns 1 product per endpoint:
         # -> minimal parsing, just unpack Json
         # details here: https://api.tidesandcurrents.noaa.gov/api/prod/responseHelp.html
         #
-        if len(result) > 1:
-            raise SeaStateException(
-                "TidesAndCurrentsApi doesn't support multiple results"
-            )
-        try:
-            parse_key = self._build_parse_key(measurement)
-            # checking payload for error message first
-            if result[0].data.get("error"):
-                self._logger.error(
-                    f"TidesAndCurrentsApi error, returning empty data\n{measurement}:{result[0].data}"
-                )
-                return []
-            # parsing
-            data = result[0].data[parse_key]
-        except KeyError as e:
-            msg = f"{e} unpacking {measurement} with key: {parse_key}\n{result[0].data}"
-            self._logger.error(msg=msg)
-            raise SeaStateException("TidesAndCurrentsApi unpacking error") from e
+        # long dateranges arrive as several chunks, merged in time order
+        parse_key = self._build_parse_key(measurement)
+        data = []
+        for res in result:
+            try:
+                # checking payload for error message first
+                if res.data.get("error"):
+                    self._logger.error(
+                        "TidesAndCurrentsApi error, skipping chunk\n"
+                        f"{measurement}:{res.data}"
+                    )
+                    continue
+                # parsing
+                data += res.data[parse_key]
+            except KeyError as e:
+                msg = f"{e} unpacking {measurement} with key: {parse_key}\n{res.data}"
+                self._logger.error(msg=msg)
+                raise SeaStateException("TidesAndCurrentsApi unpacking error") from e
 
         if len(data) == 0:
             self._logger.warning(
@@ -94,4 +151,18 @@ class TidesAndCurrentsApi(BaseApi):
                     {str(start.date())} : {str(end.date())}"
             )
 
+        if format == "columns":
+            return self._columns_from_records(data)
         return data
+
+    @staticmethod
+    def _columns_from_records(data: list[Dict]) -> Dict[str, np.ndarray]:
+        """Converts records to a datetime64 time array and float64 value arrays
+
+        Flags and other non numeric keys are dropped, empty values are NaN.
+        """
+        columns = {"t": np.array([x["t"] for x in data], dtype="datetime64[s]")}
+        keys = [x for x in (data[0] if data else {"v": None}) if x in NUMERIC_KEYS]
+        for key in keys:
+            columns[key] = np.array([x.get(key) or np.nan for x in data], dtype=float)
+        return columns
@@ -1,17 +1,24 @@
 import logging
-from typing import Dict, Union
+from typing import Dict, Iterator, Optional, Tuple, Union
 
 import requests
 import requests.packages
 from requests_cache import CachedSession
+from seastate.api.archive import ArchiveStore
+from seastate.api.cache_policy import CachePolicy
+from seastate.api.single_flight import SingleFlight
+from seastate.api.throttle import ThrottledHTTPAdapter, bucket_for
 from seastate.exceptions import SeaStateException
 from seastate.models import Result
+from seastate.settings import HTTP_POOL_SIZE, HTTP_TIMEOUT
 
 
 class RestAdapter:
     session = CachedSession(
         "seastate_cache", backend="filesystem", use_cache_dir=True, expire_after=59
     )
+    # concurrent identical GETs, from any adapter or thread, share one fetch
+    single_flight = SingleFlight()
 
     def __init__(
         self,
@@ -19,6 +26,10 @@ class RestAdapter:
         api_key: str = None,
         ssl_verify: bool = True,
         logger: logging.Logger = None,
+        archive: ArchiveStore = None,
+        cache_policy: CachePolicy = None,
+        pool_size: int = HTTP_POOL_SIZE,
+        timeout: Union[float, Tuple[float, float]] = HTTP_TIMEOUT,
     ):
         """Constructor for RestAdapter, supports GET
 
@@ -26,14 +37,92 @@ class RestAdapter:
             hostname (str): hostname for http request
             api_key (str, optional): Defaults to ''.
             ssl_verify (bool, optional): Defaults to True.
+            archive (ArchiveStore, optional): durable store consulted before
+                the network for endpoints cache_policy doesn't classify LIVE.
+            cache_policy (CachePolicy, optional): picks the cache expiration
+                per request. Defaults to CachePolicy(), which classifies every
+                endpoint LIVE.
+            pool_size (int, optional): kept-alive connections to hostname.
+                The pool is shared by adapters to hostname and sized to the
+                largest pool_size requested.
+            timeout (Union[float, Tuple[float, float]], optional): seconds to
+                connect and to read, or one value for both.
         """
         self._logger = logger or logging.getLogger(__name__)
+        self.hostname = hostname.strip("/")
         self.url = f"https://{hostname}/"
         self._api_key = api_key
         self._ssl_verify = ssl_verify
+        self._archive = archive
+        self._cache_policy = cache_policy or CachePolicy()
+        self.pool_size = pool_size
+        self.timeout = timeout
+        # connections to hostname are pooled on the shared session,
+        # so concurrent requests reuse them instead of reconnecting
+        prefix = f"https://{self.hostname}/"
+        mounted = self.session.adapters.get(prefix)
+        if mounted is None or mounted._pool_maxsize < pool_size:
+            # rate limited and retried per hostname, see api/throttle.py.
+            # A larger pool replaces the mounted one, which isn't closed so
+            # requests in flight on it complete
+            self.session.mount(
+                prefix,
+                ThrottledHTTPAdapter(
+                    bucket_for(self.hostname),
+                    backoff=getattr(mounted, "backoff", None),
+                    pool_connections=1,
+                    pool_maxsize=pool_size,
+                ),
+            )
         if not ssl_verify:
             requests.packages.urllib3.disable_warnings()
 
+    def _archive_key(
+        self, http_method: str, endpoint: str, ep_params: Dict = None
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """Archive key and endpoint class of a request, (None, None) when the
+        request isn't stored in the archive"""
+        if self._archive is None or http_method != "GET":
+            return None, None
+        endpoint_class = self._cache_policy.classify(endpoint, ep_params)
+        if not self._archive.is_storable(endpoint_class):
+            return None, None
+        archive_key = requests.Request("GET", self.url + endpoint, params=ep_params)
+        return archive_key.prepare().url, endpoint_class
+
+    def _send(
+        self,
+        http_method: str,
+        endpoint: str,
+        ep_params: Dict = None,
+        data: Dict = None,
+        stream: bool = False,
+    ) -> requests.Response:
+        """Sends the request through the cached session, unparsed"""
+        full_url = self.url + endpoint
+        headers = {"x-api-key": self._api_key}
+        log_line_pre = (
+            f"request: method={http_method}, url={full_url}, params={ep_params}"
+        )
+        # Log HTTP params and try HTTP request
+        try:
+            self._logger.debug(msg=log_line_pre)
+            # response = requests.request(
+            return self.session.request(
+                method=http_method,
+                url=full_url,
+                verify=self._ssl_verify,
+                headers=headers,
+                params=ep_params,
+                json=data,
+                stream=stream,
+                timeout=self.timeout,
+                expire_after=self._cache_policy.expire_after(endpoint, ep_params),
+            )
+        except Exception as e:
+            self._logger.exception(msg=str(e))
+            raise SeaStateException("Request Failed") from e
+
     def _do(
         self, http_method: str, endpoint: str, ep_params: Dict = None, data: Dict = None
     ) -> Result:
@@ -52,26 +141,19 @@ class RestAdapter:
                 data
         """
         full_url = self.url + endpoint
-        headers = {"x-api-key": self._api_key}
+        # immutable and slow changing files may already be archived locally
+        archive_key, endpoint_class = self._archive_key(
+            http_method, endpoint, ep_params
+        )
+        if archive_key is not None:
+            archived = self._archive.get(archive_key)
+            if archived is not None:
+                return Result(200, message="OK (archive)", data=archived)
         log_line_pre = (
             f"request: method={http_method}, url={full_url}, params={ep_params}"
         )
         log_line_post = "result: success={}, status_code={}, message={}"
-        # Log HTTP params and try HTTP request
-        try:
-            self._logger.debug(msg=log_line_pre)
-            # response = requests.request(
-            response = self.session.request(
-                method=http_method,
-                url=full_url,
-                verify=self._ssl_verify,
-                headers=headers,
-                params=ep_params,
-                json=data,
-            )
-        except Exception as e:
-            self._logger.exception(msg=str(e))
-            raise SeaStateException("Request Failed") from e
+        response = self._send(http_method, endpoint, ep_params, data)
         # Parse JSON ouput to Python object or return failed Result on exception
         try:
             if ".txt" in full_url.lower():
@@ -97,6 +179,8 @@ class RestAdapter:
         if is_success:
             self._logger.debug(msg=log_line)
             self._logger.debug(msg=log_line_pre)
+            if archive_key is not None and isinstance(data_out, str):
+                self._archive.put(archive_key, data_out, endpoint_class)
             return Result(response.status_code, message=response.reason, data=data_out)
         # else, error has occured
         log_line += f"\n{log_line_pre}"  # enrich error msg
@@ -106,6 +190,10 @@ class RestAdapter:
     def get(self, endpoint: str, ep_params: Union[Dict, None] = None) -> Result:
         """GET method for RestAdapter
 
+        Concurrent calls for the same url and params are coalesced into a
+        single request, every caller receives the same Result, see
+        RestAdapter.single_flight.stats().
+
         Args:
             endpoint (str): target endpoint
             ep_params (Dict, optional): key:value API parameters. Defaults to None.
@@ -116,4 +204,68 @@ class RestAdapter:
                 message
                 data
         """
-        return self._do(http_method="GET", endpoint=endpoint, ep_params=ep_params)
+        key = (self.url, endpoint, tuple(sorted((ep_params or {}).items())))
+        return self.single_flight.do(
+            key,
+            lambda: self._do(http_method="GET", endpoint=endpoint, ep_params=ep_params),
+        )
+
+    def iter_lines(
+        self, endpoint: str, ep_params: Union[Dict, None] = None
+    ) -> Iterator[str]:
+        """Streams a text endpoint line by line, without holding the response
+
+        Archived files are read from the archive, and storable files are
+        archived once fully received, also when the caller stops reading
+        early.
+
+        Args:
+            endpoint (str): target endpoint
+            ep_params (Dict, optional): key:value API parameters. Defaults to None.
+
+        Yields:
+            str: lines of the response, without line endings
+        """
+        archive_key, endpoint_class = self._archive_key("GET", endpoint, ep_params)
+        if archive_key is not None:
+            archived = self._archive.get(archive_key)
+            if archived is not None:
+                yield from archived.splitlines()
+                return
+        response = self._send("GET", endpoint, ep_params, stream=True)
+        is_success = 299 >= response.status_code >= 200
+        if not is_success:
+            log_line = (
+                f"result: success={is_success}, status_code={response.status_code}, "
+                f"message={response.reason}\nrequest: method=GET, "
+                f"url={self.url + endpoint}, params={ep_params}"
+            )
+            self._logger.error(msg=log_line)
+            response.close()
+            raise SeaStateException(log_line)
+        # undeclared encodings would stream bytes
+        response.encoding = response.encoding or "utf-8"
+        lines = [] if archive_key is not None else None
+        received = response.iter_lines(decode_unicode=True)
+        try:
+            for line in received:
+                if lines is not None:
+                    lines.append(line)
+                yield line
+        except GeneratorExit:
+            # the consumer stopped early, the rest of the body is still
+            # received so the file is archived and not downloaded again
+            if lines is not None:
+                try:
+                    lines.extend(received)
+                except Exception as e:
+                    self._logger.warning(f"not archived, {archive_key}: {e}")
+                else:
+                    self._archive.put(
+                        archive_key, "\n".join(lines) + "\n", endpoint_class
+                    )
+            raise
+        finally:
+            response.close()
+        if lines is not None:
+            self._archive.put(archive_key, "\n".join(lines) + "\n", endpoint_class)
@@ -0,0 +1,68 @@
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls sharing a key into a single execution
+
+    The first caller of a key runs the call, callers arriving while it is
+    in flight wait for it and receive the same result, or the same
+    exception. Once the call returns the key is released, so later callers
+    run it again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+        self._executed = 0
+        self._coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Runs fn, unless a call of key is in flight, then waits on its result"""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self._executed += 1
+            else:
+                self._coalesced += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        try:
+            flight.result = fn()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result
+
+    def stats(self) -> Dict[str, int]:
+        """executed: calls run, coalesced: calls served by an in-flight call,
+        in_flight: calls running now"""
+        with self._lock:
+            return {
+                "executed": self._executed,
+                "coalesced": self._coalesced,
+                "in_flight": len(self._flights),
+            }
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._executed = 0
+            self._coalesced = 0
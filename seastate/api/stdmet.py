@@ -0,0 +1,418 @@
+import re
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# header and comment lines separate the numeric blocks of a stdmet file
+# header row starts with #YY in realtime, YY or YYYY in archive
+_SEPARATOR_TOKENS = ("#", "YY")
+# one match per line holding anything but whitespace
+_NONBLANK_LINE = re.compile(r"\S[^\n]*")
+
+# numeric placeholders NDBC archives use for missing values, 'MM' aside
+# details here: https://www.ndbc.noaa.gov/measdes.shtml
+MISSING_VALUES = {
+    "WDIR": 999.0,
+    "WD": 999.0,
+    "DIR": 999.0,
+    "MWD": 999.0,
+    "WSPD": 99.0,
+    "SPD": 99.0,
+    "GST": 99.0,
+    "GSP": 99.0,
+    "WVHT": 99.0,
+    "H0": 99.0,
+    "DPD": 99.0,
+    "DOMPD": 99.0,
+    "APD": 99.0,
+    "AVP": 99.0,
+    "PRES": 9999.0,
+    "BARO": 9999.0,
+    "BAR": 9999.0,
+    "ATMP": 999.0,
+    "WTMP": 999.0,
+    "DEWP": 999.0,
+    "VIS": 99.0,
+    "TIDE": 99.0,
+}
+
+
+def _window(t: np.ndarray, start: datetime, end: datetime) -> np.ndarray:
+    """Mask of timestamps from the day of start through the day of end"""
+    mask = np.ones(len(t), dtype=bool)
+    if start is not None:
+        mask &= t >= np.datetime64(start.date(), "s")
+    if end is not None:
+        mask &= t < np.datetime64(end.date() + timedelta(days=1), "s")
+    return mask
+
+
+def _split_blocks(text: str) -> List[str]:
+    """Splits text into block, separator, block, separator, ..., block
+
+    Separators are the header and comment lines, stripped of leading blanks
+    and line ending. Headers only occur a few times per file, so their
+    tokens are located with str.find rather than matching every line.
+    """
+    starts = set()
+    for token in _SEPARATOR_TOKENS:
+        i = text.find(token)
+        while i >= 0:
+            bol = text.rfind("\n", 0, i) + 1
+            # the token must start the line, after blanks
+            if not text[bol:i].strip(" \t"):
+                starts.add(bol)
+            i = text.find(token, i + 1)
+    parts = []
+    pos = 0
+    for bol in sorted(starts):
+        eol = text.find("\n", bol)
+        eol = len(text) if eol < 0 else eol
+        parts += [text[pos:bol], text[bol:eol].lstrip(" \t")]
+        pos = eol + 1
+    parts.append(text[pos:])
+    return parts
+
+
+def _day_key(line: str) -> Optional[int]:
+    """yyyymmdd of a data line as an int, None when it isn't a data line"""
+    parts = line.split(None, 3)
+    if len(parts) < 3:
+        return None
+    try:
+        year, month, day = int(parts[0]), int(parts[1]), int(parts[2])
+    except ValueError:
+        return None
+    # archive files sometimes use 95 instead of 1995
+    if year < 100:
+        year += 1900
+    return year * 10000 + month * 100 + day
+
+
+def _window_keys(start: datetime, end: datetime) -> Tuple[float, float]:
+    """yyyymmdd bounds of the days from start through end, inclusive"""
+    lo = start.year * 10000 + start.month * 100 + start.day if start else -np.inf
+    hi = end.year * 10000 + end.month * 100 + end.day if end else np.inf
+    return lo, hi
+
+
+def _key_at(block: str, pos: int) -> Optional[int]:
+    """Day key of the first data line starting at or after pos, None past the last"""
+    while pos < len(block):
+        eol = block.find("\n", pos)
+        eol = len(block) if eol < 0 else eol
+        key = _day_key(block[pos:eol])
+        if key is not None:
+            return key
+        pos = eol + 1
+    return None
+
+
+def _bisect_lines(block: str, predicate: Callable[[Optional[int]], bool]) -> int:
+    """Offset of the first line of block whose day key satisfies predicate
+
+    predicate must be False then True along the lines, lines past the
+    last data line count as True. Probes O(log n) lines.
+    """
+    lo, hi = 0, len(block)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        # start of the line holding mid
+        bol = block.rfind("\n", 0, mid) + 1
+        if predicate(_key_at(block, bol)):
+            hi = bol
+        else:
+            eol = block.find("\n", mid)
+            lo = len(block) if eol < 0 else eol + 1
+    return lo
+
+
+def _slice_window(block: str, start: datetime, end: datetime) -> str:
+    """Lines of a sorted block within the days from start through end
+
+    Realtime files are newest first, monthly and historical files oldest
+    first; the order is read from the first and last lines, and the window
+    edges are found by bisection instead of scanning every line.
+    """
+    if start is None and end is None:
+        return block
+    lo, hi = _window_keys(start, end)
+    first = _key_at(block, 0)
+    eol = len(block)
+    while eol and block[eol - 1].isspace():
+        eol -= 1
+    last_line = slice(block.rfind("\n", 0, eol) + 1, eol)
+    last = _day_key(block[last_line])
+    if first is None or last is None:
+        return block
+    if first <= last:
+        # oldest first
+        a = _bisect_lines(block, lambda x: x is None or x >= lo)
+        b = _bisect_lines(block, lambda x: x is None or x > hi)
+    else:
+        # newest first
+        a = _bisect_lines(block, lambda x: x is None or x <= hi)
+        b = _bisect_lines(block, lambda x: x is None or x < lo)
+    return block[a:b]
+
+
+def _iter_window(
+    lines: Iterable[str], start: datetime, end: datetime, newest_first: bool = None
+) -> Iterator[str]:
+    """Drops data lines outside the days from start through end
+
+    With a known sort order, reading stops at the first line past the window.
+    """
+    lo, hi = _window_keys(start, end)
+    prefix, inside, past = None, True, False
+    for line in lines:
+        stripped = line.lstrip()
+        if not stripped or stripped.startswith(("#", "YY")):
+            yield line
+            continue
+        # the decision only changes with the day, cached on the date prefix
+        # "yyyy mm dd", re-parsed when the prefix doesn't end on a separator
+        if line[:10] != prefix or not line[10:11].isspace():
+            key = _day_key(line)
+            if key is None:
+                continue
+            prefix = line[:10]
+            inside = lo <= key <= hi
+            past = key < lo if newest_first else key > hi
+        if inside:
+            yield line
+        elif past and newest_first is not None:
+            return
+
+
+def _iter_blocks(lines: Iterable[str], batch_size: int) -> Iterator[Tuple[list, str]]:
+    """Groups data lines into (header, block) of at most batch_size lines,
+    a header or comment line closes the current block"""
+    header = None
+    batch = []
+    for line in lines:
+        stripped = line.strip()
+        if stripped.startswith(("#", "YY")):
+            if batch:
+                yield header, "\n".join(batch)
+                batch = []
+            if stripped.lstrip("#").startswith("YY"):
+                # strip '#' from '#YY'
+                header = stripped.lstrip("#").split()
+            continue
+        if header is None or not stripped:
+            continue
+        batch.append(line)
+        if len(batch) >= batch_size:
+            yield header, "\n".join(batch)
+            batch = []
+    if batch:
+        yield header, "\n".join(batch)
+
+
+class StdmetTable:
+    """Columnar table of NDBC standard meteorological (stdmet) text files
+
+    Rows keep the order of the source files. Each column holds the raw
+    tokens of the files, '' where a file doesn't have that column,
+    and t holds the timestamps as datetime64.
+    """
+
+    def __init__(self, t: np.ndarray, columns: Dict[str, np.ndarray]):
+        self.t = t
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return len(self.t)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.columns
+
+    @classmethod
+    def empty(cls) -> "StdmetTable":
+        return cls(np.array([], dtype="datetime64[s]"), {})
+
+    @classmethod
+    def from_text(
+        cls, text: str, start: datetime = None, end: datetime = None
+    ) -> "StdmetTable":
+        """Parses a stdmet text file, one bulk pass per header block
+
+        Args:
+            text (str): content of a realtime2, monthly or historical file
+            start (datetime, optional): keep rows from the day of start
+            end (datetime, optional): keep rows through the day of end
+        """
+        tables = []
+        header = None
+        # alternates: block, separator, block, separator, ...
+        parts = _split_blocks(text)
+        for i, part in enumerate(parts):
+            if i % 2:
+                if part.lstrip("#").startswith("YY"):
+                    # strip '#' from '#YY'
+                    header = part.lstrip("#").split()
+                continue
+            if header is None or not part.strip():
+                continue
+            tables.append(cls._from_block(header, part, start, end))
+        return cls.concat(tables)
+
+    @classmethod
+    def iter_lines(
+        cls,
+        lines: Iterable[str],
+        start: datetime = None,
+        end: datetime = None,
+        batch_size: int = 5000,
+        newest_first: bool = None,
+    ) -> Iterator["StdmetTable"]:
+        """Parses a stdmet file streamed line by line, in batches of lines
+
+        Same parsing as from_text, but only batch_size lines are held at a
+        time. Batches without rows in the window are skipped.
+
+        Args:
+            lines (Iterable[str]): lines of a realtime2, monthly or historical file
+            start (datetime, optional): keep rows from the day of start
+            end (datetime, optional): keep rows through the day of end
+            batch_size (int, optional): lines per yielded table, at most.
+            newest_first (bool, optional): sort order of the file, True for
+                realtime, False for monthly and historical files. When known,
+                reading stops once past the window.
+        """
+        if newest_first is not None or start is not None or end is not None:
+            lines = _iter_window(lines, start, end, newest_first)
+        for header, block in _iter_blocks(lines, batch_size):
+            table = cls._from_block(header, block, start, end)
+            if len(table):
+                yield table
+
+    @staticmethod
+    def _tokenize(header: List[str], block: str) -> List[list]:
+        """Splits a block of whitespace delimited lines into token columns"""
+        ncols = len(header)
+        tokens = block.split()
+        nrows = len(_NONBLANK_LINE.findall(block))
+        if nrows * ncols != len(tokens):
+            # corrupted lines, pad or truncate each line to the header width
+            tokens = [
+                x
+                for line in block.split("\n")
+                if line.strip()
+                for x in (line.split() + [""] * ncols)[:ncols]
+            ]
+        # well formed, the flat tokens are sliced into columns in one go
+        return [tokens[i::ncols] for i in range(ncols)]
+
+    @classmethod
+    def _from_block(
+        cls, header: List[str], block: str, start: datetime, end: datetime
+    ) -> "StdmetTable":
+        # only the lines within the window are tokenized
+        block = _slice_window(block, start, end)
+        body = cls._tokenize(header, block)
+        year = np.array(body[0], dtype=int)
+        # archive files sometimes use 95 instead of 1995
+        year = np.where(year < 100, year + 1900, year)
+        month = np.array(body[1], dtype=int)
+        day = np.array(body[2], dtype=int)
+        hour = np.array(body[3], dtype=int)
+        # archival format is hourly
+        if "mm" in header:
+            minute = np.array(body[4], dtype=int)
+        else:
+            minute = np.zeros_like(hour)
+        t = (
+            (year - 1970).astype("datetime64[Y]").astype("datetime64[M]")
+            + (month - 1).astype("timedelta64[M]")
+        ).astype("datetime64[s]")
+        t = (
+            t
+            + (day - 1).astype("timedelta64[D]")
+            + hour.astype("timedelta64[h]")
+            + minute.astype("timedelta64[m]")
+        )
+        rows = _window(t, start, end)
+        if rows.all():
+            columns = {key: np.array(x, dtype=object) for key, x in zip(header, body)}
+            return cls(t, columns)
+        # only rows within the window are materialized
+        idx = np.flatnonzero(rows)
+        columns = {
+            key: np.array([x[i] for i in idx], dtype=object)
+            for key, x in zip(header, body)
+        }
+        return cls(t[idx], columns)
+
+    @classmethod
+    def concat(cls, tables: List["StdmetTable"]) -> "StdmetTable":
+        """Stacks tables, padding columns a table doesn't have with ''"""
+        tables = [x for x in tables if len(x)]
+        if not tables:
+            return cls.empty()
+        if len(tables) == 1:
+            return tables[0]
+        keys = []
+        for table in tables:
+            keys += [x for x in table.columns if x not in keys]
+        columns = {
+            key: np.concatenate(
+                [
+                    x.columns[key] if key in x else np.full(len(x), "", dtype=object)
+                    for x in tables
+                ]
+            )
+            for key in keys
+        }
+        return cls(np.concatenate([x.t for x in tables]), columns)
+
+    def between(self, start: datetime, end: datetime) -> "StdmetTable":
+        """Rows from the day of start through the day of end"""
+        return self.take(_window(self.t, start, end))
+
+    def take(self, rows: np.ndarray) -> "StdmetTable":
+        """Rows selected by a boolean mask or index array"""
+        return StdmetTable(
+            self.t[rows], {key: x[rows] for key, x in self.columns.items()}
+        )
+
+    def raw(self, keys: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Raw tokens of the first present column variant per row
+
+        Because of changes in the source api column names over the years,
+        a value is looked up in each of the variants; later variants win.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: tokens and a mask of rows where
+                any of the variants was present
+        """
+        out = np.full(len(self), "", dtype=object)
+        for key in keys:
+            if key in self.columns:
+                column = self.columns[key]
+                out = np.where(column != "", column, out)
+        return out, out != ""
+
+    def values(self, keys: List[str]) -> np.ndarray:
+        """Column as float64, with 'MM' and missing value placeholders as NaN"""
+        out = np.full(len(self), np.nan)
+        for key in keys:
+            if key not in self.columns:
+                continue
+            column = self.columns[key]
+            valid = (column != "") & (column != "MM")
+            parsed = np.full(len(self), np.nan)
+            parsed[valid] = column[valid].astype(float)
+            if key in MISSING_VALUES:
+                parsed[parsed == MISSING_VALUES[key]] = np.nan
+            out = np.where(valid, parsed, out)
+        return out
+
+    def timestamps(self) -> List[str]:
+        """Timestamps as isoformat strings with ' ' as separator"""
+        return [
+            x.replace("T", " ")
+            for x in np.datetime_as_string(self.t, unit="s").tolist()
+        ]
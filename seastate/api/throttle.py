@@ -0,0 +1,160 @@
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from seastate.settings import (
+    RATE_LIMITS,
+    RETRY_ATTEMPTS,
+    RETRY_BACKOFF,
+    RETRY_MAX_DELAY,
+    RETRY_STATUSES,
+)
+
+
+class TokenBucket:
+    """Limits requests to a sustained rate, allowing bursts
+
+    The bucket holds up to burst tokens and refills at rate tokens per
+    second, each request takes a token and waits for one when empty.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Takes a token, waiting for one when needed
+
+        Returns:
+            float: seconds waited
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            # tokens go negative to queue waiters in arrival order
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+@lru_cache(maxsize=None)
+def bucket_for(hostname: str) -> Optional[TokenBucket]:
+    """Token bucket of a hostname shared by every adapter, None when unlimited"""
+    limit = RATE_LIMITS.get(hostname)
+    if limit is None:
+        return None
+    return TokenBucket(limit["rate"], limit["burst"])
+
+
+class Backoff:
+    """Retry schedule of throttled or failed requests
+
+    Waits the Retry-After of a response when given, else full jitter
+    exponential backoff: a random delay up to backoff * 2 ** attempt,
+    capped at max_delay.
+    """
+
+    def __init__(
+        self,
+        attempts: int = RETRY_ATTEMPTS,
+        backoff: float = RETRY_BACKOFF,
+        max_delay: float = RETRY_MAX_DELAY,
+        statuses: tuple = RETRY_STATUSES,
+    ):
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_delay = max_delay
+        self.statuses = statuses
+
+    def retry_after(self, response: requests.Response) -> Optional[float]:
+        """Seconds asked by a Retry-After header, in seconds or as a date"""
+        value = response.headers.get("Retry-After")
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            date = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max(0.0, (date - datetime.now(timezone.utc)).total_seconds())
+
+    def delay(
+        self, attempt: int, response: Optional[requests.Response] = None
+    ) -> Optional[float]:
+        """Seconds to wait before retrying attempt (0 based), None to give up"""
+        if attempt >= self.attempts:
+            return None
+        if response is not None:
+            retry_after = self.retry_after(response)
+            if retry_after is not None:
+                return retry_after if retry_after <= self.max_delay else None
+        return random.uniform(0, min(self.max_delay, self.backoff * 2**attempt))
+
+
+class ThrottledHTTPAdapter(HTTPAdapter):
+    """Transport adapter rate limiting and retrying requests to one host
+
+    GET requests answered with a RETRY_STATUSES status or timing out are
+    retried on the Backoff schedule, other connection errors are raised
+    right away. Mounted on the cached session, so responses served from
+    cache never take a token or retry.
+    """
+
+    def __init__(
+        self,
+        bucket: Optional[TokenBucket] = None,
+        backoff: Optional[Backoff] = None,
+        logger: logging.Logger = None,
+        **kwargs,
+    ):
+        self._logger = logger or logging.getLogger(__name__)
+        self.bucket = bucket
+        self.backoff = backoff or Backoff()
+        super().__init__(**kwargs)
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        retryable = request.method in ("GET", "HEAD")
+        attempt = 0
+        while True:
+            if self.bucket is not None:
+                self.bucket.acquire()
+            try:
+                response = super().send(request, **kwargs)
+            except requests.Timeout as e:
+                delay = self.backoff.delay(attempt) if retryable else None
+                if delay is None:
+                    raise
+                reason = str(e)
+            else:
+                if not retryable or response.status_code not in self.backoff.statuses:
+                    return response
+                delay = self.backoff.delay(attempt, response)
+                if delay is None:
+                    return response
+                reason = f"status_code={response.status_code}"
+                response.close()
+            self._logger.warning(
+                f"retrying {request.url} in {delay:.2f}s, attempt {attempt + 1}: "
+                f"{reason}"
+            )
+            time.sleep(delay)
+            attempt += 1
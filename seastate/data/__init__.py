@@ -1,38 +1,106 @@
 import glob
 import os
-from typing import List
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
 
-from seastate.data.parsers import StationParser
+from seastate.data.catalog import StationCatalog
+from seastate.data.grid import StationGrid
+from seastate.data.index import StationIndex
 from seastate.models import Station
 from seastate.settings import DATASOURCES
 from functools import lru_cache
 
+if TYPE_CHECKING:
+    from seastate.data.parsers import CatalogDiff
+
+# json of every datasource, written by save_stations()
+DATA_DIR = os.path.dirname(__file__)
+# precompiled catalog of every datasource, written by save_stations()
+CATALOG_FILE = os.path.join(DATA_DIR, "stations.npy")
+# candidate stations per grid cell of that catalog, written by save_stations()
+GRID_FILE = os.path.join(DATA_DIR, "station_grid.npz")
+
+
+def save_stations(datasources: Iterable[str] = DATASOURCES) -> Dict[str, "CatalogDiff"]:
+    """Calls implemented parsers concurrently and diffs them against the json
+    of the previous build, only rewriting datasources whose stations changed,
+    then recompiles the binary catalog and its lookup grid if anything changed
+
+    Datasources whose parser fails keep their previous stations.
+
+    Returns:
+        Dict[str, CatalogDiff]: added, removed and changed stations per
+            datasource that changed
+    """
+    # parsers pull in the api clients, only needed when rebuilding
+    from seastate.data.parsers import CatalogDiff, StationParser
 
-def save_stations() -> None:
-    """Calls implemented parsers and writes result to json"""
     parser = StationParser()
-    basedir = os.path.dirname(__file__)
 
-    for datasource in DATASOURCES:
-        with open(os.path.join(basedir, f"{datasource}.json"), "w") as outfile:
-            stations = getattr(parser, datasource)()
-            data = parser.to_jsons(stations)
-            outfile.write(data)
+    diffs = {}
+    for datasource, stations in parser.parse_all(datasources).items():
+        path = os.path.join(DATA_DIR, f"{datasource}.json")
+        previous = []
+        if os.path.exists(path):
+            with open(path, "r") as content:
+                previous = parser.from_jsons(content.read())
+        diff = CatalogDiff.between(previous, stations)
+        if not diff:
+            continue
+        diffs[datasource] = diff
+        with open(path, "w") as outfile:
+            outfile.write(parser.to_jsons(stations))
 
+    if diffs or not os.path.exists(CATALOG_FILE) or not os.path.exists(GRID_FILE):
+        catalog = StationCatalog.from_stations(load_json_stations())
+        catalog.save(CATALOG_FILE)
+        StationGrid.build(catalog).save(GRID_FILE)
+    return diffs
 
-@lru_cache(maxsize=None)
-def load_stations() -> List[Station]:
+
+def load_json_stations() -> List[Station]:
     """for all *.json in this directory, load into list of Station objects"""
+    from seastate.data.parsers import StationParser
+
     data = []
-    for file in glob.glob(os.path.join(os.path.dirname(__file__), "*.json")):
+    for file in sorted(glob.glob(os.path.join(DATA_DIR, "*.json"))):
         with open(file, "r") as content:
             data += StationParser.from_jsons(content.read())
     return data
 
 
+@lru_cache(maxsize=None)
+def load_stations() -> StationCatalog:
+    """Loads the binary catalog, memory-mapped, Station objects are built on access
+
+    Falls back to the json files when the catalog hasn't been compiled.
+    """
+    if os.path.exists(CATALOG_FILE):
+        return StationCatalog.load(CATALOG_FILE)
+    return StationCatalog.from_stations(load_json_stations())
+
+
+def load_station_grid() -> Optional[StationGrid]:
+    """Loads the lookup grid, None when it hasn't been compiled"""
+    if os.path.exists(GRID_FILE):
+        return StationGrid.load(GRID_FILE)
+    return None
+
+
+@lru_cache(maxsize=None)
+def load_station_index() -> StationIndex:
+    """Builds the spatial index over load_stations() once per process,
+    with the lookup grid when it matches the catalog"""
+    return StationIndex(load_stations(), load_station_grid())
+
+
 if __name__ == "__main__":
     # write stations when called from CLI
-    save_stations()
+    for datasource, diff in save_stations().items():
+        print(
+            f"{datasource}: {len(diff.added)} added, {len(diff.removed)} removed, "
+            f"{len(diff.changed)} changed"
+        )
 else:
     # load stations when imported
     STATIONS = load_stations()
+    STATION_INDEX = load_station_index()
@@ -0,0 +1,146 @@
+import os
+from typing import Iterator, List, Optional, Union
+
+import numpy as np
+
+from seastate.models import Station, capability_bits
+from seastate.settings import DATASOURCES
+
+
+def names_path(path: str) -> str:
+    """Path of the station names saved next to the catalog at path"""
+    return f"{os.path.splitext(str(path))[0]}_names.npz"
+
+
+class StationCatalog:
+    """Station metadata packed in a NumPy structured array
+
+    Columns are id, lat, lon, api as an index into DATASOURCES and a
+    capabilities bitmask with one bit per measurement, see
+    settings.CAPABILITIES. The array is saved as a .npy file which loads
+    memory-mapped, so worker processes share its pages and nothing is parsed
+    at import. Station objects are only built when an entry is accessed,
+    once per entry.
+
+    Names are only needed to build Station objects and are kept out of the
+    array, saved next to it as utf-8 bytes with offsets, and read on first use.
+    """
+
+    def __init__(self, records: np.ndarray, names: Union[List[str], str] = None):
+        """Constructor for StationCatalog
+
+        Args:
+            records (np.ndarray): structured array, see from_stations
+            names (Union[List[str], str], optional): name per entry, or the
+                path of a names file written by save, read on first use.
+        """
+        self.records = records
+        self._names = names
+        self._stations = [None] * len(records)
+
+    @classmethod
+    def from_stations(cls, stations: List[Station]) -> "StationCatalog":
+        """Packs Station objects, ids are sized to the longest value"""
+        ids = [x.id for x in stations]
+        dtype = [
+            ("id", f"U{max([len(x) for x in ids] + [1])}"),
+            ("lat", "f8"),
+            ("lon", "f8"),
+            ("api", "u1"),
+            ("capabilities", "u2"),
+        ]
+        records = np.empty(len(stations), dtype=dtype)
+        records["id"] = ids
+        records["lat"] = [x.lat for x in stations]
+        records["lon"] = [x.lon for x in stations]
+        records["api"] = [DATASOURCES.index(x.api) for x in stations]
+        records["capabilities"] = [x.capabilities for x in stations]
+        catalog = cls(records, [x.name or "" for x in stations])
+        catalog._stations = list(stations)
+        return catalog
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "StationCatalog":
+        """Loads a catalog written by save, memory-mapped read-only by default"""
+        return cls(np.load(path, mmap_mode="r" if mmap else None), names_path(path))
+
+    def save(self, path: str) -> None:
+        np.save(path, np.asarray(self.records))
+        encoded = [x.encode("utf-8") for x in self.names]
+        np.savez_compressed(
+            names_path(path),
+            data=np.frombuffer(b"".join(encoded), dtype=np.uint8),
+            offsets=np.cumsum([0] + [len(x) for x in encoded]).astype(np.int32),
+        )
+
+    @property
+    def names(self) -> List[str]:
+        """Station names in catalog order, "" when unnamed"""
+        if isinstance(self._names, list):
+            return self._names
+        names = [""] * len(self)
+        if self._names is not None and os.path.exists(self._names):
+            with np.load(self._names) as content:
+                data, offsets = content["data"].tobytes(), content["offsets"]
+            names = [
+                data[slice(offsets[i], offsets[i + 1])].decode("utf-8")
+                for i in range(len(self))
+            ]
+        self._names = names
+        return names
+
+    def name(self, i: int) -> Optional[str]:
+        return self.names[i] or None
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self.records["id"]
+
+    @property
+    def lat(self) -> np.ndarray:
+        return self.records["lat"]
+
+    @property
+    def lon(self) -> np.ndarray:
+        return self.records["lon"]
+
+    @property
+    def capabilities(self) -> np.ndarray:
+        return self.records["capabilities"]
+
+    @property
+    def is_active(self) -> np.ndarray:
+        """Stations are active when they support any measurement"""
+        return self.capabilities != 0
+
+    def supports(self, measurement: str) -> np.ndarray:
+        """Boolean mask of stations supporting measurement, as is_supported"""
+        return (self.capabilities & capability_bits(measurement)) != 0
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __getitem__(self, i: int) -> Union[Station, List[Station]]:
+        if isinstance(i, slice):
+            return [self[x] for x in range(*i.indices(len(self)))]
+        station = self._stations[i]
+        if station is None:
+            station = self._stations[i] = self._materialize(
+                self.records[i], self.name(i)
+            )
+        return station
+
+    def __iter__(self) -> Iterator[Station]:
+        for i in range(len(self)):
+            yield self[i]
+
+    @staticmethod
+    def _materialize(record: np.void, name: Optional[str]) -> Station:
+        return Station(
+            id=str(record["id"]),
+            lat=float(record["lat"]),
+            lon=float(record["lon"]),
+            api=DATASOURCES[int(record["api"])],
+            name=name,
+            capabilities=int(record["capabilities"]),
+        )
@@ -0,0 +1,150 @@
+import zlib
+from typing import Dict, Optional
+
+import numpy as np
+
+from seastate.data.catalog import StationCatalog
+from seastate.settings import (
+    FALLBACK_STATIONS,
+    GRID_MAX_CANDIDATES,
+    GRID_RESOLUTION,
+    MEASUREMENTS,
+)
+from seastate.utils import distance_blocks, haversine_array
+
+
+def catalog_fingerprint(catalog: StationCatalog) -> int:
+    """Checksum of the station ids in catalog order"""
+    return zlib.crc32("\n".join(catalog.ids.tolist()).encode("utf-8"))
+
+
+class StationGrid:
+    """Candidate stations per cell of a lat/lon grid, one grid per measurement
+
+    A cell lists every active station supporting the measurement that can
+    be among the k nearest stations of any point within the cell: those
+    within d + 2r of the cell center, where d is the distance from the center
+    to its k-th nearest station and r bounds the distance from the center to
+    the cell's edge. A lookup then only measures a cell's few candidates.
+
+    Cells whose candidates exceed max_candidates, far from any station, list
+    none and lookups fall back to a scan of the full index.
+
+    Cells sharing the same candidates share one list, stored in CSR layout:
+    per measurement, "{m}_cells" maps each cell to a list, and list i holds
+    the catalog positions "{m}_positions"[offsets[i]:offsets[i + 1]].
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.arrays = arrays
+        self.resolution = float(arrays["resolution"])
+        self.k = int(arrays["k"])
+        self.fingerprint = int(arrays["fingerprint"])
+        self._rows = int(round(180 / self.resolution))
+        self._cols = int(round(360 / self.resolution))
+        self._cache = {}
+
+    @staticmethod
+    def _cell_centers(resolution: float):
+        rows, cols = int(round(180 / resolution)), int(round(360 / resolution))
+        lat = -90 + (np.arange(rows) + 0.5) * resolution
+        lon = -180 + (np.arange(cols) + 0.5) * resolution
+        lat, lon = np.meshgrid(lat, lon, indexing="ij")
+        return lat.ravel(), lon.ravel()
+
+    @classmethod
+    def build(
+        cls,
+        catalog: StationCatalog,
+        resolution: float = GRID_RESOLUTION,
+        k: int = FALLBACK_STATIONS,
+        max_candidates: int = GRID_MAX_CANDIDATES,
+    ) -> "StationGrid":
+        """Computes the candidates of every cell
+
+        Args:
+            catalog (StationCatalog): stations, positions refer to its order
+            resolution (float, optional): cell size in degrees, dividing 180.
+            k (int, optional): lookups of up to k nearest stations are exact.
+            max_candidates (int, optional): larger cells fall back to a scan.
+        """
+        lat, lon = cls._cell_centers(resolution)
+        # farthest corner or edge midpoint of each cell, 1% margin
+        half = resolution / 2
+        r = 1.01 * np.max(
+            [
+                haversine_array(lat, lon, lat + dy, lon + dx)
+                for dy in (-half, 0, half)
+                for dx in (-half, 0, half)
+            ],
+            axis=0,
+        )
+        arrays = {
+            "resolution": np.array(resolution),
+            "k": np.array(k),
+            "fingerprint": np.array(catalog_fingerprint(catalog)),
+        }
+        for measurement in MEASUREMENTS:
+            mask = catalog.is_active & catalog.supports(measurement)
+            positions = np.flatnonzero(mask)
+            # the empty list, a scan of the full index
+            lists = {(): 0}
+            cells = np.zeros(len(lat), dtype=np.int64)
+            if len(positions):
+                blocks = distance_blocks(
+                    lat, lon, catalog.lat[mask], catalog.lon[mask], block_size=4096
+                )
+                for block, dist in blocks:
+                    kth = min(k, dist.shape[1]) - 1
+                    bound = np.partition(dist, kth, axis=1)[:, kth] + 2 * r[block]
+                    within = dist <= bound[:, None]
+                    for i, row in enumerate(within, start=block.start):
+                        found = positions[row]
+                        key = tuple(found) if len(found) <= max_candidates else ()
+                        cells[i] = lists.setdefault(key, len(lists))
+            offsets = np.cumsum([0] + [len(x) for x in lists])
+            flat = np.fromiter(
+                (x for y in lists for x in y), dtype=np.int64, count=offsets[-1]
+            )
+            arrays[f"{measurement}_cells"] = cells.astype(
+                np.min_scalar_type(len(lists))
+            )
+            arrays[f"{measurement}_offsets"] = offsets.astype(np.int32)
+            arrays[f"{measurement}_positions"] = flat.astype(
+                np.min_scalar_type(max(len(catalog) - 1, 0))
+            )
+        return cls(arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "StationGrid":
+        """Loads a grid written by save, arrays are read on first use"""
+        return cls(np.load(path))
+
+    def save(self, path: str) -> None:
+        np.savez_compressed(path, **{x: self.arrays[x] for x in self.arrays})
+
+    def matches(self, catalog: StationCatalog) -> bool:
+        """Whether the grid was built on this catalog"""
+        return self.fingerprint == catalog_fingerprint(catalog)
+
+    def _measurement(self, measurement: str):
+        if measurement not in self._cache:
+            if f"{measurement}_cells" not in self.arrays:
+                return None
+            self._cache[measurement] = tuple(
+                np.asarray(self.arrays[f"{measurement}_{x}"]).tolist()
+                for x in ("cells", "offsets", "positions")
+            )
+        return self._cache[measurement]
+
+    def candidates(self, lat: float, lon: float, measurement: str) -> Optional[list]:
+        """Catalog positions of the candidates of the cell holding lat/lon,
+        in catalog order, None when the cell requires a full scan"""
+        arrays = self._measurement(measurement)
+        if arrays is None:
+            return None
+        cells, offsets, positions = arrays
+        row = min(int((lat + 90) / self.resolution), self._rows - 1)
+        col = min(int((lon + 180) / self.resolution), self._cols - 1)
+        i = cells[row * self._cols + col]
+        return positions[slice(offsets[i], offsets[i + 1])] or None
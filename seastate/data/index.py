@@ -0,0 +1,321 @@
+import math
+from typing import Iterable, List, Tuple, Union
+
+import numpy as np
+
+from seastate.data.catalog import StationCatalog
+from seastate.data.grid import StationGrid
+from seastate.exceptions import SeaStateException
+from seastate.models import Station
+from seastate.settings import MEASUREMENTS
+from seastate.utils import (
+    EARTH_RADIUS,
+    haversine,
+    haversine_radians,
+    nearest_targets,
+)
+
+
+class StationIndex:
+    """Packed station coordinates for vectorized nearest-station lookups
+
+    Coordinates are read from the catalog columns into radian arrays, and each
+    measurement gets a boolean mask of the stations that are active and
+    support it, so no Station object is built to answer a lookup. A lookup is
+    then a single vectorized haversine pass over the masked stations, or only
+    over the candidates of the lookup's cell when a StationGrid is given.
+    """
+
+    def __init__(
+        self,
+        stations: Union[StationCatalog, List[Station]],
+        grid: StationGrid = None,
+    ):
+        if not isinstance(stations, StationCatalog):
+            stations = StationCatalog.from_stations(stations)
+        self.stations = stations
+        # precomputed candidates per cell, ignored when built on other stations
+        self.grid = grid if grid is not None and grid.matches(stations) else None
+        if self.grid is not None:
+            self._id_list = stations.ids.tolist()
+            self._lat_list = stations.lat.tolist()
+            self._lon_list = stations.lon.tolist()
+        self.ids = stations.ids
+        self.lat = np.radians(stations.lat)
+        self.lon = np.radians(stations.lon)
+        self._cos_lat = np.cos(self.lat)
+        # stations sorted by latitude, range queries start with a binary search
+        self._lat_order = np.argsort(self.lat, kind="stable")
+        self._sorted_lat = self.lat[self._lat_order]
+        self._active = stations.is_active
+        self._masks = {}
+        for measurement in MEASUREMENTS:
+            self._measurement_mask(measurement)
+
+    def __len__(self) -> int:
+        return len(self.stations)
+
+    def _measurement_mask(self, measurement: str) -> np.ndarray:
+        """Boolean mask of active stations supporting measurement, built once"""
+        if measurement not in self._masks:
+            supported = self.stations.supports(measurement)
+            self._masks[measurement] = self._active & supported
+        return self._masks[measurement]
+
+    def _candidate_mask(self, measurement: str, exclude: Iterable[str]) -> np.ndarray:
+        mask = self._measurement_mask(measurement)
+        exclude = list(exclude or [])
+        if exclude:
+            mask = mask & ~np.isin(self.ids, exclude)
+        return mask
+
+    def _grid_ranked(
+        self, lat: float, lon: float, measurement: str, exclude: Iterable[str], k: int
+    ) -> Union[List[Tuple[float, int]], None]:
+        """Distances and catalog positions of the grid cell's candidates for a
+        k nearest lookup, closest first and catalog order on ties, None when
+        the full index has to be scanned"""
+        if self.grid is None or k > self.grid.k:
+            return None
+        positions = self.grid.candidates(lat, lon, measurement)
+        if positions is None:
+            return None
+        if exclude:
+            # candidates only hold the k nearest of the unexcluded stations
+            exclude = set(exclude)
+            if any(self._id_list[x] in exclude for x in positions):
+                return None
+        # a cell has a few candidates, measured on the scalar path
+        return sorted(
+            (haversine(lat, lon, self._lat_list[x], self._lon_list[x]), x)
+            for x in positions
+        )
+
+    def _query_mask(
+        self, measurement: Union[str, None], exclude: Iterable[str]
+    ) -> np.ndarray:
+        """Active stations supporting measurement, any measurement when None"""
+        if measurement is not None:
+            return self._candidate_mask(measurement, exclude)
+        mask = self._active
+        exclude = list(exclude or [])
+        if exclude:
+            mask = mask & ~np.isin(self.ids, exclude)
+        return mask
+
+    def distances(
+        self, lat: float, lon: float, mask: Union[np.ndarray, None] = None
+    ) -> np.ndarray:
+        """Returns haversine distance in km from lat/lon to indexed stations
+
+        Args:
+            lat (float): Coordinate in decimal degrees
+            lon (float): Coordinate in decimal degrees
+            mask (np.ndarray, optional): restricts result to masked stations,
+                a boolean mask or catalog positions.
+
+        Returns:
+            np.ndarray: distances in km, aligned with the (masked) stations
+        """
+        lat2, lon2, cos_lat2 = self.lat, self.lon, self._cos_lat
+        if mask is not None:
+            lat2, lon2, cos_lat2 = lat2[mask], lon2[mask], cos_lat2[mask]
+        return haversine_radians(
+            math.radians(lat), math.radians(lon), lat2, lon2, cos_lat2=cos_lat2
+        )
+
+    def nearest(
+        self, lat: float, lon: float, measurement: str, exclude: Iterable[str] = ()
+    ) -> Tuple[Union[Station, None], float]:
+        """Find the closest active station supporting measurement
+
+        Args:
+            lat (float): Coordinate in decimal degrees
+            lon (float): Coordinate in decimal degrees
+            measurement (str): measurement the station must support
+            exclude (Iterable[str], optional): station ids to skip.
+
+        Returns:
+            Tuple[Station, float]: station and its distance in km,
+                (None, inf) if no station qualifies
+        """
+        ranked = self._grid_ranked(lat, lon, measurement, exclude, 1)
+        if ranked is not None:
+            dist, position = ranked[0]
+            return self.stations[position], dist
+        mask = self._candidate_mask(measurement, exclude)
+        candidates = np.flatnonzero(mask)
+        if len(candidates) == 0:
+            return None, float("inf")
+        dist = self.distances(lat, lon, mask)
+        # argmin keeps the first minimum, matching catalog order on ties
+        i = int(np.argmin(dist))
+        return self.stations[candidates[i]], float(dist[i])
+
+    def nearest_k(
+        self,
+        lat: float,
+        lon: float,
+        measurement: str,
+        k: int,
+        max_distance: float = None,
+        exclude: Iterable[str] = (),
+    ) -> List[Tuple[Station, float]]:
+        """Find the k closest active stations supporting measurement
+
+        Args:
+            lat (float): Coordinate in decimal degrees
+            lon (float): Coordinate in decimal degrees
+            measurement (str): measurement the stations must support
+            k (int): number of stations, at most
+            max_distance (float, optional): km, farther stations are skipped.
+            exclude (Iterable[str], optional): station ids to skip.
+
+        Returns:
+            List[Tuple[Station, float]]: stations and their distance in km,
+                closest first, catalog order on ties
+        """
+        ranked = self._grid_ranked(lat, lon, measurement, exclude, k)
+        if ranked is not None:
+            if max_distance is not None:
+                ranked = [x for x in ranked if x[0] <= max_distance]
+            return [(self.stations[x], dist) for dist, x in ranked[: max(int(k), 0)]]
+        mask = self._candidate_mask(measurement, exclude)
+        candidates = np.flatnonzero(mask)
+        dist = self.distances(lat, lon, mask)
+        if max_distance is not None:
+            within = dist <= max_distance
+            candidates, dist = candidates[within], dist[within]
+        k = min(int(k), len(candidates))
+        if k <= 0:
+            return []
+        if k < len(candidates):
+            # partial selection, only the k closest are sorted
+            closest = np.argpartition(dist, k - 1)[:k]
+            # ties at the k-th distance are resolved in catalog order
+            kth = dist[closest].max()
+            closest = np.flatnonzero(dist <= kth)
+        else:
+            closest = np.arange(len(candidates))
+        ranked = closest[np.lexsort((candidates[closest], dist[closest]))][:k]
+        return [(self.stations[candidates[i]], float(dist[i])) for i in ranked]
+
+    def _latitude_band(self, south: float, north: float) -> np.ndarray:
+        """Catalog positions of stations from south to north, in radians"""
+        first = np.searchsorted(self._sorted_lat, south, side="left")
+        last = np.searchsorted(self._sorted_lat, north, side="right")
+        return self._lat_order[first:last]
+
+    def _ranked(
+        self, lat: float, lon: float, positions: np.ndarray
+    ) -> List[Tuple[Station, float]]:
+        dist = self.distances(lat, lon, positions)
+        ranked = np.lexsort((positions, dist))
+        return [(self.stations[positions[i]], float(dist[i])) for i in ranked]
+
+    def within(
+        self,
+        lat: float,
+        lon: float,
+        radius: float,
+        measurement: str = None,
+        exclude: Iterable[str] = (),
+    ) -> List[Tuple[Station, float]]:
+        """Find the active stations within radius of a coordinate
+
+        Only stations in the latitude band of the radius, found by binary
+        search, are measured.
+
+        Args:
+            lat (float): Coordinate in decimal degrees
+            lon (float): Coordinate in decimal degrees
+            radius (float): km
+            measurement (str, optional): measurement the stations must support.
+                Defaults to any.
+            exclude (Iterable[str], optional): station ids to skip.
+
+        Returns:
+            List[Tuple[Station, float]]: stations and their distance in km,
+                closest first
+        """
+        if radius < 0:
+            raise SeaStateException("Radius must not be negative")
+        band = radius / EARTH_RADIUS
+        positions = self._latitude_band(np.radians(lat) - band, np.radians(lat) + band)
+        positions = positions[self._query_mask(measurement, exclude)[positions]]
+        positions = positions[self.distances(lat, lon, positions) <= radius]
+        return self._ranked(lat, lon, positions)
+
+    def in_bbox(
+        self,
+        south: float,
+        west: float,
+        north: float,
+        east: float,
+        measurement: str = None,
+        exclude: Iterable[str] = (),
+    ) -> List[Tuple[Station, float]]:
+        """Find the active stations within a bounding box
+
+        Boxes with west > east cross the antimeridian.
+
+        Args:
+            south (float): Latitude in decimal degrees
+            west (float): Longitude in decimal degrees
+            north (float): Latitude in decimal degrees
+            east (float): Longitude in decimal degrees
+            measurement (str, optional): measurement the stations must support.
+                Defaults to any.
+            exclude (Iterable[str], optional): station ids to skip.
+
+        Returns:
+            List[Tuple[Station, float]]: stations and their distance in km
+                from the center of the box, closest first
+        """
+        if south > north:
+            raise SeaStateException("South must not be north of north")
+        positions = self._latitude_band(np.radians(south), np.radians(north))
+        positions = positions[self._query_mask(measurement, exclude)[positions]]
+        lon = self.stations.lon[positions]
+        if west <= east:
+            positions = positions[(lon >= west) & (lon <= east)]
+            center = (west + east) / 2
+        else:
+            positions = positions[(lon >= west) | (lon <= east)]
+            center = (west + east + 360) / 2
+            center = center - 360 if center > 180 else center
+        return self._ranked((south + north) / 2, center, positions)
+
+    def nearest_many(
+        self,
+        lats: np.ndarray,
+        lons: np.ndarray,
+        measurement: str,
+        exclude: Iterable[str] = (),
+        block_size: int = 1024,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Nearest active station supporting measurement for many coordinates
+
+        Args:
+            lats (np.ndarray): Coordinates in decimal degrees
+            lons (np.ndarray): Coordinates in decimal degrees
+            measurement (str): measurement the stations must support
+            exclude (Iterable[str], optional): station ids to skip.
+            block_size (int, optional): coordinates per distance matrix block,
+                bounds memory to block_size x stations.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: catalog positions of the stations,
+                -1 where no station qualifies, and distances in km
+        """
+        positions = np.full(np.size(lats), -1, dtype=int)
+        distances = np.full(np.size(lats), np.inf)
+        mask = self._candidate_mask(measurement, exclude)
+        candidates = np.flatnonzero(mask)
+        if len(candidates) == 0:
+            return positions, distances
+        nearest, distances = nearest_targets(
+            lats, lons, self.stations.lat[mask], self.stations.lon[mask], block_size
+        )
+        positions = candidates[nearest]
+        return positions, distances
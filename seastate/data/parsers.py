@@ -1,15 +1,50 @@
+import io
 import json
 import logging
-from dataclasses import asdict
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
 
-import defusedxml.minidom
+import defusedxml.ElementTree
 
 from seastate.api.noaa_ndbc import NdbcApi
 from seastate.api.noaa_tidesandcurrents import TidesAndCurrentsApi
 from seastate.api.rest_adapter import RestAdapter
 from seastate.exceptions import SeaStateException
 from seastate.models import Station
+from seastate.settings import DATASOURCES
+
+
+@dataclass
+class CatalogDiff:
+    """Stations of a datasource added, removed or changed since the last build"""
+
+    added: List[Station] = field(default_factory=list)
+    removed: List[Station] = field(default_factory=list)
+    changed: List[Station] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+    @classmethod
+    def between(
+        cls, previous: Iterable[Station], current: Iterable[Station]
+    ) -> "CatalogDiff":
+        """Compares stations by id, changed holds the current version"""
+        previous = {x.id: x for x in previous}
+        current = {x.id: x for x in current}
+        return cls(
+            added=[x for k, x in current.items() if k not in previous],
+            removed=[x for k, x in previous.items() if k not in current],
+            changed=[
+                x for k, x in current.items() if k in previous and x != previous[k]
+            ],
+        )
+
+
+def _local_name(tag: str) -> str:
+    """Tag without its {namespace}"""
+    return tag.rsplit("}", 1)[-1]
 
 
 class StationParser:
@@ -24,31 +59,24 @@ class StationParser:
     @staticmethod
     def to_jsons(stations: List[Station]) -> str:
         """Parses a list of Station object into a json str"""
-        return json.dumps([asdict(x) for x in stations])
+        return json.dumps([x.to_dict() for x in stations])
 
     def noaa_ndbc(self) -> List[Station]:
         """
         Calls the ndbc endpoint
         summarizes all observations and parses the station metadata
         """
-        # todo: refactor this spaghetti code
         # check station status by retrieving latest measurements from all stations
         result = RestAdapter("www.ndbc.noaa.gov/").get("data/latest_obs/latest_obs.txt")
+        return self.parse_latest_obs(result.data)
 
-        # loop through text lines and test if station is ouputting specified measurement
+    def parse_latest_obs(self, text: str) -> List[Station]:
+        """Stations of latest_obs.txt, flagged by the measurements they report"""
+        api = NdbcApi().id
         stations = []
-        for i, value in enumerate(result.data.split("\n")):
-            # skipping 2 header lines
-            if i == 0 or i == 1:
-                continue  # skip header and unit lines
-
-            # split current line by delimiter and clear empty values
-            line = value.split(" ")
-            while " " in line:
-                line.remove(" ")
-            while "" in line:
-                line.remove("")
-
+        # skipping header and unit lines
+        for value in text.splitlines()[2:]:
+            line = value.split()
             # skip corrupted lines
             if len(line) != 22:
                 self._logger.info(f"No station info in this line: {str(line)}")
@@ -56,23 +84,20 @@ class StationParser:
 
             # parse stationID, gps, and confirm active measurement sources
             # 'MM' is NOAA's notation for missing measurement
-            tmp_station = {
-                "id": line[0],
-                "lat": float(line[1]),
-                "lon": float(line[2]),
-                "api": NdbcApi().id,
-                "tide": True if line[21] != "MM" else False,
-                "wind": True if line[8] != "MM" else False,
-                "water_temp": True if line[18] != "MM" else False,
-                "air_temp": True if line[17] != "MM" else False,
-                "air_press": True if line[15] != "MM" else False,
-                "wave": True if line[11] != "MM" else False,
-            }
-
-            # construct station with temp var
-            stations.append(Station(**tmp_station))
-
-        # return list of stations
+            stations.append(
+                Station(
+                    id=line[0],
+                    lat=float(line[1]),
+                    lon=float(line[2]),
+                    api=api,
+                    tide=line[21] != "MM",
+                    wind=line[8] != "MM",
+                    water_temp=line[18] != "MM",
+                    air_temp=line[17] != "MM",
+                    air_press=line[15] != "MM",
+                    wave=line[11] != "MM",
+                )
+            )
         return stations
 
     def noaa_tidesandcurrents(self) -> List[Station]:
@@ -80,56 +105,37 @@ class StationParser:
         Calls the tnc endpoint
         summarizes all stations and parses their metadata
         """
-        # todo: refactor this spaghetti code
         # TidesAndCurrent station capabilities are kept here
         result = RestAdapter("opendap.co-ops.nos.noaa.gov/").get(
             "stations/stationsXML.jsp"
         )
+        return self.parse_stations_xml(result.data)
 
-        # parse xml elements safely with defusedxml -> []
-        dom = defusedxml.minidom.parseString(result.data)
-        station_elements = dom.getElementsByTagName("station")
+    def parse_stations_xml(self, xml: str) -> List[Station]:
+        """Stations of stationsXML.jsp, flagged by their active parameters
 
-        # traverse station elements to build Station objects
+        The document is streamed with iterparse, each station element is
+        dropped once parsed, so the tree is never held in memory.
+        """
+        api = TidesAndCurrentsApi().id
         stations = []
-        for line in station_elements:
-            tmp_station = {}
-            # parse station metadata into temporary dict
-            try:
-                tmp_station["name"] = line.getAttribute("name")
-                tmp_station["id"] = line.getAttribute("ID")
-                tmp_station["lat"] = float(
-                    line.getElementsByTagName("lat")[0].firstChild.nodeValue
-                )
-                tmp_station["lon"] = float(
-                    line.getElementsByTagName("long")[0].firstChild.nodeValue
-                )
-                tmp_station["api"] = TidesAndCurrentsApi().id
-            except IndexError as e:
-                # Faulty tides and currents station, skip station row
-                self._logger.warn(f"{e}: {str(line)}")
+        root = None
+        # parse xml elements safely with defusedxml
+        events = defusedxml.ElementTree.iterparse(
+            io.StringIO(xml), events=("start", "end")
+        )
+        for event, element in events:
+            if root is None:
+                root = element
+            if event != "end" or _local_name(element.tag) != "station":
                 continue
-
-            # separate loop to parse individual measurements
-            for m in line.getElementsByTagName("parameter"):
-                name = m.attributes["name"].value
-                status = True if m.attributes["status"].value == "1" else False
-                if "Water Level" in name and status:
-                    tmp_station["tide"] = True
-                elif "Winds" in name and status:
-                    tmp_station["wind"] = True
-                    # todo: wind dir and gust may or may not be true
-                elif "Air Temp" in name and status:
-                    tmp_station["air_temp"] = True
-                elif "Water Temp" in name and status:
-                    tmp_station["water_temp"] = True
-                elif "Air Pressure" in name and status:
-                    tmp_station["air_press"] = True
-                elif "Conductivity" in name and status:
-                    tmp_station["conductivity"] = True
-
-            # construct station with temp var
-            stations.append(Station(**tmp_station))
+            station = self._parse_station_element(element, api)
+            if station is not None:
+                stations.append(station)
+            # parsed stations are released
+            element.clear()
+            if element in root:
+                root.remove(element)
 
         # Check parsing was succesful
         if len(stations) == 0:
@@ -137,3 +143,64 @@ class StationParser:
                 "No stations successfully parsed, please submit issue"
             )
         return stations
+
+    def _parse_station_element(self, element, api: str) -> Optional[Station]:
+        tmp_station = {
+            "name": element.get("name", ""),
+            "id": element.get("ID", ""),
+            "api": api,
+        }
+        # parse station metadata into temporary dict
+        children = {}
+        for child in element.iter():
+            children.setdefault(_local_name(child.tag), []).append(child)
+        try:
+            tmp_station["lat"] = float(children["lat"][0].text)
+            tmp_station["lon"] = float(children["long"][0].text)
+        except (KeyError, TypeError, ValueError) as e:
+            # Faulty tides and currents station, skip station row
+            self._logger.warning(f"{e}: {tmp_station['id']}")
+            return None
+
+        # separate loop to parse individual measurements
+        for m in children.get("parameter", []):
+            name = m.get("name", "")
+            if m.get("status") != "1":
+                continue
+            if "Water Level" in name:
+                tmp_station["tide"] = True
+            elif "Winds" in name:
+                tmp_station["wind"] = True
+                # todo: wind dir and gust may or may not be true
+            elif "Air Temp" in name:
+                tmp_station["air_temp"] = True
+            elif "Water Temp" in name:
+                tmp_station["water_temp"] = True
+            elif "Air Pressure" in name:
+                tmp_station["air_press"] = True
+            elif "Conductivity" in name:
+                tmp_station["conductivity"] = True
+        return Station(**tmp_station)
+
+    def parse_all(
+        self, datasources: Iterable[str] = DATASOURCES
+    ) -> Dict[str, List[Station]]:
+        """Runs the parser of every datasource concurrently
+
+        Returns:
+            Dict[str, List[Station]]: stations per datasource, datasources
+                whose parser raised are left out and logged
+        """
+        datasources = list(datasources)
+        if not datasources:
+            return {}
+        with ThreadPoolExecutor(max_workers=len(datasources)) as executor:
+            futures = {x: executor.submit(getattr(self, x)) for x in datasources}
+            parsed = {}
+            for datasource, future in futures.items():
+                try:
+                    parsed[datasource] = future.result()
+                except Exception as e:
+                    # one failing datasource doesn't sink the others
+                    self._logger.error(f"Failed to parse {datasource}: {e}")
+        return parsed
@@ -1,6 +1,7 @@
 from dataclasses import dataclass, field
+from functools import lru_cache
 from typing import List, Dict
-from seastate.settings import MEASUREMENTS
+from seastate.settings import CAPABILITIES, MEASUREMENTS
 
 
 @dataclass
@@ -21,39 +22,100 @@ class Result:
         self.data = data if data else []  # init data if dne
 
 
-@dataclass
 class Station:
-    id: str
-    lat: float
-    lon: float
-    api: str
-    name: str = None
-    tide: bool = False
-    wind: bool = False
-    water_temp: bool = False
-    air_temp: bool = False
-    air_press: bool = False
-    wave: bool = False
-    conductivity: bool = False
-    is_active: bool = False
-
-    def __post_init__(self):
+    """Station metadata, supported measurements are packed in one bitmask
+
+    Measurement flags are exposed as bool attributes (station.tide, ...)
+    backed by capabilities, see settings.CAPABILITIES, so a support check is
+    a single AND. Slotted to keep thousands of stations small.
+    """
+
+    __slots__ = ("id", "lat", "lon", "api", "name", "capabilities", "is_active")
+
+    def __init__(
+        self,
+        id: str,
+        lat: float,
+        lon: float,
+        api: str,
+        name: str = None,
+        tide: bool = False,
+        wind: bool = False,
+        water_temp: bool = False,
+        air_temp: bool = False,
+        air_press: bool = False,
+        wave: bool = False,
+        conductivity: bool = False,
+        is_active: bool = False,
+        capabilities: int = 0,
+    ):
+        self.id = id
+        self.lat = lat
+        self.lon = lon
+        self.api = api
+        self.name = name
+        flags = (tide, wind, water_temp, air_temp, air_press, wave, conductivity)
+        for key, flag in zip(MEASUREMENTS, flags):
+            if flag:
+                capabilities |= CAPABILITIES[key]
+        self.capabilities = capabilities
         # toggle if self.is_active
-        if len(self.supported_measurements()) > 0:
-            self.is_active = True
+        self.is_active = is_active or capabilities != 0
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Station):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{k}={v!r}" for k, v in self.to_dict().items())
+        return f"Station({fields})"
+
+    def to_dict(self) -> Dict:
+        """Field dict in the json catalog layout"""
+        data = {
+            "id": self.id,
+            "lat": self.lat,
+            "lon": self.lon,
+            "api": self.api,
+            "name": self.name,
+        }
+        for key in MEASUREMENTS:
+            data[key] = getattr(self, key)
+        data["is_active"] = self.is_active
+        return data
 
     def supported_measurements(self) -> tuple[str]:
         """Return list of supported measurements for station"""
-        #
-        supported = []
-        for key in MEASUREMENTS:
-            if self.__getattribute__(key):
-                supported.append(key)
-        return tuple(supported)
+        return tuple(k for k, v in CAPABILITIES.items() if self.capabilities & v)
 
     def is_supported(self, value: str) -> bool:
         # Implemented this to always run comparison on lower case casting of strings
-        for x in self.supported_measurements():
-            if value in x:
-                return True
-        return False
+        return bool(self.capabilities & capability_bits(value))
+
+
+def _capability_flag(bit: int) -> property:
+    def fget(self: Station) -> bool:
+        return bool(self.capabilities & bit)
+
+    def fset(self: Station, value: bool) -> None:
+        if value:
+            self.capabilities |= bit
+        else:
+            self.capabilities &= ~bit
+
+    return property(fget, fset)
+
+
+for _key, _bit in CAPABILITIES.items():
+    setattr(Station, _key, _capability_flag(_bit))
+
+
+@lru_cache(maxsize=None)
+def capability_bits(value: str) -> int:
+    """Capability bits of the measurements matched by value, as is_supported"""
+    bits = 0
+    for key, bit in CAPABILITIES.items():
+        if value in key:
+            bits |= bit
+    return bits
@@ -0,0 +1,215 @@
+import re
+from datetime import datetime, timedelta
+from typing import Dict, Union
+
+import numpy as np
+
+from seastate.exceptions import SeaStateException
+from seastate.settings import AGGREGATIONS, DIRECTION_KEYS, GAPS
+
+_INTERVAL = re.compile(r"^\s*(\d*)\s*(s|min|h|d)\s*$", re.IGNORECASE)
+_UNIT_SECONDS = {"s": 1, "min": 60, "h": 60 * 60, "d": 24 * 60 * 60}
+
+
+def interval_seconds(interval: Union[str, timedelta, np.timedelta64]) -> int:
+    """Bin width in whole seconds
+
+    Args:
+        interval (Union[str, timedelta, np.timedelta64]): e.g. "1h", "10min",
+            "1d" or a timedelta
+
+    Returns:
+        int: seconds, at least 1
+    """
+    if isinstance(interval, str):
+        match = _INTERVAL.match(interval)
+        if match is None:
+            raise SeaStateException(
+                f"Unsupported interval {interval}, use e.g. '10min', '1h' or '1d'"
+            )
+        count, unit = match.groups()
+        seconds = int(count or 1) * _UNIT_SECONDS[unit.lower()]
+    elif isinstance(interval, np.timedelta64):
+        seconds = int(interval / np.timedelta64(1, "s"))
+    else:
+        seconds = int(interval.total_seconds())
+    if seconds < 1:
+        raise SeaStateException(f"Interval {interval} is shorter than a second")
+    return seconds
+
+
+def _aggregations(
+    keys: list, how: Union[str, Dict[str, str], None]
+) -> Dict[str, str]:
+    """Aggregation per value key, direction keys default to vector_mean"""
+    default = {x: "vector_mean" if x in DIRECTION_KEYS else "mean" for x in keys}
+    if isinstance(how, str):
+        chosen = dict.fromkeys(keys, how)
+    else:
+        chosen = dict(default, **{x: y for x, y in (how or {}).items() if x in keys})
+    for key, x in chosen.items():
+        if x not in AGGREGATIONS:
+            raise SeaStateException(
+                f"Unsupported aggregation {x} for {key}, use one of {AGGREGATIONS}"
+            )
+    return chosen
+
+
+def _pick_rows(valid: np.ndarray, starts: np.ndarray, how: str) -> np.ndarray:
+    """Index of the first or last row of each bin holding any valid value,
+    -1 for bins without one, rows are sorted and bins start at starts"""
+    index = np.arange(len(valid))
+    if how == "first":
+        pick = np.minimum.reduceat(np.where(valid, index, len(valid)), starts)
+        return np.where(pick < len(valid), pick, -1)
+    return np.maximum.reduceat(np.where(valid, index, -1), starts)
+
+
+def _reduce(values: np.ndarray, starts: np.ndarray, how: str) -> np.ndarray:
+    """Aggregates sorted values per bin, bins start at starts, NaN are skipped
+
+    Bins without a valid value are NaN. "first" and "last" pick rows across
+    every key instead, see _pick_rows.
+    """
+    valid = ~np.isnan(values)
+    n_valid = np.add.reduceat(valid, starts)
+    if how == "mean":
+        out = np.add.reduceat(np.where(valid, values, 0.0), starts) / np.maximum(
+            n_valid, 1
+        )
+    elif how == "min":
+        out = np.fmin.reduceat(values, starts)
+    elif how == "max":
+        out = np.fmax.reduceat(values, starts)
+    else:
+        # direction in degrees, averaged as unit vectors
+        radians = np.radians(np.where(valid, values, 0.0))
+        sin = np.add.reduceat(np.where(valid, np.sin(radians), 0.0), starts)
+        cos = np.add.reduceat(np.where(valid, np.cos(radians), 0.0), starts)
+        out = np.degrees(np.arctan2(sin, cos)) % 360
+        # tiny negative angles wrap to 360.0
+        out = np.where(out >= 360, out - 360, out)
+    return np.where(n_valid > 0, out, np.nan)
+
+
+def resample(
+    columns: Dict[str, np.ndarray],
+    interval: Union[str, timedelta, np.timedelta64] = "1h",
+    how: Union[str, Dict[str, str], None] = None,
+    gaps: str = "nan",
+    start: datetime = None,
+    end: datetime = None,
+) -> Dict[str, np.ndarray]:
+    """Bins columns to a fixed interval and aggregates each bin
+
+    Bins are aligned to the epoch, so hourly bins start on the hour and
+    daily bins at midnight, and are labelled with their start time.
+    Samples are sorted by time first, NaN values are skipped.
+
+    Args:
+        columns (Dict[str, np.ndarray]): datetime64 "t" and float64 values,
+            as returned with format="columns"
+        interval (Union[str, timedelta, np.timedelta64], optional): bin width,
+            e.g. "10min", "1h", "1d". Defaults to "1h".
+        how (Union[str, Dict[str, str]], optional): one of AGGREGATIONS for
+            every key, or per key. Defaults to "mean", and "vector_mean" for
+            the direction keys in DIRECTION_KEYS. Keys aggregated by "first"
+            or "last" all take their value from the same sample.
+        gaps (str, optional): "nan" emits every bin between the first and
+            last, bins without samples are NaN, "drop" only emits bins with
+            samples. Defaults to "nan".
+        start (datetime, optional): with gaps="nan", first bin emitted,
+            so columns of different sources share the same bins.
+        end (datetime, optional): with gaps="nan", last bin emitted.
+
+    Returns:
+        Dict[str, np.ndarray]: datetime64 "t" of each bin, aggregated values
+            and "n", the count of samples in each bin
+    """
+    if gaps not in GAPS:
+        raise SeaStateException(f"Unsupported gaps {gaps}, use one of {GAPS}")
+    step = interval_seconds(interval)
+    keys = [x for x in columns if x != "t"]
+    how = _aggregations(keys, how)
+
+    seconds = columns["t"].astype("datetime64[s]").astype(np.int64)
+    order = np.argsort(seconds, kind="stable")
+    bins = seconds[order] // step
+    # first sample of every run of equal bins
+    starts = np.flatnonzero(np.diff(bins, prepend=bins[:1] - 1))
+    counts = np.diff(np.append(starts, len(bins)))
+    labels = bins[starts]
+    values = {}
+    if len(bins):
+        sorted_columns = {
+            key: np.asarray(columns[key], dtype=float)[order] for key in keys
+        }
+        # first and last take every key from the same sample, the first or
+        # last of the bin holding any value
+        valid = np.zeros(len(bins), dtype=bool)
+        for x in sorted_columns.values():
+            valid |= ~np.isnan(x)
+        rows = {x: _pick_rows(valid, starts, x) for x in ("first", "last")}
+        for key, x in sorted_columns.items():
+            if how[key] in rows:
+                pick = rows[how[key]]
+                values[key] = np.where(pick >= 0, x[np.maximum(pick, 0)], np.nan)
+            else:
+                values[key] = _reduce(x, starts, how[key])
+    else:
+        values = {key: np.array([], dtype=float) for key in keys}
+
+    if gaps == "nan":
+        first = labels[0] if len(labels) else None
+        last = labels[-1] if len(labels) else None
+        if start is not None:
+            first = np.datetime64(start, "s").astype(np.int64) // step
+        if end is not None:
+            last = np.datetime64(end, "s").astype(np.int64) // step
+        if first is None or last is None:
+            first, last = 0, -1
+        # samples outside of start and end are dropped
+        keep = (labels >= first) & (labels <= last)
+        position = labels[keep] - first
+        full = np.zeros(max(last - first + 1, 0), dtype=np.int64)
+        full[position] = counts[keep]
+        counts = full
+        for key in keys:
+            full = np.full(len(counts), np.nan)
+            full[position] = values[key][keep]
+            values[key] = full
+        labels = np.arange(first, last + 1, dtype=np.int64)
+
+    out = {"t": (labels * step).astype("datetime64[s]")}
+    out.update(values)
+    out["n"] = counts
+    return out
+
+
+def first_rows(t: np.ndarray, interval: Union[str, timedelta] = "1h") -> np.ndarray:
+    """Positions of the earliest sample of each bin, in their original order
+
+    Args:
+        t (np.ndarray): datetime64 sample times, in any order
+        interval (Union[str, timedelta], optional): bin width, see
+            interval_seconds. Defaults to "1h".
+    """
+    seconds = t.astype("datetime64[s]").astype(np.int64)
+    order = np.argsort(seconds, kind="stable")
+    bins = seconds[order] // interval_seconds(interval)
+    starts = np.flatnonzero(np.diff(bins, prepend=bins[:1] - 1))
+    return np.sort(order[starts])
+
+
+def to_records(columns: Dict[str, np.ndarray]) -> list[Dict]:
+    """Columns as records, "t" formatted as "%Y-%m-%d %H:%M:%S", NaN as None"""
+    keys = [x for x in columns if x != "t"]
+    times = np.datetime_as_string(columns["t"], unit="s")
+    records = [{"t": x.replace("T", " ")} for x in times.tolist()]
+    for key in keys:
+        x = columns[key]
+        if x.dtype.kind == "f":
+            x = np.where(np.isnan(x), None, x)
+        for record, value in zip(records, x.tolist()):
+            record[key] = value
+    return records
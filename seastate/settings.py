@@ -15,3 +15,103 @@ DATASOURCES = (
     "noaa_ndbc",
     "noaa_tidesandcurrents",
 )
+
+# output formats
+# records: list of dicts with the raw source values, one dict per sample
+# columns: dict of arrays, datetime64 "t" and float64 values per key
+FORMATS = (
+    "records",
+    "columns",
+)
+
+# concurrent fetching
+# upper bound of simultaneous requests sent to a single hostname by one
+# fetcher; separate fetches (e.g. concurrent SeaState calls) add up
+MAX_IN_FLIGHT_PER_HOST = 4
+
+# http cache, seconds a response stays fresh per endpoint class
+# see api/cache_policy.py, -1 never expires
+# expired responses with an ETag or Last-Modified header are revalidated
+CACHE_EXPIRE_AFTER = {
+    "immutable": -1,
+    "slow": 24 * 60 * 60,
+    "live": 59,
+}
+
+# days after a TidesAndCurrents date range closes, in station time, before it
+# is IMMUTABLE, preliminary data is revised for a few days after it's published
+SETTLE_DAYS = 2
+
+# local archive of downloaded files, see api/archive.py
+ARCHIVE_MAX_BYTES = 512 * 1024 * 1024
+# seconds an archived file stays valid per endpoint class, None never expires
+ARCHIVE_MAX_AGE = {
+    "immutable": None,
+    "slow": CACHE_EXPIRE_AFTER["slow"],
+}
+# archive hits whose access times are kept in memory before being written
+ARCHIVE_TOUCH_BATCH = 64
+# seconds before a stored content no entry references is removed, so contents
+# another process is about to index are kept
+ARCHIVE_ORPHAN_GRACE = 60 * 60
+
+# station capability bits, one per measurement
+# see data/catalog.py, a station's capabilities are the OR of its supported bits
+CAPABILITIES = {x: 1 << i for i, x in enumerate(MEASUREMENTS)}
+
+# streaming, see iter_date_range
+# upper bound of file lines parsed into a single yielded batch
+STREAM_BATCH_SIZE = 5000
+
+# http connections, see api/rest_adapter.py
+# kept-alive connections pooled per hostname, also the async adapter's
+# simultaneous requests per hostname
+HTTP_POOL_SIZE = 10
+# seconds to connect and to wait between bytes of the response
+HTTP_TIMEOUT = (10, 60)
+
+# request rate per hostname, see api/throttle.py
+# sustained requests per second and burst size, hosts not listed aren't limited
+RATE_LIMITS = {
+    "www.ndbc.noaa.gov": {"rate": 5.0, "burst": 10},
+    "api.tidesandcurrents.noaa.gov": {"rate": 5.0, "burst": 10},
+}
+# retries of throttled or failed GET requests
+# waits the Retry-After of the response, else a jittered exponential backoff
+RETRY_ATTEMPTS = 4
+RETRY_BACKOFF = 0.5  # seconds, doubled each attempt
+RETRY_MAX_DELAY = 60  # longer Retry-After are not waited for
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# fallback stations, see ApiMediator.candidates and SeaState.from_date_range
+# nearest stations ranked per measurement, the primary station included
+FALLBACK_STATIONS = 3
+# km, farther stations aren't used as fallback
+FALLBACK_MAX_DISTANCE = 100
+# share of the date range's hours with a sample, below it data is gappy
+# and the next station is tried
+FALLBACK_MIN_COVERAGE = 0.5
+
+# station lookup grid, see data/grid.py, rebuilt with make update-stations
+# cell size in degrees, dividing 180
+GRID_RESOLUTION = 1.0
+# cells with more candidate stations, far from any, scan the full index
+GRID_MAX_CANDIDATES = 32
+
+# resampling, see resample.py
+# aggregations of the samples within a bin
+AGGREGATIONS = (
+    "first",
+    "last",
+    "mean",
+    "min",
+    "max",
+    "vector_mean",  # unit vector mean of directions in degrees
+)
+# keys holding directions in degrees, aggregated with vector_mean by default
+DIRECTION_KEYS = ("d", "mwd")
+# bins without samples, "nan": emitted as NaN, "drop": omitted
+GAPS = (
+    "nan",
+    "drop",
+)
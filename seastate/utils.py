@@ -1,9 +1,20 @@
+import logging
+import math
+from datetime import datetime, timedelta
+from typing import Iterator, Tuple, Union
+
 import numpy as np
 
 
+# mean earth radius used by every distance, km
+EARTH_RADIUS = 6367
+
+
 def haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """Returns distance in km using haversine method
 
+    Scalar path on the math module, see haversine_array for arrays.
+
     Args:
         lat1 (float): Coordinate in decimal degrees
         lon1 (float): Coordinate in decimal degrees
@@ -14,15 +25,164 @@ def haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
         float: Returns great circle distance in km
     """
     # Convert degrees to radians
-    lat1, lon1, lat2, lon2 = map(np.radians, [lat1, lon1, lat2, lon2])
-
-    # Calculate deltas
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
+    lat1, lon1 = math.radians(lat1), math.radians(lon1)
+    lat2, lon2 = math.radians(lat2), math.radians(lon2)
 
     # Haversine method for measuring distance on a sphere
-    a = np.sin(dlat / 2.0) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2.0) ** 2
-    c = 2 * np.arcsin(np.sqrt(a))
+    a = (
+        math.sin((lat2 - lat1) / 2.0) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2.0) ** 2
+    )
+    return EARTH_RADIUS * (2 * math.asin(math.sqrt(a)))
+
+
+def haversine_radians(
+    lat1: np.ndarray,
+    lon1: np.ndarray,
+    lat2: np.ndarray,
+    lon2: np.ndarray,
+    cos_lat1: np.ndarray = None,
+    cos_lat2: np.ndarray = None,
+) -> np.ndarray:
+    """Distance kernel in km on coordinates in radians, broadcasting its inputs
+
+    Args:
+        cos_lat1 (np.ndarray, optional): cos(lat1), when already known.
+        cos_lat2 (np.ndarray, optional): cos(lat2), when already known.
+    """
+    cos_lat1 = np.cos(lat1) if cos_lat1 is None else cos_lat1
+    cos_lat2 = np.cos(lat2) if cos_lat2 is None else cos_lat2
+    a = (
+        np.sin((lat2 - lat1) / 2.0) ** 2
+        + cos_lat1 * cos_lat2 * np.sin((lon2 - lon1) / 2.0) ** 2
+    )
+    return EARTH_RADIUS * 2 * np.arcsin(np.sqrt(a))
+
+
+def haversine_array(
+    lat1: np.ndarray, lon1: np.ndarray, lat2: np.ndarray, lon2: np.ndarray
+) -> np.ndarray:
+    """Returns distances in km between coordinates in decimal degrees
+
+    Inputs broadcast, e.g. a point against arrays of stations, or a column
+    of points against a row of stations for a distance matrix.
+    """
+    return haversine_radians(
+        np.radians(lat1), np.radians(lon1), np.radians(lat2), np.radians(lon2)
+    )
+
+
+def distance_blocks(
+    lats: np.ndarray,
+    lons: np.ndarray,
+    lats2: np.ndarray,
+    lons2: np.ndarray,
+    block_size: int = 1024,
+) -> Iterator[Tuple[slice, np.ndarray]]:
+    """Distances from points to targets, block_size points at a time
+
+    Memory stays bounded to block_size x targets however many points.
+
+    Args:
+        lats (np.ndarray): Points in decimal degrees
+        lons (np.ndarray): Points in decimal degrees
+        lats2 (np.ndarray): Targets in decimal degrees
+        lons2 (np.ndarray): Targets in decimal degrees
+        block_size (int, optional): points per block.
+
+    Yields:
+        Tuple[slice, np.ndarray]: points of the block, and their distances in
+            km to every target, one row per point
+    """
+    lats = np.radians(np.asarray(lats, dtype=float)).reshape(-1, 1)
+    lons = np.radians(np.asarray(lons, dtype=float)).reshape(-1, 1)
+    lats2 = np.radians(np.asarray(lats2, dtype=float)).reshape(1, -1)
+    lons2 = np.radians(np.asarray(lons2, dtype=float)).reshape(1, -1)
+    cos_lat2 = np.cos(lats2)
+    for i in range(0, len(lats), block_size):
+        block = slice(i, i + block_size)
+        yield block, haversine_radians(
+            lats[block], lons[block], lats2, lons2, cos_lat2=cos_lat2
+        )
+
+
+def distance_matrix(
+    lats: np.ndarray,
+    lons: np.ndarray,
+    lats2: np.ndarray,
+    lons2: np.ndarray,
+    block_size: int = 1024,
+) -> np.ndarray:
+    """Points x targets matrix of distances in km, see distance_blocks"""
+    out = np.empty((np.size(lats), np.size(lats2)))
+    for block, dist in distance_blocks(lats, lons, lats2, lons2, block_size):
+        out[block] = dist
+    return out
+
+
+def nearest_targets(
+    lats: np.ndarray,
+    lons: np.ndarray,
+    lats2: np.ndarray,
+    lons2: np.ndarray,
+    block_size: int = 1024,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Nearest target of every point, without holding the distance matrix
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: positions of the nearest targets,
+            first one on ties, and their distances in km. -1 and inf when
+            there are no targets.
+    """
+    positions = np.full(np.size(lats), -1, dtype=int)
+    distances = np.full(np.size(lats), np.inf)
+    if np.size(lats2) == 0:
+        return positions, distances
+    for block, dist in distance_blocks(lats, lons, lats2, lons2, block_size):
+        nearest = np.argmin(dist, axis=1)
+        positions[block] = nearest
+        distances[block] = dist[np.arange(len(dist)), nearest]
+    return positions, distances
+
+
+def build_date_range(
+    start: Union[datetime, None],
+    end: Union[datetime, timedelta, None],
+    logger: logging.Logger = None,
+) -> Tuple[datetime, datetime]:
+    """
+    Builds date range to fullest days possible,
+    with start and end at midnight and (midnight - 1)
+    """
+    # Process timeframe
+    # todo: handle iso date strings
+    # todo: handle bad date strings
+    if start and end:  # all values provided
+        # end can be declared relative to start as a timedelta
+        if isinstance(end, timedelta):
+            end = start + end
+    elif start and not end:  # no end provided, return same day as start
+        end = start
+    elif not start and not end:  # nothing provided, return today
+        start = end = datetime.today()
+
+    # remove microseconds to pass comparison tests
+    # remove hours and minutes from start
+    # set hours and minutes to end of day for end
+    if isinstance(start, datetime):
+        start = start.replace(microsecond=0)
+        start = start.replace(hour=0, minute=0, second=0)
+    if isinstance(end, datetime):
+        end = end.replace(microsecond=0)
+        end = end.replace(hour=23, minute=59, second=59)
+
+    # log warning if end is before start
+    if end < start:
+        (logger or logging.getLogger(__name__)).warning(
+            "end is after start, swapping values"
+        )
+        buffer = end
+        end = start
+        start = buffer
 
-    km = 6367 * c
-    return km
+    return start, end
@@ -1,6 +1,8 @@
 from seastate.api.api_mediator import ApiMediator
 import pytest
 
+from seastate.settings import FALLBACK_MAX_DISTANCE, FALLBACK_STATIONS
+
 
 class TestApiMediator:
     @pytest.fixture
@@ -11,3 +13,45 @@ class TestApiMediator:
     def test_1(self):
         # init
         assert False
+
+    def test_station_is_resolved_once(self, mediator, monkeypatch):
+        station = mediator.station
+        # any further resolution would fail
+        monkeypatch.setattr(mediator, "_nearest_station", None)
+        monkeypatch.setattr("seastate.api.api_mediator.STATION_INDEX", None)
+        assert mediator.station is station
+        assert mediator.distance >= 0
+
+    def test_exclude_invalidates_station(self, mediator):
+        station = mediator.station
+        mediator.exclude = [station.id]
+        assert mediator.station.id != station.id
+
+    def test_target_change_invalidates_station(self, mediator):
+        station = mediator.station
+        mediator._target_lat = -33.9
+        mediator._target_lon = 151.2
+        assert mediator.station.id != station.id
+
+    def test_candidates_start_with_station(self, mediator):
+        candidates = mediator.candidates
+        assert candidates[0] == (mediator.station, mediator.distance)
+        assert 1 <= len(candidates) <= FALLBACK_STATIONS
+        assert all(x <= FALLBACK_MAX_DISTANCE for _, x in candidates[1:])
+        assert len({x.id for x, _ in candidates}) == len(candidates)
+
+    def test_exclude_invalidates_candidates(self, mediator):
+        first = mediator.candidates[0][0]
+        mediator.exclude = [first.id]
+        assert first.id not in [x.id for x, _ in mediator.candidates]
+
+    def test_api_is_shared_per_datasource(self):
+        # wave buoys on either coast, both noaa_ndbc stations
+        west = ApiMediator("wave", 33, -118)
+        east = ApiMediator("wave", 40, -70)
+        assert west.station.id != east.station.id
+        assert west.station.api == east.station.api == "noaa_ndbc"
+        assert west.api is east.api
+        tide = ApiMediator("tide", 32, -117)
+        assert tide.station.api == "noaa_tidesandcurrents"
+        assert tide.api is not west.api
@@ -0,0 +1,178 @@
+import multiprocessing
+import os
+import time
+
+import pytest
+from requests import Response
+
+from seastate.api.archive import ArchiveStore
+from seastate.api.cache_policy import IMMUTABLE, LIVE, SLOW
+from seastate.api.rest_adapter import RestAdapter
+from seastate.exceptions import SeaStateException
+
+
+class TestArchiveStore:
+    @pytest.fixture
+    def archive(self, tmp_path):
+        return ArchiveStore(directory=str(tmp_path))
+
+    def test_put_get_roundtrip(self, archive, tmp_path):
+        archive.put("https://a/1.txt", "content", IMMUTABLE)
+        assert archive.get("https://a/1.txt") == "content"
+        # survives a new instance on the same directory
+        assert ArchiveStore(directory=str(tmp_path)).get("https://a/1.txt") == "content"
+
+    def test_live_is_not_stored(self, archive):
+        archive.put("https://a/realtime.txt", "content", LIVE)
+        assert archive.get("https://a/realtime.txt") is None
+
+    def test_slow_expires(self, tmp_path):
+        archive = ArchiveStore(directory=str(tmp_path), max_age={SLOW: -1})
+        archive.put("https://a/month.txt", "content", SLOW)
+        assert archive.get("https://a/month.txt") is None
+
+    def test_identical_contents_are_stored_once(self, archive):
+        archive.put("https://a/1.txt", "content", IMMUTABLE)
+        archive.put("https://a/2.txt", "content", IMMUTABLE)
+        assert archive.size() == len("content")
+
+    def test_least_recently_used_is_evicted(self, tmp_path):
+        archive = ArchiveStore(directory=str(tmp_path), max_bytes=10)
+        archive.put("https://a/1.txt", "aaaa", IMMUTABLE)
+        archive.put("https://a/2.txt", "bbbb", IMMUTABLE)
+        archive.get("https://a/1.txt")
+        archive.put("https://a/3.txt", "cccc", IMMUTABLE)
+        assert archive.get("https://a/2.txt") is None
+        assert archive.get("https://a/1.txt") == "aaaa"
+        assert archive.size() <= 10
+
+    def test_clear(self, archive):
+        archive.put("https://a/1.txt", "content", IMMUTABLE)
+        archive.clear()
+        assert archive.get("https://a/1.txt") is None
+        assert archive.size() == 0
+
+    def test_get_does_not_write_the_index(self, archive):
+        archive.put("https://a/1.txt", "content", IMMUTABLE)
+        accessed = archive.index["https://a/1.txt"]["accessed"]
+        written = os.stat(archive._index_path).st_mtime_ns
+        time.sleep(0.01)
+        assert archive.get("https://a/1.txt") == "content"
+        assert os.stat(archive._index_path).st_mtime_ns == written
+        archive.flush()
+        stored = ArchiveStore(directory=archive.directory).index
+        assert stored["https://a/1.txt"]["accessed"] > accessed
+
+    def test_concurrent_processes_keep_each_others_entries(self, tmp_path):
+        context = multiprocessing.get_context("spawn")
+        processes = [
+            context.Process(target=_put_many, args=(str(tmp_path), x))
+            for x in range(4)
+        ]
+        for x in processes:
+            x.start()
+        for x in processes:
+            x.join()
+        assert all(x.exitcode == 0 for x in processes)
+        archive = ArchiveStore(directory=str(tmp_path))
+        assert len(archive.index) == 4 * 20
+        assert archive.get("https://a/3/19.txt") == "3-19"
+
+    def test_orphaned_contents_count_against_max_bytes(self, tmp_path):
+        archive = ArchiveStore(directory=str(tmp_path), max_bytes=10)
+        orphan = archive._object_path("0" * 64)
+        os.makedirs(os.path.dirname(orphan))
+        with open(orphan, "w") as outfile:
+            outfile.write("left by an interrupted process")
+        os.utime(orphan, (0, 0))
+        archive.put("https://a/1.txt", "aaaa", IMMUTABLE)
+        archive.put("https://a/2.txt", "bbbbbbbb", IMMUTABLE)
+        assert not os.path.exists(orphan)
+        assert archive.get("https://a/2.txt") == "bbbbbbbb"
+
+
+def _put_many(directory: str, worker: int) -> None:
+    archive = ArchiveStore(directory=directory)
+    for i in range(20):
+        archive.put(f"https://a/{worker}/{i}.txt", f"{worker}-{i}", IMMUTABLE)
+        archive.get(f"https://a/{worker}/{i}.txt")
+
+
+class TestRestAdapterArchive:
+    def test_archived_endpoint_skips_network(self, tmp_path, monkeypatch):
+        class Policy:
+            def classify(self, endpoint, ep_params=None):
+                return IMMUTABLE
+
+        archive = ArchiveStore(directory=str(tmp_path))
+        adapter = RestAdapter("example.com", archive=archive, cache_policy=Policy())
+        archive.put("https://example.com/h1999.txt", "archived", IMMUTABLE)
+
+        def offline(*args, **kwargs):
+            raise ConnectionError("offline")
+
+        monkeypatch.setattr(RestAdapter.session, "request", offline)
+        assert adapter.get("h1999.txt").data == "archived"
+        with pytest.raises(SeaStateException):
+            adapter.get("h2000.txt")
+
+    def test_iter_lines_streams_and_archives(self, tmp_path, monkeypatch):
+        class Policy:
+            def classify(self, endpoint, ep_params=None):
+                return IMMUTABLE
+
+            def expire_after(self, endpoint, ep_params=None):
+                return -1
+
+        archive = ArchiveStore(directory=str(tmp_path))
+        adapter = RestAdapter("example.com", archive=archive, cache_policy=Policy())
+
+        def streamed(**kwargs):
+            assert kwargs["stream"]
+            response = Response()
+            response.status_code = 200
+            response._content = b"#YY MM\n2023 10\n"
+            response._content_consumed = True
+            return response
+
+        monkeypatch.setattr(RestAdapter.session, "request", streamed)
+        assert list(adapter.iter_lines("h1999.txt")) == ["#YY MM", "2023 10"]
+
+        def offline(*args, **kwargs):
+            raise ConnectionError("offline")
+
+        monkeypatch.setattr(RestAdapter.session, "request", offline)
+        assert list(adapter.iter_lines("h1999.txt")) == ["#YY MM", "2023 10"]
+
+    def test_iter_lines_archives_when_stopped_early(self, tmp_path, monkeypatch):
+        class Policy:
+            def classify(self, endpoint, ep_params=None):
+                return IMMUTABLE
+
+            def expire_after(self, endpoint, ep_params=None):
+                return -1
+
+        archive = ArchiveStore(directory=str(tmp_path))
+        adapter = RestAdapter("example.com", archive=archive, cache_policy=Policy())
+
+        def streamed(**kwargs):
+            response = Response()
+            response.status_code = 200
+            response._content = b"#YY MM\n2023 10\n2023 11\n"
+            response._content_consumed = True
+            return response
+
+        monkeypatch.setattr(RestAdapter.session, "request", streamed)
+        lines = adapter.iter_lines("h1999.txt")
+        assert next(lines) == "#YY MM"
+        lines.close()
+
+        def offline(*args, **kwargs):
+            raise ConnectionError("offline")
+
+        monkeypatch.setattr(RestAdapter.session, "request", offline)
+        assert list(adapter.iter_lines("h1999.txt")) == [
+            "#YY MM",
+            "2023 10",
+            "2023 11",
+        ]
@@ -0,0 +1,41 @@
+import asyncio
+import threading
+import time
+
+from seastate.api.async_rest_adapter import AsyncRestAdapter
+from seastate.models import Result
+
+
+class SlowAdapter:
+    hostname = "example.com"
+    url = "https://example.com/"
+    pool_size = 3
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def get(self, endpoint, ep_params=None):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(0.02)
+        with self._lock:
+            self.in_flight -= 1
+        return Result(200, data=endpoint)
+
+
+class TestAsyncRestAdapter:
+    def test_get_runs_concurrently_within_pool_size(self):
+        adapter = SlowAdapter()
+        async_adapter = AsyncRestAdapter(adapter)
+
+        async def fetch_all():
+            return await asyncio.gather(
+                *(async_adapter.get(f"{i}.txt") for i in range(12))
+            )
+
+        results = asyncio.run(fetch_all())
+        assert [x.data for x in results] == [f"{i}.txt" for i in range(12)]
+        assert 1 < adapter.max_in_flight <= adapter.pool_size
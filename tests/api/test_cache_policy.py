@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from seastate.api.cache_policy import (
+    IMMUTABLE,
+    LIVE,
+    SLOW,
+    NdbcCachePolicy,
+    TidesAndCurrentsCachePolicy,
+)
+from seastate.api.rest_adapter import RestAdapter
+
+THIS_YEAR = datetime.today().year
+
+
+def utc_days_ago(days: int) -> str:
+    return (datetime.now(timezone.utc) - timedelta(days=days)).strftime("%Y%m%d")
+
+
+class TestNdbcCachePolicy:
+    @pytest.mark.parametrize(
+        "endpoint, expected",
+        [
+            ("data/realtime2/46224.txt", LIVE),
+            ("data/stdmet/May/46224.txt", SLOW),
+            (
+                f"view_text_file.php?filename=462241{THIS_YEAR}.txt.gz"
+                "&dir=data/stdmet/Jan/",
+                SLOW,
+            ),
+            (
+                "view_text_file.php?filename=42040h1996.txt.gz"
+                "&dir=data/historical/stdmet/",
+                IMMUTABLE,
+            ),
+            (
+                f"view_text_file.php?filename=42040h{THIS_YEAR}.txt.gz"
+                "&dir=data/historical/stdmet/",
+                SLOW,
+            ),
+        ],
+    )
+    def test_classify(self, endpoint, expected):
+        assert NdbcCachePolicy().classify(endpoint) == expected
+
+
+class TestTidesAndCurrentsCachePolicy:
+    @pytest.mark.parametrize(
+        "ep_params, expected",
+        [
+            ({"end_date": "20231006"}, IMMUTABLE),
+            ({"end_date": utc_days_ago(0)}, LIVE),
+            # the station's date may still be yesterday in UTC
+            ({"end_date": utc_days_ago(1)}, LIVE),
+            # closed, preliminary data may still be revised
+            ({"end_date": utc_days_ago(2)}, SLOW),
+            ({"end_date": utc_days_ago(3)}, IMMUTABLE),
+            ({"end_date": "20231006 12:00"}, IMMUTABLE),
+            ({"end_date": "bad"}, LIVE),
+            (None, LIVE),
+        ],
+    )
+    def test_classify(self, ep_params, expected):
+        policy = TidesAndCurrentsCachePolicy()
+        assert policy.classify("api/prod/datagetter?", ep_params) == expected
+
+    def test_expire_after(self):
+        policy = TidesAndCurrentsCachePolicy(expire_after={LIVE: 10})
+        endpoint = "api/prod/datagetter?"
+        assert policy.expire_after(endpoint, {"end_date": "20231006"}) == -1
+        today = utc_days_ago(0)
+        assert policy.expire_after(endpoint, {"end_date": today}) == 10
+        recent = utc_days_ago(2)
+        assert policy.expire_after(endpoint, {"end_date": recent}) == 24 * 60 * 60
+
+
+class TestRestAdapterCachePolicy:
+    def test_request_uses_policy_expiration(self, monkeypatch):
+        calls = []
+
+        class Response:
+            status_code = 200
+            reason = "OK"
+            text = "text"
+
+        def fake_request(**kwargs):
+            calls.append(kwargs)
+            return Response()
+
+        monkeypatch.setattr(RestAdapter.session, "request", fake_request)
+        adapter = RestAdapter("www.ndbc.noaa.gov", cache_policy=NdbcCachePolicy())
+        adapter.get("data/realtime2/46224.txt")
+        adapter.get(
+            "view_text_file.php?filename=42040h1996.txt.gz&dir=data/historical/"
+        )
+        assert [x["expire_after"] for x in calls] == [59, -1]
@@ -0,0 +1,84 @@
+import threading
+import time
+
+from seastate.api.fetcher import ConcurrentFetcher
+from seastate.models import Result
+
+
+class FakeAdapter:
+    def __init__(self, hostname, delay=0.0):
+        self.hostname = hostname
+        self.url = f"https://{hostname}/"
+        self.delay = delay
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.max_threads = 0
+        self._lock = threading.Lock()
+
+    def get(self, endpoint, ep_params=None):
+        with self._lock:
+            self.calls.append(endpoint)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            self.max_threads = max(self.max_threads, threading.active_count())
+        time.sleep(self.delay)
+        with self._lock:
+            self.in_flight -= 1
+        if endpoint == "bad":
+            raise ValueError("bad endpoint")
+        return Result(200, data=endpoint)
+
+
+class TestConcurrentFetcher:
+    def test_fetch_deduplicates_identical_requests(self):
+        adapter = FakeAdapter("example.com")
+        requests = [
+            (adapter, "a.txt", None),
+            (adapter, "b.txt", None),
+            (adapter, "a.txt", None),
+            (adapter, "a.txt", {"x": "1"}),
+        ]
+        results = ConcurrentFetcher().fetch(requests)
+        assert [x.data for x in results] == ["a.txt", "b.txt", "a.txt", "a.txt"]
+        assert sorted(adapter.calls) == ["a.txt", "a.txt", "b.txt"]
+
+    def test_fetch_bounds_in_flight_per_host(self):
+        adapter = FakeAdapter("example.com", delay=0.02)
+        requests = [(adapter, f"{i}.txt", None) for i in range(8)]
+        ConcurrentFetcher(max_per_host=2).fetch(requests)
+        assert len(adapter.calls) == 8
+        assert adapter.max_in_flight <= 2
+
+    def test_fetch_returns_exceptions_per_request(self):
+        adapter = FakeAdapter("example.com")
+        results = ConcurrentFetcher().fetch(
+            [(adapter, "bad", None), (adapter, "good.txt", None)]
+        )
+        assert isinstance(results[0], ValueError)
+        assert results[1].data == "good.txt"
+
+    def test_fetch_bounds_threads_per_host(self):
+        adapters = [FakeAdapter("a.com", delay=0.005), FakeAdapter("b.com", 0.005)]
+        requests = [(x, f"{i}.txt", None) for i in range(100) for x in adapters]
+        threads = threading.active_count()
+        ConcurrentFetcher(max_per_host=3).fetch(requests)
+        assert all(len(x.calls) == 100 for x in adapters)
+        # one pool of max_per_host threads per hostname, not one per request
+        assert max(x.max_threads for x in adapters) <= threads + 2 * 3
+
+    def test_fetch_max_workers_bounds_threads(self):
+        adapters = [FakeAdapter("a.com", delay=0.005), FakeAdapter("b.com", 0.005)]
+        requests = [(x, f"{i}.txt", None) for i in range(20) for x in adapters]
+        threads = threading.active_count()
+        ConcurrentFetcher(max_per_host=4, max_workers=2).fetch(requests)
+        assert max(x.max_threads for x in adapters) <= threads + 2
+
+    def test_fetch_max_workers_bounds_threads_over_many_hosts(self):
+        adapters = [FakeAdapter(f"{x}.com", delay=0.005) for x in "abcdef"]
+        requests = [(x, f"{i}.txt", None) for i in range(5) for x in adapters]
+        threads = threading.active_count()
+        results = ConcurrentFetcher(max_per_host=2, max_workers=3).fetch(requests)
+        assert [x.data for x in results] == [x[1] for x in requests]
+        assert all(len(x.calls) == 5 for x in adapters)
+        assert max(x.max_threads for x in adapters) <= threads + 3
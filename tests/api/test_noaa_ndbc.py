@@ -1,10 +1,167 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
 from seastate.api.noaa_ndbc import NdbcApi
+from seastate.models import Result
+
+REALTIME = """\
+#YY  MM DD hh mm WDIR WSPD GST  WVHT   DPD   APD MWD   PRES  ATMP  WTMP  DEWP  VIS PTDY  TIDE
+#yr  mo dy hr mn degT m/s  m/s     m   sec   sec degT   hPa  degC  degC  degC  nmi  hPa    ft
+2023 10 06 01 00 290  6.0  8.0   1.2    12   6.1 280 1012.4  17.1  18.2  12.0   MM +0.3    MM
+2023 10 06 00 50 999  5.0   MM    MM    MM    MM  MM 1012.5  17.2  18.2  12.1   MM   MM    MM
+2023 10 05 23 50 280  4.0  6.0   1.1    11   5.9 275 1012.9  17.4  18.3  12.2   MM   MM    MM
+2023 10 04 23 50 270  3.0  5.0   1.0    10   5.8 270 1013.0  17.5  18.3  12.3   MM   MM    MM
+"""  # noqa: E501
+
+HISTORICAL = """\
+YY MM DD hh WD   WSPD GST  WVHT  DPD   APD  MWD  BAR    ATMP  WTMP  DEWP  VIS
+96 02 01 00 120  5.1  6.2  1.10 12.50  6.10 999 1015.2  14.1  15.2 999.0 99.0
+96 02 01 01 999  5.3  6.4  1.20 99.00  6.20 999 1015.1  14.0  15.2 999.0 99.0
+96 02 03 00 130  5.5  6.6  1.30 12.70  6.30 999 1015.0  13.9  15.1 999.0 99.0
+"""
 
 
 class TestNdbcApi:
+    @pytest.fixture
+    def api(self):
+        return NdbcApi()
+
     def test_id(self):
         assert NdbcApi().id == "noaa_ndbc"
 
+    def test_parse_result_realtime(self, api):
+        result = [Result(200, data=REALTIME)]
+        start, end = datetime(2023, 10, 6), datetime(2023, 10, 6, 23, 59, 59)
+        data = api._parse_result(result, start, end, "wind")
+        assert data == [
+            {"t": "2023-10-06 01:00:00", "v": "6.0", "d": "290", "g": "8.0"},
+            {"t": "2023-10-06 00:50:00", "v": "5.0", "d": None, "g": None},
+        ]
+
+    def test_parse_result_historical(self, api):
+        result = [Result(200, data=HISTORICAL)]
+        start, end = datetime(1996, 2, 1), datetime(1996, 2, 2, 23, 59, 59)
+        data = api._parse_result(result, start, end, "wave")
+        assert data == [
+            {"t": "1996-02-01 00:00:00", "v": "1.10", "dpd": "12.50", "mwd": None,
+             "apd": "6.10"},
+            {"t": "1996-02-01 01:00:00", "v": "1.20", "dpd": None, "mwd": None,
+             "apd": "6.20"},
+        ]
+
+    def test_parse_result_columns(self, api):
+        result = [Result(200, data=REALTIME)]
+        start, end = datetime(2023, 10, 6), datetime(2023, 10, 6, 23, 59, 59)
+        data = api._parse_result(result, start, end, "wind", format="columns")
+        assert set(data) == {"t", "v", "d", "g"}
+        assert data["t"].dtype == np.dtype("datetime64[s]")
+        assert list(data["v"]) == [6.0, 5.0]
+        assert data["d"][0] == 290
+        assert np.isnan(data["d"][1]) and np.isnan(data["g"][1])
+
+    def test_parse_results_matches_single_measurement(self, api):
+        result = [Result(200, data=REALTIME)]
+        start, end = datetime(2023, 10, 5), datetime(2023, 10, 6, 23, 59, 59)
+        measurements = ["wind", "wave", "air_temp", "water_temp", "air_press"]
+        data = api._parse_results(result, start, end, measurements)
+        for measurement in measurements:
+            expected = api._parse_result(result, start, end, measurement)
+            assert data[measurement] == expected
+
+    def test_measurements_from_date_range_fetches_once(self, api, monkeypatch):
+        calls = []
+
+        def fake_get(endpoint, ep_params=None):
+            calls.append(endpoint)
+            return Result(200, data=REALTIME)
+
+        monkeypatch.setattr(api._adapter, "get", fake_get)
+        today = datetime.today()
+        data = api._measurements_from_date_range(
+            ["wind", "wave", "air_temp"], "46224", today, today
+        )
+        assert set(data) == {"wind", "wave", "air_temp"}
+        assert len(calls) == len(set(calls)) == 1
+
+    def test_iter_measurements_streams_chronologically(self, api, monkeypatch):
+        endpoints = {
+            "data/realtime2/46224.txt": REALTIME,
+            # monthly files are oldest first
+            "data/stdmet/Oct/46224.txt": "\n".join(
+                REALTIME.splitlines()[:2] + REALTIME.splitlines()[:1:-1]
+            ),
+            "view_text_file.php?filename=46224h1996.txt.gz"
+            "&dir=data/historical/stdmet/": HISTORICAL,
+        }
+        calls = []
+
+        def fake_iter_lines(endpoint, ep_params=None):
+            calls.append(endpoint)
+            yield from endpoints[endpoint].splitlines()
+
+        monkeypatch.setattr(
+            api, "_build_requests", lambda *args: [(x, None) for x in endpoints]
+        )
+        monkeypatch.setattr(api._adapter, "iter_lines", fake_iter_lines)
+        start, end = datetime(1996, 1, 1), datetime(2023, 10, 6, 23, 59, 59)
+        batches = list(
+            api.iter_measurements(["wind", "wave"], "46224", start, end, batch_size=2)
+        )
+        assert calls == list(endpoints)[::-1]
+        wind = [x for batch in batches for x in batch["wind"]]
+        # oldest first, the cutoff month overlapping realtime is yielded once
+        assert [x["t"] for x in wind] == [
+            "1996-02-01 00:00:00",
+            "1996-02-01 01:00:00",
+            "1996-02-03 00:00:00",
+            "2023-10-04 23:50:00",
+            "2023-10-05 23:50:00",
+            "2023-10-06 00:50:00",
+            "2023-10-06 01:00:00",
+        ]
+        assert wind[-1] == {
+            "t": "2023-10-06 01:00:00",
+            "v": "6.0",
+            "d": "290",
+            "g": "8.0",
+        }
+        assert all(len(batch["wave"]) <= 2 for batch in batches)
+
+    def test_parse_realtime_since_stops_at_seen_rows(self, api, monkeypatch):
+        read = []
+
+        def fake_iter_lines(endpoint, ep_params=None):
+            for line in REALTIME.splitlines():
+                read.append(line)
+                yield line
+
+        monkeypatch.setattr(api._adapter, "iter_lines", fake_iter_lines)
+        table = api._parse_realtime_since("46224", datetime(2023, 10, 5, 23, 50))
+        assert table.timestamps() == ["2023-10-06 01:00:00", "2023-10-06 00:50:00"]
+        # the row of 2023-10-04 is never read
+        assert len(read) == 5
+
+    def test_sync_measurements_returns_rows_after_cursor(self, api, monkeypatch):
+        today = datetime.today().replace(minute=0, second=0, microsecond=0)
+        rows = [today - timedelta(hours=x) for x in range(3)]
+        text = "#YY  MM DD hh mm WDIR WSPD\n" + "\n".join(
+            f"{x:%Y %m %d %H %M} 290 6.{i}" for i, x in enumerate(rows)
+        )
+
+        def fake_iter_lines(endpoint, ep_params=None):
+            yield from text.splitlines()
+
+        monkeypatch.setattr(api._adapter, "iter_lines", fake_iter_lines)
+        since = {"wind": rows[2], "air_temp": rows[1]}
+        data = api._sync_measurements(
+            ["wind", "air_temp"], "46224", since, today, today, "columns"
+        )
+        assert list(data["wind"]["v"]) == [6.0, 6.1]
+        # the file has no ATMP column
+        assert len(data["air_temp"]["t"]) == 0
+
 
 # from seastate.models import Result
 # from seastate.exceptions import SeaStateException
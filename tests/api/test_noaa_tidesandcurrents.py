@@ -1,6 +1,115 @@
+from datetime import datetime
+
+import numpy as np
+
+from seastate.api.base import coverage
 from seastate.api.noaa_tidesandcurrents import TidesAndCurrentsApi
+from seastate.models import Result
+
+WATER_LEVEL = {
+    "metadata": {"id": "9410170", "name": "San Diego"},
+    "data": [
+        {"t": "2023-10-05 00:00", "v": "0.412", "s": "0.003", "f": "0,0,0,0"},
+        {"t": "2023-10-05 01:00", "v": "", "s": "", "f": "0,0,0,0"},
+    ],
+}
 
 
 class TestTidesAndCurrentsApi:
     def test_id(self):
         assert TidesAndCurrentsApi().id == "noaa_tidesandcurrents"
+
+    def test_coverage_of_today_on_station_clock(self):
+        # 10:00 UTC is 03:00 PDT in San Diego, requested as time_zone=lst_ldt
+        utc = datetime(2023, 10, 5, 10, 0)
+        rows = [{"t": f"2023-10-05 {x:02}:00", "v": "0.4"} for x in range(4)]
+        start, end = datetime(2023, 10, 5), datetime(2023, 10, 5, 23, 59, 59)
+        now = TidesAndCurrentsApi().now(-117.2, utc)
+        assert now <= datetime(2023, 10, 5, 3, 0)
+        assert coverage(rows, start, end, now) == 1.0
+        # on the UTC clock the hours up to 10:00 would count as missing
+        assert coverage(rows, start, end, utc) < 0.5
+
+    def test_parse_result_records(self):
+        result = [Result(200, data=WATER_LEVEL)]
+        start, end = datetime(2023, 10, 5), datetime(2023, 10, 5, 23, 59, 59)
+        data = TidesAndCurrentsApi()._parse_result(result, start, end, "tide")
+        assert data == WATER_LEVEL["data"]
+
+    def test_parse_result_columns(self):
+        result = [Result(200, data=WATER_LEVEL)]
+        start, end = datetime(2023, 10, 5), datetime(2023, 10, 5, 23, 59, 59)
+        data = TidesAndCurrentsApi()._parse_result(
+            result, start, end, "tide", format="columns"
+        )
+        assert set(data) == {"t", "v", "s"}
+        assert data["t"][1] == np.datetime64("2023-10-05T01:00")
+        assert data["v"][0] == 0.412
+        assert np.isnan(data["v"][1])
+
+    def test_chunk_date_range_splits_at_months(self):
+        chunks = TidesAndCurrentsApi._chunk_date_range(
+            datetime(2022, 12, 5), datetime(2023, 2, 3, 23, 59, 59)
+        )
+        assert chunks == [
+            (datetime(2022, 12, 5), datetime(2022, 12, 31, 23, 59, 59)),
+            (datetime(2023, 1, 1), datetime(2023, 1, 31, 23, 59, 59)),
+            (datetime(2023, 2, 1), datetime(2023, 2, 3, 23, 59, 59)),
+        ]
+
+    def test_parse_result_merges_chunks(self):
+        result = [
+            Result(200, data={"data": [{"t": "2023-01-31 23:00", "v": "1"}]}),
+            Result(200, data={"error": {"message": "No data was found"}}),
+            Result(200, data={"data": [{"t": "2023-03-01 00:00", "v": "2"}]}),
+        ]
+        start, end = datetime(2023, 1, 31), datetime(2023, 3, 1, 23, 59, 59)
+        data = TidesAndCurrentsApi()._parse_result(result, start, end, "tide")
+        assert [x["v"] for x in data] == ["1", "2"]
+
+    def test_measurement_from_date_range_fetches_each_chunk(self, monkeypatch):
+        api = TidesAndCurrentsApi()
+        calls = []
+
+        def fake_get(endpoint, ep_params=None):
+            calls.append(ep_params["begin_date"])
+            return Result(200, data={"data": [{"t": ep_params["begin_date"]}]})
+
+        monkeypatch.setattr(api._adapter, "get", fake_get)
+        data = api._measurement_from_date_range(
+            "tide", "9410170", datetime(2023, 1, 15), datetime(2023, 4, 3)
+        )
+        assert sorted(calls) == ["20230115", "20230201", "20230301", "20230401"]
+        # merged in time order regardless of completion order
+        assert [x["t"] for x in data] == [
+            "20230115",
+            "20230201",
+            "20230301",
+            "20230401",
+        ]
+
+    def test_build_endpoint_begins_at_time_of_day(self):
+        api = TidesAndCurrentsApi()
+        _, ep_params = api._build_endpoint(
+            "tide", "9410170", datetime(2023, 10, 5), datetime(2023, 10, 5, 23, 59)
+        )
+        assert ep_params["begin_date"] == "20231005"
+        _, ep_params = api._build_endpoint(
+            "tide", "9410170", datetime(2023, 10, 5, 7, 6), datetime(2023, 10, 5)
+        )
+        assert ep_params["begin_date"] == "20231005 07:06"
+
+    def test_sync_measurements_keeps_rows_after_cursor(self, monkeypatch):
+        api = TidesAndCurrentsApi()
+        calls = []
+
+        def fake_get(endpoint, ep_params=None):
+            calls.append(ep_params)
+            return Result(200, data=WATER_LEVEL)
+
+        monkeypatch.setattr(api._adapter, "get", fake_get)
+        start, end = datetime(2023, 10, 5), datetime(2023, 10, 5, 23, 59, 59)
+        since = {"tide": datetime(2023, 10, 5, 0, 0)}
+        data = api._sync_measurements(["tide"], "9410170", since, start, end)
+        assert data["tide"] == WATER_LEVEL["data"][1:]
+        assert calls[0]["begin_date"] == "20231005"
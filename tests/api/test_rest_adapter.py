@@ -3,6 +3,7 @@ from seastate.models import Result
 from seastate.exceptions import SeaStateException
 
 import pytest
+from requests import Response
 
 
 # needs fixture for adapter
@@ -16,6 +17,30 @@ class TestRestAdapter:
         result = adapter._do("GET", "robots.txt")
         assert isinstance(result, Result)
 
+    def test__do_passes_timeout_on_pooled_session(self, monkeypatch):
+        calls = []
+
+        def fake_request(**kwargs):
+            calls.append(kwargs)
+            response = Response()
+            response.status_code = 200
+            response._content = b"text"
+            return response
+
+        monkeypatch.setattr(RestAdapter.session, "request", fake_request)
+        adapter = RestAdapter("example.org", timeout=(1, 2))
+        adapter.get("a.txt")
+        assert calls[0]["timeout"] == (1, 2)
+
+    def test_larger_pool_size_resizes_pool(self):
+        url = "https://pool.example.org/a.txt"
+        RestAdapter("pool.example.org", pool_size=3)
+        assert RestAdapter.session.get_adapter(url)._pool_maxsize == 3
+        RestAdapter("pool.example.org", pool_size=2)
+        assert RestAdapter.session.get_adapter(url)._pool_maxsize == 3
+        RestAdapter("pool.example.org", pool_size=8)
+        assert RestAdapter.session.get_adapter(url)._pool_maxsize == 8
+
     @pytest.mark.skip
     def test__do_bad_json_raises_SeaStateException(self, adapter):
         result = adapter._do("GET", "")  # returning htnl counts as bad json
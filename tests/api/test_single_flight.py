@@ -0,0 +1,76 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from seastate.api.rest_adapter import RestAdapter
+from seastate.api.single_flight import SingleFlight
+from seastate.models import Result
+
+
+class TestSingleFlight:
+    def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight()
+        calls = []
+        release = threading.Event()
+
+        def fetch():
+            calls.append(1)
+            release.wait(1)
+            return object()
+
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            futures = [executor.submit(flight.do, "key", fetch) for _ in range(5)]
+            # let every caller join the flight before it returns
+            while flight.stats()["coalesced"] < 4:
+                time.sleep(0.001)
+            release.set()
+            results = [x.result() for x in futures]
+        assert len(calls) == 1
+        assert all(x is results[0] for x in results)
+        assert flight.stats() == {"executed": 1, "coalesced": 4, "in_flight": 0}
+
+    def test_exception_is_shared_and_key_released(self):
+        flight = SingleFlight()
+
+        def fail():
+            raise ValueError("bad")
+
+        with pytest.raises(ValueError):
+            flight.do("key", fail)
+        assert flight.do("key", lambda: 1) == 1
+        assert flight.stats()["executed"] == 2
+
+
+class TestRestAdapterSingleFlight:
+    def test_get_coalesces_concurrent_identical_requests(self, monkeypatch):
+        calls = []
+        release = threading.Event()
+
+        def slow_do(self, http_method, endpoint, ep_params=None, data=None):
+            calls.append(endpoint)
+            release.wait(1)
+            return Result(200, data=endpoint)
+
+        monkeypatch.setattr(RestAdapter, "_do", slow_do)
+        monkeypatch.setattr(RestAdapter, "single_flight", SingleFlight())
+        adapter = RestAdapter("www.ndbc.noaa.gov")
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            futures = [
+                executor.submit(adapter.get, "data/realtime2/46224.txt")
+                for _ in range(4)
+            ] + [
+                executor.submit(adapter.get, "data/realtime2/46225.txt")
+                for _ in range(2)
+            ]
+            while RestAdapter.single_flight.stats()["coalesced"] < 4:
+                time.sleep(0.001)
+            release.set()
+            results = [x.result() for x in futures]
+        assert sorted(calls) == [
+            "data/realtime2/46224.txt",
+            "data/realtime2/46225.txt",
+        ]
+        assert results[0] is results[3]
+        assert RestAdapter.single_flight.stats()["coalesced"] == 4
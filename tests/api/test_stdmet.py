@@ -0,0 +1,123 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from seastate.api.stdmet import StdmetTable
+
+TEXT = """\
+#YY  MM DD hh mm WDIR WSPD GST  PRES
+#yr  mo dy hr mn degT m/s  m/s  hPa
+2023 10 06 01 00 290  6.0  8.0 1012.4
+2023 10 06 00 50  MM   MM  999 9999.0
+2023 10 05 23 50 999  4.0  6.0 1012.9
+"""
+
+ARCHIVE = """\
+YYYY MM DD hh WD  WSPD GST  BAR
+1999 01 01 00 120  5.1  6.2 1015.2
+1999 01 01 01 130  5.3
+"""
+
+
+def daily_rows(first: datetime, days: int, newest_first: bool) -> str:
+    rows = [first + timedelta(hours=6 * x) for x in range(days * 4)]
+    if newest_first:
+        rows = rows[::-1]
+    lines = [f"{x:%Y %m %d %H} 00 290  6.0" for x in rows]
+    return "#YY  MM DD hh mm WDIR WSPD\n" + "\n".join(lines) + "\n\n"
+
+
+class TestStdmetTable:
+    def test_from_text_timestamps(self):
+        table = StdmetTable.from_text(TEXT)
+        assert len(table) == 3
+        assert table.t[0] == np.datetime64("2023-10-06T01:00:00")
+        assert table.timestamps()[2] == "2023-10-05 23:50:00"
+
+    def test_from_text_window(self):
+        table = StdmetTable.from_text(
+            TEXT, datetime(2023, 10, 6), datetime(2023, 10, 6)
+        )
+        assert len(table) == 2
+        assert list(table.columns["WSPD"]) == ["6.0", "MM"]
+
+    def test_values_masks_missing(self):
+        table = StdmetTable.from_text(TEXT)
+        wdir = table.values(["WDIR"])
+        assert wdir[0] == 290
+        assert np.isnan(wdir[1:]).all()
+        assert np.isnan(table.values(["PRES"])[1])
+        # 999 is only a placeholder for directions
+        assert table.values(["GST"])[1] == 999
+
+    def test_concat_pads_missing_columns(self):
+        table = StdmetTable.concat(
+            [StdmetTable.from_text(TEXT), StdmetTable.from_text(ARCHIVE)]
+        )
+        assert len(table) == 5
+        value, present = table.raw(["PRES", "BAR"])
+        assert list(value[2:4]) == ["1012.9", "1015.2"]
+        # last line of the archive is truncated
+        assert list(present) == [True, True, True, True, False]
+        _, present = table.raw(["WDIR"])
+        assert list(present) == [True, True, True, False, False]
+
+    def test_corrupted_line_is_padded(self):
+        table = StdmetTable.from_text(ARCHIVE)
+        assert table.t[0] == np.datetime64("1999-01-01T00:00:00")
+        assert list(table.columns["GST"]) == ["6.2", ""]
+
+    def test_iter_lines_batches_match_from_text(self):
+        lines = (TEXT + ARCHIVE).splitlines()
+        tables = list(StdmetTable.iter_lines(lines, batch_size=2))
+        # 2 + 1 realtime rows, 2 archive rows
+        assert [len(x) for x in tables] == [2, 1, 2]
+        expected = StdmetTable.from_text(TEXT + ARCHIVE)
+        table = StdmetTable.concat(tables)
+        assert list(table.t) == list(expected.t)
+        assert list(table.raw(["GST"])[0]) == list(expected.raw(["GST"])[0])
+
+    def test_iter_lines_window_skips_empty_batches(self):
+        lines = TEXT.splitlines()
+        start = end = datetime(2023, 10, 5)
+        tables = list(StdmetTable.iter_lines(lines, start, end, batch_size=1))
+        assert len(tables) == 1
+        assert tables[0].t[0] == np.datetime64("2023-10-05T23:50:00")
+
+    @pytest.mark.parametrize("newest_first", [True, False])
+    @pytest.mark.parametrize(
+        "start, end",
+        [
+            (datetime(2023, 1, 30), datetime(2023, 2, 2)),
+            (datetime(2023, 1, 1), datetime(2023, 1, 1)),
+            (datetime(2023, 2, 9), datetime(2023, 3, 1)),
+            (datetime(2022, 1, 1), datetime(2022, 2, 1)),
+            (None, datetime(2023, 1, 2)),
+        ],
+    )
+    def test_from_text_window_matches_full_scan(self, newest_first, start, end):
+        text = daily_rows(datetime(2023, 1, 1), 40, newest_first)
+        table = StdmetTable.from_text(text, start, end)
+        expected = StdmetTable.from_text(text).between(
+            start or datetime.min, end or datetime.max
+        )
+        assert list(table.t) == list(expected.t)
+        streamed = StdmetTable.iter_lines(
+            text.splitlines(), start, end, newest_first=newest_first
+        )
+        assert list(StdmetTable.concat(list(streamed)).t) == list(expected.t)
+
+    def test_iter_lines_stops_past_window(self):
+        read = []
+
+        def lines():
+            for line in daily_rows(datetime(2023, 1, 1), 40, True).splitlines():
+                read.append(line)
+                yield line
+
+        start = end = datetime(2023, 2, 8)
+        tables = list(StdmetTable.iter_lines(lines(), start, end, newest_first=True))
+        assert len(tables[0]) == 4
+        # header, the day newer than the window, the window and one row past it
+        assert len(read) == 1 + 4 + 4 + 1
@@ -0,0 +1,73 @@
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+
+from seastate.api import throttle
+from seastate.api.throttle import Backoff, ThrottledHTTPAdapter, TokenBucket
+
+
+def response(status_code, headers=None):
+    res = requests.Response()
+    res.status_code = status_code
+    res.headers.update(headers or {})
+    res._content = b""
+    res._content_consumed = True
+    return res
+
+
+class TestTokenBucket:
+    def test_burst_then_sustained_rate(self):
+        bucket = TokenBucket(rate=50, burst=2)
+        started = time.monotonic()
+        waits = [bucket.acquire() for _ in range(6)]
+        elapsed = time.monotonic() - started
+        assert waits[:2] == [0.0, 0.0]
+        # 4 requests past the burst at 50 per second
+        assert elapsed == pytest.approx(4 / 50, abs=0.03)
+
+    def test_bucket_for_configured_hosts_only(self):
+        assert throttle.bucket_for("www.ndbc.noaa.gov") is throttle.bucket_for(
+            "www.ndbc.noaa.gov"
+        )
+        assert throttle.bucket_for("example.com") is None
+
+
+class TestBackoff:
+    def test_jittered_exponential_delay(self):
+        backoff = Backoff(attempts=3, backoff=1, max_delay=3)
+        for attempt, cap in enumerate([1, 2, 3]):
+            assert 0 <= backoff.delay(attempt) <= cap
+        assert backoff.delay(3) is None
+
+    def test_retry_after_seconds_and_date(self):
+        backoff = Backoff(max_delay=60)
+        assert backoff.delay(0, response(429, {"Retry-After": "7"})) == 7
+        date = datetime.now(timezone.utc) + timedelta(seconds=30)
+        delay = backoff.delay(0, response(503, {"Retry-After": format_datetime(date)}))
+        assert delay == pytest.approx(30, abs=2)
+        # not waiting longer than max_delay
+        assert backoff.delay(0, response(429, {"Retry-After": "600"})) is None
+
+
+class TestThrottledHTTPAdapter:
+    def test_retries_throttled_requests(self, monkeypatch):
+        responses = [response(429, {"Retry-After": "1"}), response(503), response(200)]
+        sleeps = []
+        monkeypatch.setattr(HTTPAdapter, "send", lambda *a, **k: responses.pop(0))
+        monkeypatch.setattr(throttle.time, "sleep", sleeps.append)
+        adapter = ThrottledHTTPAdapter(backoff=Backoff(backoff=0.5))
+        request = requests.Request("GET", "https://example.com/a.txt").prepare()
+        assert adapter.send(request).status_code == 200
+        assert sleeps[0] == 1
+        assert 0 <= sleeps[1] <= 1
+
+    def test_gives_up_after_attempts(self, monkeypatch):
+        monkeypatch.setattr(HTTPAdapter, "send", lambda *a, **k: response(503))
+        monkeypatch.setattr(throttle.time, "sleep", lambda x: None)
+        adapter = ThrottledHTTPAdapter(backoff=Backoff(attempts=2))
+        request = requests.Request("GET", "https://example.com/a.txt").prepare()
+        assert adapter.send(request).status_code == 503
@@ -0,0 +1,119 @@
+"""Benchmark harness of the hot paths, see tests/benchmarks/test_benchmarks.py
+
+Benchmarks are skipped unless pytest is run with --bench, e.g.
+
+    python -m pytest tests/benchmarks --bench --bench-save=.benchmarks/baseline.json
+    python -m pytest tests/benchmarks --bench --bench-compare=.benchmarks/baseline.json
+
+--bench-compare fails every benchmark whose median is slower than the
+baseline's by more than --bench-tolerance, default 25%. The options are
+registered in tests/conftest.py.
+"""
+import json
+import os
+import statistics
+import time
+from datetime import datetime
+
+import pytest
+
+from seastate.api.archive import ArchiveStore
+from seastate.api.rest_adapter import RestAdapter
+from tests.benchmarks.noaa_fixtures import replay
+
+# every benchmark runs at least MIN_ROUNDS, and for at least MIN_TIME seconds
+MIN_ROUNDS = 5
+MAX_ROUNDS = 1000
+MIN_TIME = 0.5
+
+_results = {}
+
+
+def pytest_sessionfinish(session):
+    path = session.config.getoption("--bench-save", default=None)
+    if path and _results:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as outfile:
+            json.dump(_results, outfile, indent=2, sort_keys=True)
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not _results:
+        return
+    terminalreporter.section("benchmarks, seconds")
+    terminalreporter.write_line(
+        f"{'name':<60} {'min':>10} {'median':>10} {'rounds':>7}"
+    )
+    for name, x in sorted(_results.items()):
+        terminalreporter.write_line(
+            f"{name:<60} {x['min']:>10.6f} {x['median']:>10.6f} {x['rounds']:>7}"
+        )
+
+
+class Benchmark:
+    """Times a callable over several rounds, see the bench fixture"""
+
+    def __init__(self, name: str, baseline: dict = None, tolerance: float = 0.25):
+        self.name = name
+        self.baseline = baseline or {}
+        self.tolerance = tolerance
+
+    def __call__(self, function, *args, **kwargs):
+        # warm up caches and lazy imports outside of the timings
+        result = function(*args, **kwargs)
+        timings = []
+        began = time.perf_counter()
+        while len(timings) < MAX_ROUNDS and (
+            len(timings) < MIN_ROUNDS or time.perf_counter() - began < MIN_TIME
+        ):
+            tic = time.perf_counter()
+            function(*args, **kwargs)
+            timings.append(time.perf_counter() - tic)
+        stats = {
+            "min": min(timings),
+            "median": statistics.median(timings),
+            "mean": statistics.mean(timings),
+            "rounds": len(timings),
+        }
+        _results[self.name] = stats
+        previous = self.baseline.get(self.name)
+        if previous and stats["median"] > previous["median"] * (1 + self.tolerance):
+            pytest.fail(
+                f"{self.name} regressed: median {stats['median']:.6f}s, "
+                f"baseline {previous['median']:.6f}s"
+            )
+        return result
+
+
+@pytest.fixture(scope="session")
+def baseline(pytestconfig):
+    path = pytestconfig.getoption("--bench-compare", default=None)
+    if not path:
+        return {}
+    with open(path, "r") as content:
+        return json.load(content)
+
+
+@pytest.fixture
+def bench(request, baseline):
+    """Call with a function and its arguments to time it, returns its result"""
+    return Benchmark(
+        request.node.name,
+        baseline,
+        request.config.getoption("--bench-tolerance", default=0.25),
+    )
+
+
+@pytest.fixture
+def today():
+    return datetime.today().replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+@pytest.fixture
+def replay_noaa(monkeypatch, today):
+    """Serves every NOAA request from tests/benchmarks/noaa_fixtures.py
+
+    The archive is bypassed, so every round parses the replayed files.
+    """
+    monkeypatch.setattr(RestAdapter.session, "request", replay(today))
+    monkeypatch.setattr(ArchiveStore, "is_storable", lambda self, x: False)
@@ -0,0 +1,174 @@
+"""Deterministic stand-ins for NOAA responses, replayed instead of the network
+
+Files follow the layout of the live endpoints:
+- data/realtime2/{id}.txt: previous 45 days of 10 minute samples, newest first
+- historical and monthly stdmet files: 10 minute samples, oldest first
+- api/prod/datagetter: hourly json records of the requested product
+
+Values are drawn from a generator seeded by the request, so every run
+parses the same contents.
+"""
+import json
+import re
+import zlib
+from datetime import datetime, timedelta
+from functools import lru_cache
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+from requests import Response
+
+STDMET_HEADER = (
+    "#YY  MM DD hh mm WDIR WSPD GST  WVHT   DPD   APD MWD   PRES  ATMP  WTMP  DEWP"
+    "  VIS PTDY  TIDE\n"
+    "#yr  mo dy hr mn degT m/s  m/s     m   sec   sec degT   hPa  degC  degC  degC"
+    "  nmi  hPa    ft\n"
+)
+STEP = timedelta(minutes=10)
+
+_REALTIME = re.compile(r"data/realtime2/(\w+)\.txt")
+# cutoff month of the current year, data/stdmet/{Mon}/{id}.txt
+_CUTOFF_MONTH = re.compile(r"data/stdmet/(\w{3})/(\w+)\.txt")
+# compressed files, view_text_file.php?filename=...&dir=...
+_HISTORICAL = re.compile(r"(\w+)h(\d{4})\.txt\.gz")
+_MONTHLY = re.compile(r"(\w+)\.txt\.gz")
+
+
+def _rng(*key) -> np.random.Generator:
+    return np.random.default_rng(zlib.crc32(repr(key).encode()))
+
+
+def stdmet_text(station_id: str, start: datetime, end: datetime, newest_first: bool):
+    """Stdmet file with a sample every STEP from start until before end"""
+    n = int((end - start) / STEP)
+    rng = _rng(station_id, start, end)
+    t = np.datetime64(start, "m") + np.arange(n) * np.timedelta64(10, "m")
+    fields = np.datetime_as_string(t).tolist()
+    wdir = rng.integers(0, 360, n)
+    wspd = rng.gamma(2.0, 3.0, n)
+    wvht = rng.gamma(2.0, 0.6, n)
+    dpd = rng.integers(4, 20, n)
+    pres = 1013 + rng.normal(0, 5, n)
+    atmp = 15 + rng.normal(0, 3, n)
+    # sensors drop out now and then, reported as MM
+    missing = rng.random(n) < 0.02
+    rows = []
+    for i, x in enumerate(fields):
+        waves = (
+            f"{wvht[i]:5.2f} {dpd[i]:5d} {dpd[i] * 0.6:5.2f} {wdir[i]:3d}"
+            if i % 3 == 0
+            else "   MM    MM    MM  MM"
+        )
+        rows.append(
+            f"{x[0:4]} {x[5:7]} {x[8:10]} {x[11:13]} {x[14:16]}"
+            f" {'MM' if missing[i] else wdir[i]:>3} {wspd[i]:4.1f} {wspd[i] * 1.3:4.1f}"
+            f" {waves} {pres[i]:6.1f} {atmp[i]:5.1f} {atmp[i] + 1:5.1f}"
+            f" {atmp[i] - 4:5.1f}   MM   MM    MM"
+        )
+    if newest_first:
+        rows.reverse()
+    return STDMET_HEADER + "\n".join(rows) + "\n"
+
+
+@lru_cache(maxsize=None)
+def realtime2(station_id: str, today: datetime) -> str:
+    """Previous 45 days through the end of today, newest first"""
+    end = today + timedelta(days=1)
+    return stdmet_text(station_id, end - timedelta(days=45), end, newest_first=True)
+
+
+@lru_cache(maxsize=None)
+def historical(station_id: str, year: int) -> str:
+    """A full year, oldest first"""
+    return stdmet_text(
+        station_id, datetime(year, 1, 1), datetime(year + 1, 1, 1), newest_first=False
+    )
+
+
+@lru_cache(maxsize=None)
+def monthly(station_id: str, year: int, month: int) -> str:
+    """A single month, oldest first"""
+    start = datetime(year, month, 1)
+    end = (start + timedelta(days=32)).replace(day=1)
+    return stdmet_text(station_id, start, end, newest_first=False)
+
+
+def _begin_end(ep_params: dict):
+    begin = datetime.strptime(ep_params["begin_date"][:8], "%Y%m%d")
+    if len(ep_params["begin_date"]) > 8:
+        begin = datetime.strptime(ep_params["begin_date"], "%Y%m%d %H:%M")
+    end = datetime.strptime(ep_params["end_date"][:8], "%Y%m%d") + timedelta(days=1)
+    return begin, end
+
+
+def datagetter(ep_params: dict) -> dict:
+    """Hourly records of the requested product and date range"""
+    begin, end = _begin_end(ep_params)
+    n = max(int((end - begin) / timedelta(hours=1)), 0)
+    rng = _rng(ep_params["station"], ep_params["product"], begin, end)
+    t = np.datetime64(begin, "m") + np.arange(n) * np.timedelta64(1, "h")
+    times = [x.replace("T", " ") for x in np.datetime_as_string(t).tolist()]
+    values = rng.normal(0, 1, n)
+    if ep_params["product"] == "wind":
+        return {
+            "data": [
+                {
+                    "t": x,
+                    "s": f"{abs(v) * 4:.2f}",
+                    "d": f"{abs(v) * 100 % 360:.2f}",
+                    "dr": "W",
+                    "g": f"{abs(v) * 5:.2f}",
+                    "f": "0,0",
+                }
+                for x, v in zip(times, values.tolist())
+            ]
+        }
+    return {
+        "data": [
+            {"t": x, "v": f"{v:.3f}", "s": "0.003", "f": "0,0,0,0", "q": "p"}
+            for x, v in zip(times, values.tolist())
+        ]
+    }
+
+
+def _response(status_code: int, content: str, url: str) -> Response:
+    response = Response()
+    response.status_code = status_code
+    response.reason = "OK" if status_code == 200 else "Not Found"
+    response._content = content.encode("utf-8")
+    response._content_consumed = True
+    response.encoding = "utf-8"
+    response.url = url
+    return response
+
+
+def replay(today: datetime):
+    """Stand-in for CachedSession.request serving the fixtures above"""
+
+    def request(method: str = "GET", url: str = "", params: dict = None, **kwargs):
+        params = {x: str(y) for x, y in (params or {}).items()}
+        # endpoints of stdmet files carry their own query string
+        query = {x: y[0] for x, y in parse_qs(urlparse(url).query).items()}
+        filename, directory = query.get("filename", ""), query.get("dir", "")
+        if "datagetter" in url:
+            content = json.dumps(datagetter(params))
+        elif _REALTIME.search(url):
+            content = realtime2(_REALTIME.search(url).group(1), today)
+        elif _CUTOFF_MONTH.search(url):
+            name, station_id = _CUTOFF_MONTH.search(url).groups()
+            month = datetime.strptime(name, "%b").month
+            content = monthly(station_id, today.year, month)
+        elif "historical" in directory and _HISTORICAL.match(filename):
+            station_id, year = _HISTORICAL.match(filename).groups()
+            content = historical(station_id, int(year))
+        elif "stdmet" in directory and _MONTHLY.match(filename):
+            # {id}{month}{year}, the month is also in the directory
+            month = datetime.strptime(directory.strip("/")[-3:], "%b").month
+            name = _MONTHLY.match(filename).group(1)
+            station_id = name[: -len(f"{month}{name[-4:]}")]
+            content = monthly(station_id, int(name[-4:]), month)
+        else:
+            return _response(404, f"no fixture for {url}", url)
+        return _response(200, content, url)
+
+    return request
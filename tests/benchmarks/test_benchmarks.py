@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from seastate import SeaState
+from seastate.api.api_mediator import ApiMediator
+from seastate.api.noaa_ndbc import NdbcApi
+from seastate.models import Result
+from seastate.settings import MEASUREMENTS
+from tests.benchmarks.noaa_fixtures import historical, realtime2
+
+FORMATS = ["records", "columns"]
+
+
+class TestBenchmarks:
+    @pytest.fixture
+    def points(self):
+        rng = np.random.default_rng(0)
+        return list(zip(rng.uniform(-60, 70, 64), rng.uniform(-180, 180, 64)))
+
+    @pytest.mark.parametrize("measurement", ["tide", "wind", "wave"])
+    def test_nearest_station(self, bench, points, measurement):
+        mediators = [ApiMediator(measurement, lat, lon) for lat, lon in points]
+
+        def nearest():
+            return [x._nearest_station() for x in mediators]
+
+        assert all(bench(nearest))
+
+    @pytest.mark.parametrize("format", FORMATS)
+    def test_parse_result_realtime_45_days(self, bench, today, format):
+        result = [Result(200, data=realtime2("46224", today))]
+        start = today - timedelta(days=44)
+        end = today + timedelta(days=1, seconds=-1)
+        data = bench(NdbcApi()._parse_result, result, start, end, "wind", format)
+        assert len(data["t"] if format == "columns" else data) == 45 * 24 * 6
+
+    @pytest.mark.parametrize("format", FORMATS)
+    def test_parse_result_historical_year(self, bench, today, format):
+        year = today.year - 1
+        result = [Result(200, data=historical("46224", year))]
+        start, end = datetime(year, 1, 1), datetime(year, 12, 31, 23, 59, 59)
+        data = bench(NdbcApi()._parse_result, result, start, end, "wave", format)
+        assert len(data["t"] if format == "columns" else data) > 365 * 24 * 6 * 0.99
+
+    def test_seastate_construction(self, bench):
+        def construct():
+            seastate = SeaState(32.7, -117.2)
+            # stations are resolved on first access
+            return [seastate.mediator_map[x].station for x in MEASUREMENTS]
+
+        assert all(bench(construct))
+
+    @pytest.mark.parametrize("concurrent", [False, True])
+    @pytest.mark.parametrize("days", [3, 30])
+    def test_from_date_range_recent(self, bench, replay_noaa, today, days, concurrent):
+        seastate = SeaState(32.7, -117.2)
+        start = today - timedelta(days=days - 1)
+        data = bench(seastate.from_date_range, start, today, concurrent)
+        assert set(data) == set(MEASUREMENTS)
+
+    @pytest.mark.parametrize("format", FORMATS)
+    def test_from_date_range_prior_year_month(self, bench, replay_noaa, today, format):
+        seastate = SeaState(32.7, -117.2)
+        start = datetime(today.year - 1, 3, 1)
+        end = datetime(today.year - 1, 3, 31)
+        data = bench(seastate.from_date_range, start, end, format=format)
+        assert set(data) == set(MEASUREMENTS)
@@ -0,0 +1,30 @@
+"""Options of the benchmark harness, see tests/benchmarks/conftest.py
+
+Command line options are only recognized from the root conftest, so
+pytest tests --bench works as well as pytest tests/benchmarks --bench.
+"""
+import pytest
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("seastate benchmarks")
+    group.addoption("--bench", action="store_true", help="run benchmarks")
+    group.addoption("--bench-save", metavar="PATH", help="save results as json")
+    group.addoption(
+        "--bench-compare", metavar="PATH", help="compare against saved results"
+    )
+    group.addoption(
+        "--bench-tolerance",
+        type=float,
+        default=0.25,
+        help="allowed slowdown of the median against --bench-compare",
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--bench"):
+        return
+    skip = pytest.mark.skip(reason="benchmarks run with --bench")
+    for item in items:
+        if "benchmarks" in item.nodeid:
+            item.add_marker(skip)
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from seastate.data import CATALOG_FILE, load_json_stations, load_stations
+from seastate.data.catalog import StationCatalog, names_path
+from seastate.settings import DATASOURCES, MEASUREMENTS
+
+
+class TestStationCatalog:
+    @pytest.fixture
+    def stations(self):
+        return load_json_stations()
+
+    def test_load_stations_reads_compiled_catalog(self, stations):
+        catalog = load_stations()
+        assert isinstance(catalog.records, np.memmap)
+        # compiled catalog is in sync with the json files
+        assert len(catalog) == len(stations)
+        assert list(catalog) == stations
+
+    def test_save_load_round_trip(self, stations, tmp_path):
+        path = tmp_path / "stations.npy"
+        StationCatalog.from_stations(stations).save(path)
+        catalog = StationCatalog.load(path)
+        assert catalog[0] == stations[0]
+        assert catalog[-1] == stations[-1]
+        assert catalog[1:3] == stations[1:3]
+
+    def test_stations_materialized_once_on_access(self):
+        catalog = StationCatalog.load(CATALOG_FILE)
+        assert all(x is None for x in catalog._stations)
+        station = catalog[5]
+        assert catalog[5] is station
+        assert sum(x is not None for x in catalog._stations) == 1
+
+    @pytest.mark.parametrize("measurement", list(MEASUREMENTS) + ["temp", "nope"])
+    def test_supports_matches_is_supported(self, stations, measurement):
+        catalog = StationCatalog.from_stations(stations)
+        expected = [x.is_supported(measurement) for x in stations]
+        assert catalog.supports(measurement).tolist() == expected
+        assert catalog.is_active.tolist() == [x.is_active for x in stations]
+
+    def test_compact_columns(self, stations):
+        catalog = load_stations()
+        # datasource index and no names in the memory-mapped array
+        assert catalog.records.dtype["api"] == np.uint8
+        assert "name" not in catalog.records.dtype.names
+        apis = [DATASOURCES[x] for x in catalog.records["api"]]
+        assert apis == [x.api for x in stations]
+
+    def test_names_read_on_first_use(self, stations, tmp_path):
+        path = tmp_path / "stations.npy"
+        StationCatalog.from_stations(stations).save(path)
+        catalog = StationCatalog.load(path)
+        assert catalog._names == names_path(path)
+        assert catalog.names == [x.name or "" for x in stations]
+        named = next(i for i, x in enumerate(stations) if x.name)
+        assert catalog[named].name == stations[named].name
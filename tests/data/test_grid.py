@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from seastate.data import load_station_grid, load_station_index, load_stations
+from seastate.data.catalog import StationCatalog
+from seastate.data.grid import StationGrid
+from seastate.data.index import StationIndex
+from seastate.settings import MEASUREMENTS
+
+
+@pytest.fixture(scope="module")
+def grid():
+    # coarse cells hold more candidates, lookups must stay exact
+    return StationGrid.build(load_stations(), resolution=10, k=3)
+
+
+@pytest.fixture(scope="module")
+def points():
+    rng = np.random.default_rng(0)
+    points = np.c_[rng.uniform(-90, 90, 200), rng.uniform(-180, 180, 200)]
+    edges = [[90, 180], [-90, -180], [0, 180], [32, -117], [21.3, -157.9]]
+    return np.r_[points, edges].tolist()
+
+
+def assert_same(found, expected):
+    """Same stations in the same order, distances up to rounding"""
+    if isinstance(found, tuple):
+        found, expected = [found], [expected]
+    assert [x.id for x, _ in found] == [x.id for x, _ in expected]
+    assert [x for _, x in found] == pytest.approx([x for _, x in expected])
+
+
+class TestStationGrid:
+    @pytest.mark.parametrize("measurement", MEASUREMENTS)
+    def test_lookups_match_full_scan(self, grid, points, measurement):
+        indexed = StationIndex(load_stations(), grid)
+        full = StationIndex(load_stations())
+        assert indexed.grid is grid
+        for lat, lon in points:
+            assert_same(
+                indexed.nearest(lat, lon, measurement),
+                full.nearest(lat, lon, measurement),
+            )
+            assert_same(
+                indexed.nearest_k(lat, lon, measurement, 3),
+                full.nearest_k(lat, lon, measurement, 3),
+            )
+
+    def test_excluded_candidate_scans_full_index(self, grid):
+        indexed = StationIndex(load_stations(), grid)
+        first, second = indexed.nearest_k(32, -117, "wind", 2)
+        assert_same(indexed.nearest(32, -117, "wind", exclude=[first[0].id]), second)
+
+    def test_larger_k_scans_full_index(self, grid):
+        indexed = StationIndex(load_stations(), grid)
+        full = StationIndex(load_stations())
+        assert_same(
+            indexed.nearest_k(0, -150, "wave", 10), full.nearest_k(0, -150, "wave", 10)
+        )
+
+    def test_grid_of_other_catalog_is_ignored(self, grid):
+        stations = list(load_stations())[:-1]
+        assert StationIndex(StationCatalog.from_stations(stations), grid).grid is None
+
+    def test_save_load_round_trip(self, grid, tmp_path):
+        path = tmp_path / "grid.npz"
+        grid.save(path)
+        loaded = StationGrid.load(path)
+        assert loaded.matches(load_stations())
+        for measurement in MEASUREMENTS:
+            assert loaded.candidates(32, -117, measurement) == grid.candidates(
+                32, -117, measurement
+            )
+
+    def test_compiled_grid_matches_catalog(self):
+        assert load_station_grid().matches(load_stations())
+        assert load_station_index().grid is not None
@@ -0,0 +1,144 @@
+import numpy as np
+import pytest
+
+from seastate.data import load_station_index, load_stations
+from seastate.exceptions import SeaStateException
+from seastate.utils import haversine
+
+
+def brute_force_nearest(lat, lon, measurement, exclude=()):
+    station = None
+    min_ptr = float("inf")
+    for eval_station in load_stations():
+        if eval_station.id in exclude or not eval_station.is_active:
+            continue
+        if not eval_station.is_supported(measurement):
+            continue
+        new_val = haversine(lat, lon, eval_station.lat, eval_station.lon)
+        if new_val < min_ptr:
+            min_ptr = new_val
+            station = eval_station
+    return station, min_ptr
+
+
+class TestStationIndex:
+    @pytest.fixture
+    def index(self):
+        return load_station_index()
+
+    @pytest.mark.parametrize(
+        "lat, lon, measurement",
+        [
+            (32, -117, "tide"),
+            (32, -117, "wave"),
+            (35.81468, -122.78828, "wind"),
+            (-33.9, 151.2, "water_temp"),
+            (60.1, -149.4, "conductivity"),
+            (0, 0, "air_press"),
+        ],
+    )
+    def test_nearest_matches_brute_force(self, index, lat, lon, measurement):
+        expected, expected_dist = brute_force_nearest(lat, lon, measurement)
+        station, dist = index.nearest(lat, lon, measurement)
+        assert station is expected
+        assert dist == pytest.approx(expected_dist)
+
+    def test_nearest_honors_exclude(self, index):
+        first, _ = index.nearest(32, -117, "tide")
+        second, _ = index.nearest(32, -117, "tide", exclude=[first.id])
+        assert second is not None
+        assert second.id != first.id
+
+    def test_nearest_unsupported_measurement_returns_none(self, index):
+        station, dist = index.nearest(32, -117, "not_a_measurement")
+        assert station is None
+        assert dist == float("inf")
+
+    def test_nearest_many_matches_nearest(self, index):
+        lats = np.array([32, 35.81468, -33.9, 60.1, 0])
+        lons = np.array([-117, -122.78828, 151.2, -149.4, 0])
+        positions, dists = index.nearest_many(lats, lons, "wind", block_size=2)
+        for lat, lon, position, dist in zip(lats, lons, positions, dists):
+            station, expected_dist = index.nearest(lat, lon, "wind")
+            assert index.stations[position] is station
+            assert dist == pytest.approx(expected_dist)
+
+    def test_nearest_many_unsupported_measurement_returns_minus_one(self, index):
+        positions, dists = index.nearest_many([32, 33], [-117, -118], "nope")
+        assert (positions == -1).all()
+        assert np.isinf(dists).all()
+
+    @pytest.mark.parametrize("measurement", ["tide", "wind", "wave"])
+    def test_nearest_k_matches_sorted_distances(self, index, measurement):
+        ranked = index.nearest_k(32, -117, measurement, 5)
+        assert len(ranked) == 5
+        assert ranked[0][0] is index.nearest(32, -117, measurement)[0]
+        dists = [x for _, x in ranked]
+        assert dists == sorted(dists)
+        # no station outside of the top 5 is closer than the 5th
+        mask = index._candidate_mask(measurement, ())
+        expected = np.sort(index.distances(32, -117, mask))[:5]
+        np.testing.assert_allclose(dists, expected)
+
+    def test_nearest_k_max_distance(self, index):
+        ranked = index.nearest_k(32, -117, "wind", 50, max_distance=100)
+        assert all(x <= 100 for _, x in ranked)
+        assert len(ranked) < 50
+
+    def test_nearest_k_exclude(self, index):
+        first, second = index.nearest_k(32, -117, "wind", 2)
+        ranked = index.nearest_k(32, -117, "wind", 1, exclude=[first[0].id])
+        assert ranked == [second]
+
+    def test_nearest_k_unsupported_measurement_returns_empty(self, index):
+        assert index.nearest_k(32, -117, "nope", 3) == []
+
+    @pytest.mark.parametrize(
+        "lat, lon, radius, measurement",
+        [
+            (32, -117, 200, "wave"),
+            (32, -117, 500, None),
+            (21.3, -157.9, 300, "wind"),
+            (52, 179.5, 1000, None),
+            (89, 0, 3000, None),
+        ],
+    )
+    def test_within_matches_brute_force(self, index, lat, lon, radius, measurement):
+        expected = {
+            x.id
+            for x in load_stations()
+            if x.is_active
+            and (measurement is None or x.is_supported(measurement))
+            and haversine(lat, lon, x.lat, x.lon) <= radius
+        }
+        found = index.within(lat, lon, radius, measurement)
+        assert {x.id for x, _ in found} == expected
+        dists = [x for _, x in found]
+        assert dists == sorted(dists)
+        assert all(x <= radius for x in dists)
+
+    @pytest.mark.parametrize(
+        "south, west, north, east",
+        [(30, -120, 35, -115), (-60, 170, 60, -170), (0, -180, 90, 180)],
+    )
+    def test_in_bbox_matches_brute_force(self, index, south, west, north, east):
+        def inside(x):
+            if west <= east:
+                in_lon = west <= x.lon <= east
+            else:
+                in_lon = x.lon >= west or x.lon <= east
+            return x.is_active and south <= x.lat <= north and in_lon
+
+        expected = {x.id for x in load_stations() if inside(x)}
+        found = index.in_bbox(south, west, north, east)
+        assert {x.id for x, _ in found} == expected
+
+    def test_in_bbox_measurement_and_exclude(self, index):
+        found = index.in_bbox(30, -120, 35, -115, "tide")
+        assert found and all(x.tide for x, _ in found)
+        excluded = index.in_bbox(30, -120, 35, -115, "tide", exclude=[found[0][0].id])
+        assert len(excluded) == len(found) - 1
+
+    def test_within_negative_radius_raises(self, index):
+        with pytest.raises(SeaStateException):
+            index.within(32, -117, -1)
@@ -1,5 +1,13 @@
-from seastate.data.parsers import StationParser
 import json
+
+import pytest
+
+import seastate.data
+from seastate.data.catalog import StationCatalog
+from seastate.data.grid import StationGrid
+from seastate.data.parsers import CatalogDiff, StationParser
+from seastate.exceptions import SeaStateException
+from seastate.models import Station
 from tests.factories import StationFactory
 
 
@@ -27,3 +35,134 @@ class TestStationParser:
         stations = parser.from_jsons(jsons)
         # just checking that length is the same, not full identity
         assert len(stations) == 2
+
+
+LATEST_OBS = """#STN     LAT      LON  YYYY MM DD hh mm WDIR WSPD   GST WVHT  DPD APD MWD   PRES  PTDY  ATMP  WTMP  DEWP  VIS   TIDE
+#text    deg      deg   yr mo day hr mn degT  m/s   m/s    m  sec sec degT   hPa   hPa  degC  degC  degC  nmi     ft
+46224  33.179 -117.471 2024 01 01 00 00  MM   MM    MM  1.2  14  8.1 270    MM    MM    MM  15.8    MM   MM     MM
+LJAC1  32.867 -117.257 2024 01 01 00 00 280  3.1   4.6   MM   MM   MM  MM 1016.2   MM  14.1  15.2  9.0   MM     MM
+corrupted line
+"""  # noqa: E501
+
+STATIONS_XML = """<?xml version="1.0" encoding="ISO-8859-1"?>
+<stations xmlns="https://opendap.co-ops.nos.noaa.gov/stations/">
+  <station name="La Jolla" ID="9410230">
+    <metadata><location><lat>32.8669</lat><long>-117.2571</long></location></metadata>
+    <parameter name="Water Level" sensorID="A1" DCP="1" status="1"/>
+    <parameter name="Winds" sensorID="C1" DCP="1" status="0"/>
+    <parameter name="Water Temp" sensorID="E1" DCP="1" status="1"/>
+  </station>
+  <station name="No Location" ID="0000000">
+    <parameter name="Water Level" sensorID="A1" DCP="1" status="1"/>
+  </station>
+  <station name="San Diego" ID="9410170">
+    <metadata><location><lat>32.7142</lat><long>-117.1736</long></location></metadata>
+    <parameter name="Air Pressure" sensorID="F1" DCP="1" status="1"/>
+  </station>
+</stations>
+"""
+
+
+class TestStationSources:
+    def test_parse_latest_obs_flags_reported_measurements(self):
+        stations = StationParser().parse_latest_obs(LATEST_OBS)
+        assert [x.id for x in stations] == ["46224", "LJAC1"]
+        assert stations[0].wave and stations[0].water_temp
+        assert not stations[0].wind and not stations[0].tide
+        assert stations[1].wind and stations[1].air_press and stations[1].air_temp
+        assert not stations[1].wave
+
+    def test_parse_stations_xml_streams_namespaced_document(self):
+        stations = StationParser().parse_stations_xml(STATIONS_XML)
+        # stations without a location are skipped
+        assert [x.id for x in stations] == ["9410230", "9410170"]
+        assert stations[0].name == "La Jolla"
+        assert (stations[0].lat, stations[0].lon) == (32.8669, -117.2571)
+        assert stations[0].tide and stations[0].water_temp
+        assert not stations[0].wind
+        assert stations[1].air_press and not stations[1].tide
+
+    def test_parse_stations_xml_without_stations_raises(self):
+        with pytest.raises(SeaStateException):
+            StationParser().parse_stations_xml("<stations/>")
+
+    def test_parse_all_skips_failing_datasource(self, monkeypatch):
+        def fail(self):
+            raise SeaStateException("unavailable")
+
+        station = Station("A", 1.0, 2.0, "noaa_ndbc", wind=True)
+        monkeypatch.setattr(StationParser, "noaa_ndbc", lambda self: [station])
+        monkeypatch.setattr(StationParser, "noaa_tidesandcurrents", fail)
+        assert StationParser().parse_all() == {"noaa_ndbc": [station]}
+
+
+class TestCatalogDiff:
+    def test_between_compares_by_id(self):
+        kept = Station("A", 1.0, 2.0, "noaa_ndbc", wind=True)
+        moved = Station("B", 1.0, 2.0, "noaa_ndbc", wind=True)
+        gone = Station("C", 1.0, 2.0, "noaa_ndbc", wave=True)
+        new = Station("D", 1.0, 2.0, "noaa_ndbc", tide=True)
+        moved_now = Station("B", 1.5, 2.0, "noaa_ndbc", wind=True)
+        diff = CatalogDiff.between([kept, moved, gone], [new, moved_now, kept])
+        assert diff.added == [new]
+        assert diff.removed == [gone]
+        assert diff.changed == [moved_now]
+        assert diff
+
+    def test_unchanged_is_falsy(self):
+        stations = [Station("A", 1.0, 2.0, "noaa_ndbc", wind=True)]
+        assert not CatalogDiff.between(stations, list(stations))
+
+
+class TestSaveStations:
+    @pytest.fixture
+    def data_dir(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(seastate.data, "DATA_DIR", str(tmp_path))
+        monkeypatch.setattr(seastate.data, "CATALOG_FILE", str(tmp_path / "s.npy"))
+        monkeypatch.setattr(seastate.data, "GRID_FILE", str(tmp_path / "g.npz"))
+        return tmp_path
+
+    @pytest.fixture
+    def sources(self, monkeypatch):
+        sources = {
+            "noaa_ndbc": [Station("A", 1.0, 2.0, "noaa_ndbc", wind=True)],
+            "noaa_tidesandcurrents": [
+                Station("B", 3.0, 4.0, "noaa_tidesandcurrents", tide=True)
+            ],
+        }
+        monkeypatch.setattr(
+            StationParser, "parse_all", lambda self, x: {k: sources[k] for k in x}
+        )
+        return sources
+
+    def test_first_build_writes_everything(self, data_dir, sources):
+        diffs = seastate.data.save_stations()
+        assert set(diffs) == set(sources)
+        assert [x.id for x in seastate.data.load_json_stations()] == ["A", "B"]
+        catalog = StationCatalog.load(seastate.data.CATALOG_FILE)
+        assert list(catalog.ids) == ["A", "B"]
+        assert StationGrid.load(seastate.data.GRID_FILE).matches(catalog)
+
+    def test_rebuild_only_rewrites_changed_datasources(self, data_dir, sources):
+        seastate.data.save_stations()
+        tnc = data_dir / "noaa_tidesandcurrents.json"
+        written = tnc.stat().st_mtime_ns
+        sources["noaa_ndbc"].append(Station("C", 5.0, 6.0, "noaa_ndbc", wave=True))
+        diffs = seastate.data.save_stations()
+        assert list(diffs) == ["noaa_ndbc"]
+        assert [x.id for x in diffs["noaa_ndbc"].added] == ["C"]
+        assert tnc.stat().st_mtime_ns == written
+        catalog = StationCatalog.load(seastate.data.CATALOG_FILE)
+        assert list(catalog.ids) == ["A", "C", "B"]
+        assert seastate.data.save_stations() == {}
+
+    def test_failing_datasource_keeps_previous_stations(
+        self, data_dir, sources, monkeypatch
+    ):
+        seastate.data.save_stations()
+        monkeypatch.setattr(
+            StationParser, "parse_all", lambda self, x: {"noaa_ndbc": []}
+        )
+        diffs = seastate.data.save_stations()
+        assert list(diffs) == ["noaa_ndbc"]
+        assert [x.id for x in seastate.data.load_json_stations()] == ["B"]
@@ -0,0 +1,38 @@
+import pytest
+
+from seastate.models import Station, capability_bits
+from seastate.settings import CAPABILITIES
+
+
+class TestStation:
+    @pytest.fixture
+    def station(self):
+        return Station("46224", 33.178, -117.471, "noaa_ndbc", wind=True, wave=True)
+
+    def test_capabilities_bitmask(self, station):
+        assert station.capabilities == CAPABILITIES["wind"] | CAPABILITIES["wave"]
+        assert station.wind and station.wave and not station.tide
+        assert station.is_active
+        assert station.supported_measurements() == ("wind", "wave")
+
+    def test_is_supported_substring(self, station):
+        assert station.is_supported("wind")
+        assert not station.is_supported("tide")
+        assert capability_bits("temp") == (
+            CAPABILITIES["water_temp"] | CAPABILITIES["air_temp"]
+        )
+
+    def test_flag_assignment_updates_capabilities(self, station):
+        station.tide = True
+        station.wind = False
+        assert station.is_supported("tide")
+        assert not station.is_supported("wind")
+
+    def test_slotted(self, station):
+        assert not hasattr(station, "__dict__")
+        with pytest.raises(AttributeError):
+            station.foo = 1
+
+    def test_to_dict_round_trip(self, station):
+        assert Station(**station.to_dict()) == station
+        assert not Station("1", 0, 0, "noaa_ndbc").is_active
@@ -0,0 +1,126 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from seastate.exceptions import SeaStateException
+from seastate.resample import interval_seconds, resample, to_records
+
+
+class TestResample:
+    @pytest.fixture
+    def columns(self):
+        # unsorted, with a missing value and an empty hour
+        t = [
+            "2023-01-01T00:06",
+            "2023-01-01T00:00",
+            "2023-01-01T02:30",
+            "2023-01-01T00:12",
+        ]
+        return {
+            "t": np.array(t, dtype="datetime64[s]"),
+            "v": np.array([2.0, 1.0, 5.0, np.nan]),
+            "d": np.array([350.0, 10.0, 90.0, np.nan]),
+        }
+
+    @pytest.mark.parametrize(
+        "interval, expected",
+        [
+            ("1h", 3600),
+            ("h", 3600),
+            ("10min", 600),
+            ("1d", 86400),
+            (timedelta(minutes=6), 360),
+            (np.timedelta64(2, "h"), 7200),
+        ],
+    )
+    def test_interval_seconds(self, interval, expected):
+        assert interval_seconds(interval) == expected
+
+    @pytest.mark.parametrize("interval", ["1 week", "", timedelta(0)])
+    def test_interval_seconds_bad_interval_raises(self, interval):
+        with pytest.raises(SeaStateException):
+            interval_seconds(interval)
+
+    def test_resample_defaults_mean_and_vector_mean(self, columns):
+        out = resample(columns, "1h")
+        assert out["t"].tolist() == [
+            datetime(2023, 1, 1, 0),
+            datetime(2023, 1, 1, 1),
+            datetime(2023, 1, 1, 2),
+        ]
+        np.testing.assert_allclose(out["v"], [1.5, np.nan, 5.0])
+        # 350 and 10 average to north, not to 180
+        np.testing.assert_allclose(out["d"], [0.0, np.nan, 90.0], atol=1e-9)
+        assert out["n"].tolist() == [3, 0, 1]
+
+    @pytest.mark.parametrize(
+        "how, expected",
+        [
+            ("first", [1.0, 5.0]),
+            ("last", [2.0, 5.0]),
+            ("min", [1.0, 5.0]),
+            ("max", [2.0, 5.0]),
+        ],
+    )
+    def test_resample_aggregations(self, columns, how, expected):
+        out = resample(columns, "1h", how=how, gaps="drop")
+        assert out["v"].tolist() == expected
+        assert out["n"].tolist() == [3, 1]
+
+    @pytest.mark.parametrize(
+        "how, expected_v, expected_d", [("first", 1.0, None), ("last", None, 20.0)]
+    )
+    def test_resample_first_last_take_one_sample(self, how, expected_v, expected_d):
+        t = ["2023-01-01T00:00", "2023-01-01T00:10", "2023-01-01T00:20"]
+        columns = {
+            "t": np.array(t, dtype="datetime64[s]"),
+            "v": np.array([1.0, np.nan, np.nan]),
+            "d": np.array([np.nan, 20.0, np.nan]),
+        }
+        record = to_records(resample(columns, "1h", how=how))[0]
+        # values aren't combined from different samples
+        assert (record["v"], record["d"]) == (expected_v, expected_d)
+
+    def test_resample_aggregation_per_key(self, columns):
+        out = resample(columns, "1d", how={"v": "max"})
+        assert out["v"].tolist() == [5.0]
+        # unspecified keys keep their default
+        angles = np.radians([350.0, 10.0, 90.0])
+        expected = np.degrees(np.arctan2(np.sin(angles).sum(), np.cos(angles).sum()))
+        assert out["d"][0] == pytest.approx(expected)
+
+    def test_resample_bad_aggregation_raises(self, columns):
+        with pytest.raises(SeaStateException):
+            resample(columns, "1h", how="median")
+
+    def test_resample_bad_gaps_raises(self, columns):
+        with pytest.raises(SeaStateException):
+            resample(columns, "1h", gaps="fill")
+
+    def test_resample_start_end_fix_bins(self, columns):
+        out = resample(
+            columns,
+            "1h",
+            start=datetime(2022, 12, 31, 23),
+            end=datetime(2023, 1, 1, 1, 59),
+        )
+        assert len(out["t"]) == 3
+        assert out["t"][0] == np.datetime64("2022-12-31T23:00")
+        np.testing.assert_allclose(out["v"], [np.nan, 1.5, np.nan])
+        # the sample at 02:30 is past end
+        assert out["n"].tolist() == [0, 3, 0]
+
+    def test_resample_empty(self):
+        empty = {"t": np.array([], dtype="datetime64[s]"), "v": np.array([])}
+        out = resample(empty, "1h")
+        assert len(out["t"]) == len(out["v"]) == len(out["n"]) == 0
+        start, end = datetime(2023, 1, 1), datetime(2023, 1, 1, 2)
+        out = resample(empty, "1h", start=start, end=end)
+        assert len(out["t"]) == 3
+        assert np.isnan(out["v"]).all()
+
+    def test_to_records(self, columns):
+        records = to_records(resample(columns, "1h", how="first"))
+        assert records[0] == {"t": "2023-01-01 00:00:00", "v": 1.0, "d": 10.0, "n": 3}
+        assert records[1] == {"t": "2023-01-01 01:00:00", "v": None, "d": None, "n": 0}
@@ -1,7 +1,13 @@
+import asyncio
 from seastate import SeaState
 from datetime import datetime, timedelta
+import numpy as np
 import pytest
 from seastate.settings import MEASUREMENTS
+from seastate.api.base import coverage, empty_data
+from seastate.api.rest_adapter import RestAdapter
+from seastate.models import Result
+from seastate.exceptions import SeaStateException
 
 
 class TestSeaState:
@@ -51,3 +57,240 @@ class TestSeaState:
         # should return a daterange with width 2 days or 1 day, minus 1 second
         start, end = seastate._build_date_range(start, end)
         assert (end - start).total_seconds() == expected
+
+    def test_from_date_range_concurrent_fetches_shared_endpoints_once(
+        self, seastate, monkeypatch
+    ):
+        calls = []
+
+        def fake_get(adapter, endpoint, ep_params=None):
+            calls.append((adapter.hostname, endpoint, str(ep_params)))
+            if "ndbc" in adapter.hostname:
+                return Result(200, data="#YY  MM DD hh mm WDIR WSPD\n")
+            return Result(200, data={"data": []})
+
+        monkeypatch.setattr(RestAdapter, "get", fake_get)
+        data = seastate.from_date_range(datetime.today(), concurrent=True)
+        assert set(data.keys()) == set(MEASUREMENTS)
+        # every unique endpoint is requested exactly once
+        assert len(calls) == len(set(calls))
+
+    def test_from_date_range_bad_format_raises(self, seastate):
+        with pytest.raises(SeaStateException):
+            seastate.from_date_range(format="dataframe")
+
+    def test_batch_fetches_shared_stations_once(self, monkeypatch):
+        calls = []
+
+        def fake_get(adapter, endpoint, ep_params=None):
+            calls.append((adapter.hostname, endpoint, str(ep_params)))
+            if "ndbc" in adapter.hostname:
+                return Result(200, data="#YY  MM DD hh mm WDIR WSPD\n")
+            return Result(200, data={"data": []})
+
+        monkeypatch.setattr(RestAdapter, "get", fake_get)
+        # nearby points share their nearest stations
+        points = [(32, -117), (32.001, -117.001), (47.6, -122.3)]
+        data = SeaState.batch(points, datetime.today())
+        assert len(data) == len(points)
+        for point_data in data:
+            assert set(point_data.keys()) == set(MEASUREMENTS)
+        assert len(calls) == len(set(calls))
+        # single point queries resolve the same stations
+        seastate = SeaState(*points[0])
+        seastate_data = seastate.from_date_range(datetime.today(), concurrent=True)
+        assert data[0] == seastate_data
+
+    def test_batch_bad_latitude_raises(self):
+        with pytest.raises(SeaStateException):
+            SeaState.batch([(32, -117), (91, 0)])
+
+    def test_iter_date_range_yields_measurement_batches(self, seastate, monkeypatch):
+        today = datetime.today()
+        row = f"{today:%Y %m %d} 00 00 290 6.0"
+
+        def fake_iter_lines(adapter, endpoint, ep_params=None):
+            yield from ["#YY  MM DD hh mm WDIR WSPD", row]
+
+        def fake_get(adapter, endpoint, ep_params=None):
+            return Result(200, data={"data": [{"t": f"{today:%Y-%m-%d} 00:00"}]})
+
+        monkeypatch.setattr(RestAdapter, "iter_lines", fake_iter_lines)
+        monkeypatch.setattr(RestAdapter, "get", fake_get)
+        batches = list(seastate.iter_date_range(today, format="columns"))
+        assert {key for key, _ in batches} <= set(MEASUREMENTS)
+        for key, batch in batches:
+            assert len(batch["t"]) == 1
+
+    def test_hourly_keeps_first_sample_per_hour(self, seastate, monkeypatch):
+        # newest first, as realtime files
+        records = [
+            {"t": "2023-10-05 02:10", "v": "0.3", "s": "0.003"},
+            {"t": "2023-10-05 00:40", "v": "", "s": ""},
+            {"t": "2023-10-05 00:10", "v": "0.1", "s": "0.003"},
+        ]
+        t = ["2023-10-05T00:10", "2023-10-05T00:40", "2023-10-05T02:10"]
+        columns = {"t": np.array(t, dtype="datetime64[s]"), "v": np.arange(3.0)}
+
+        def fake_from_date_range(start, end, format="records"):
+            if format == "columns":
+                return {"tide": columns, "wind": empty_data(format)}
+            return {"tide": records, "wind": empty_data(format)}
+
+        monkeypatch.setattr(seastate, "from_date_range", fake_from_date_range)
+        data = seastate.hourly(datetime(2023, 10, 5))
+        # raw source records in source order, hours without samples omitted
+        assert data["tide"] == [records[0], records[2]]
+        # empty measurements used to raise IndexError
+        assert data["wind"] == []
+        data = seastate.hourly(datetime(2023, 10, 5), format="columns")
+        assert data["tide"]["v"].tolist() == [0.0, 2.0]
+        assert set(data["tide"]) == {"t", "v"}
+        assert len(data["wind"]["t"]) == 0
+
+    @pytest.fixture
+    def wind_only(self, seastate, monkeypatch):
+        """Wind of the nearest station is empty, every other station has data"""
+        seastate.exclude = [x for x in MEASUREMENTS if x != "wind"]
+        candidates = seastate.wind.candidates
+        if len(candidates) < 2:
+            pytest.skip("no fallback wind station in range")
+        primary = candidates[0][0].id
+        today = datetime.today()
+        calls = []
+
+        def fake_get(adapter, endpoint, ep_params=None):
+            station_id = (ep_params or {}).get("station") or endpoint
+            calls.append(station_id)
+            if primary in station_id:
+                if "ndbc" in adapter.hostname:
+                    return Result(200, data="#YY  MM DD hh mm WDIR WSPD\n")
+                return Result(200, data={"data": []})
+            if "ndbc" in adapter.hostname:
+                rows = [f"{today:%Y %m %d} {x:02} 00 290 6.0" for x in range(24)]
+                header = "#YY  MM DD hh mm WDIR WSPD\n"
+                return Result(200, data=header + "\n".join(rows))
+            rows = [{"t": f"{today:%Y-%m-%d} {x:02}:00", "s": "6.0"} for x in range(24)]
+            return Result(200, data={"data": rows})
+
+        monkeypatch.setattr(RestAdapter, "get", fake_get)
+        return candidates, calls
+
+    @pytest.mark.parametrize("concurrent", [False, True])
+    def test_from_date_range_falls_back_to_next_station(
+        self, seastate, wind_only, concurrent
+    ):
+        candidates, calls = wind_only
+        data = seastate.from_date_range(
+            datetime.today(), concurrent=concurrent, fallback=True
+        )
+        assert len(data["wind"]) == 24
+        assert seastate.source["wind"] == candidates[1][0]
+        # the primary station is still the nearest one
+        assert seastate.wind.station == candidates[0][0]
+
+    def test_from_date_range_speculative_fetches_candidates_at_once(
+        self, seastate, wind_only
+    ):
+        candidates, calls = wind_only
+        data = seastate.from_date_range(
+            datetime.today(), fallback=True, speculative=True
+        )
+        assert len(data["wind"]) == 24
+        assert seastate.source["wind"] == candidates[1][0]
+        for station, _ in candidates:
+            assert any(station.id in x for x in calls)
+
+    def test_from_date_range_without_fallback(self, seastate, wind_only):
+        candidates, calls = wind_only
+        # fallback is opt in
+        data = seastate.from_date_range(datetime.today())
+        assert data["wind"] == []
+        assert seastate.source["wind"] == candidates[0][0]
+        assert not any(candidates[1][0].id in x for x in calls)
+
+    def test_afrom_date_range_falls_back_to_next_station(self, seastate, wind_only):
+        candidates, calls = wind_only
+        data = asyncio.run(seastate.afrom_date_range(datetime.today(), fallback=True))
+        assert len(data["wind"]) == 24
+        assert seastate.source["wind"] == candidates[1][0]
+        data = asyncio.run(seastate.afrom_date_range(datetime.today()))
+        assert data["wind"] == []
+
+    def test_batch_falls_back_to_next_station(self, seastate, wind_only):
+        candidates, calls = wind_only
+        points = [(32, -117), (32.001, -117.001)]
+        data = SeaState.batch(
+            points, datetime.today(), exclude=seastate.exclude, fallback=True
+        )
+        # the fallback station serves both points with a single fetch
+        assert len(calls) == len(set(calls)) == 2
+        expected = seastate.from_date_range(datetime.today(), fallback=True)
+        assert [x["wind"] for x in data] == [expected["wind"]] * 2
+        assert len(data[0]["wind"]) == 24
+        data = SeaState.batch(points, datetime.today(), exclude=seastate.exclude)
+        assert data[0]["wind"] == []
+
+    def test_coverage_clips_range_to_utc_now(self):
+        now = datetime(2023, 10, 5, 12, 30)
+        t = np.arange("2023-10-05T00", "2023-10-05T12", dtype="datetime64[h]")
+        columns = {"t": t.astype("datetime64[s]"), "v": np.zeros(len(t))}
+        # hours after now aren't counted as missing
+        assert coverage(columns, datetime(2023, 10, 5), datetime(2023, 10, 6), now) == (
+            pytest.approx(12 / 13)
+        )
+        # ranges that haven't begun are covered
+        assert coverage(columns, datetime(2023, 10, 6), datetime(2023, 10, 7), now) == 1
+
+    def test_sync_returns_only_new_samples(self, seastate, monkeypatch):
+        now = datetime.today().replace(minute=0, second=0, microsecond=0)
+        rows = [now]
+
+        def ndbc_text():
+            return "#YY  MM DD hh mm WDIR WSPD\n" + "\n".join(
+                f"{x:%Y %m %d %H %M} 290 6.0" for x in rows[::-1]
+            )
+
+        def fake_get(adapter, endpoint, ep_params=None):
+            if "ndbc" in adapter.hostname:
+                return Result(200, data=ndbc_text())
+            return Result(200, data={"data": []})
+
+        def fake_iter_lines(adapter, endpoint, ep_params=None):
+            yield from ndbc_text().splitlines()
+
+        monkeypatch.setattr(RestAdapter, "get", fake_get)
+        monkeypatch.setattr(RestAdapter, "iter_lines", fake_iter_lines)
+        seastate.exclude = [x for x in MEASUREMENTS if x != "wind"]
+        first = seastate.sync()
+        if seastate.wind.station.api != "noaa_ndbc":
+            pytest.skip("nearest wind station isn't ndbc")
+        assert [x["t"] for x in first["wind"]] == [f"{now:%Y-%m-%d %H:%M:%S}"]
+        assert seastate.cursor[(seastate.wind.station.id, "wind")] == now
+        assert seastate.sync()["wind"] == []
+        rows.append(now + timedelta(minutes=10))
+        assert len(seastate.sync()["wind"]) == 1
+
+    def test_afrom_date_range_matches_concurrent(self, seastate, monkeypatch):
+        calls = []
+
+        def fake_get(adapter, endpoint, ep_params=None):
+            calls.append((adapter.hostname, endpoint, str(ep_params)))
+            if "ndbc" in adapter.hostname:
+                return Result(200, data="#YY  MM DD hh mm WDIR WSPD\n")
+            return Result(200, data={"data": []})
+
+        monkeypatch.setattr(RestAdapter, "get", fake_get)
+        today = datetime.today()
+        expected = seastate.from_date_range(today, concurrent=True)
+        calls.clear()
+
+        async def query():
+            return await asyncio.gather(
+                seastate.afrom_date_range(today),
+                SeaState(47.6, -122.3).afrom_date_range(),
+            )
+
+        data, other = asyncio.run(query())
+        assert data == expected
+        assert set(other.keys()) == set(MEASUREMENTS)
@@ -1,7 +1,68 @@
-from seastate.utils import haversine
+import numpy as np
+import pytest
+
+from seastate.utils import (
+    distance_matrix,
+    haversine,
+    haversine_array,
+    nearest_targets,
+)
 
 
 def test_haversine_success():
     """Test haversine distance calculation"""
     assert haversine(32, -117, 32, -117) == 0
     assert haversine(32, -117, 33, -118) == 145.36863376095982
+
+
+def test_haversine_returns_float():
+    assert type(haversine(32, -117, 33, -118)) is float
+
+
+@pytest.fixture
+def points():
+    rng = np.random.default_rng(0)
+    return rng.uniform(-90, 90, 7), rng.uniform(-180, 180, 7)
+
+
+@pytest.fixture
+def targets():
+    rng = np.random.default_rng(1)
+    return rng.uniform(-90, 90, 5), rng.uniform(-180, 180, 5)
+
+
+def test_haversine_array_matches_scalar(points, targets):
+    lats, lons = points
+    lats2, lons2 = targets
+    dist = haversine_array(lats[:5], lons[:5], lats2, lons2)
+    expected = [haversine(*x) for x in zip(lats[:5], lons[:5], lats2, lons2)]
+    np.testing.assert_allclose(dist, expected)
+    # a point broadcasts against every target
+    dist = haversine_array(lats[0], lons[0], lats2, lons2)
+    assert dist.shape == (5,)
+
+
+@pytest.mark.parametrize("block_size", [1, 3, 1024])
+def test_distance_matrix(points, targets, block_size):
+    lats, lons = points
+    lats2, lons2 = targets
+    matrix = distance_matrix(lats, lons, lats2, lons2, block_size)
+    assert matrix.shape == (7, 5)
+    expected = haversine_array(lats[:, None], lons[:, None], lats2, lons2)
+    np.testing.assert_allclose(matrix, expected)
+
+
+@pytest.mark.parametrize("block_size", [2, 1024])
+def test_nearest_targets(points, targets, block_size):
+    lats, lons = points
+    lats2, lons2 = targets
+    positions, dist = nearest_targets(lats, lons, lats2, lons2, block_size)
+    matrix = distance_matrix(lats, lons, lats2, lons2)
+    assert positions.tolist() == np.argmin(matrix, axis=1).tolist()
+    np.testing.assert_allclose(dist, matrix.min(axis=1))
+
+
+def test_nearest_targets_without_targets(points):
+    positions, dist = nearest_targets(*points, [], [])
+    assert (positions == -1).all()
+    assert np.isinf(dist).all()